@@ -1,42 +1,20 @@
 from __future__ import annotations
 
+import copy
+import importlib
+import sys
+import threading
+from contextlib import suppress
+from importlib.abc import Loader, MetaPathFinder
 from typing import TYPE_CHECKING, Any, Generic
 
 from django import VERSION
-from django.contrib.admin import ModelAdmin
-from django.contrib.admin.options import BaseModelAdmin
-from django.contrib.messages.views import SuccessMessageMixin
-from django.contrib.sessions.backends.db import SessionStore
-from django.contrib.sitemaps import Sitemap
-from django.contrib.syndication.views import Feed
-from django.core.files.utils import FileProxyMixin
-from django.core.paginator import Paginator
-from django.db.models.expressions import ExpressionWrapper, Func, Subquery
-from django.db.models.fields import Field
-from django.db.models.fields.related import ForeignKey
-from django.db.models.fields.related_descriptors import (
-    ForwardManyToOneDescriptor,
-    ReverseManyToOneDescriptor,
-    ReverseOneToOneDescriptor,
-)
-from django.db.models.lookups import Lookup
-from django.db.models.manager import BaseManager
-from django.db.models.options import Options
-from django.db.models.query import BaseIterable, ModelIterable, Prefetch, QuerySet, RawQuerySet
-from django.forms.formsets import BaseFormSet
-from django.forms.models import BaseModelForm, BaseModelFormSet, ModelChoiceField, ModelChoiceIterator, ModelFormOptions
-from django.utils.connection import BaseConnectionHandler, ConnectionProxy
-from django.utils.datastructures import OrderedSet
-from django.utils.functional import LazyObject, classproperty
-from django.views import View
-from django.views.generic.base import TemplateResponseMixin
-from django.views.generic.detail import SingleObjectMixin
-from django.views.generic.edit import DeletionMixin, FormMixin
-from django.views.generic.list import MultipleObjectMixin
 from typing_extensions import TypeVar, override
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
+    from collections.abc import Iterable, Sequence
+    from importlib.machinery import ModuleSpec
+    from types import ModuleType
 
 __all__ = ["monkeypatch"]
 
@@ -47,6 +25,9 @@ _VersionSpec = tuple[int, int]
 class MPGeneric(Generic[_T]):
     """Create a data class to hold metadata about the generic classes needing monkeypatching.
 
+    The class is referenced by the module it is imported from and its name, so that `monkeypatch`
+    doesn't import modules the project never uses, e.g. `django.contrib.sitemaps`.
+
     The `version` param is optional, and a value of `None` means that the monkeypatch is
     version-independent.
 
@@ -54,93 +35,185 @@ class MPGeneric(Generic[_T]):
     possible issues we may run into with this method.
     """
 
-    def __init__(self, cls: type[_T], version: _VersionSpec | None = None) -> None:
+    def __init__(self, module: str, name: str, version: _VersionSpec | None = None) -> None:
         """Set the data fields, basic constructor."""
         self.version = version
-        self.cls = cls
+        self.module = module
+        self.name = name
+
+    @property
+    def cls(self) -> type[_T]:
+        """The class, importing its module if needed."""
+        module = sys.modules.get(self.module) or importlib.import_module(self.module)
+        cls: type[_T] = getattr(module, self.name)
+        return cls
 
     @override
     def __repr__(self) -> str:
         """Better representation in tests and debug."""
-        return "<MPGeneric: {}, versions={}>".format(self.cls, self.version or "all")
+        return "<MPGeneric: {}.{}, versions={}>".format(self.module, self.name, self.version or "all")
 
 
 # certain django classes need to be generic, but lack the __class_getitem__ dunder needed to
 # annotate them: https://github.com/typeddjango/django-stubs/issues/507
 # this list stores them so `monkeypatch` can fix them when called
 _need_generic: list[MPGeneric[Any]] = [
-    MPGeneric(ModelAdmin),
-    MPGeneric(SingleObjectMixin),
-    MPGeneric(FormMixin),
-    MPGeneric(DeletionMixin),
-    MPGeneric(MultipleObjectMixin),
-    MPGeneric(BaseModelAdmin),
-    MPGeneric(Field),
-    MPGeneric(Paginator),
-    MPGeneric(BaseFormSet),
-    MPGeneric(BaseModelForm),
-    MPGeneric(BaseModelFormSet),
-    MPGeneric(ModelChoiceField),
-    MPGeneric(ModelChoiceIterator),
-    MPGeneric(Feed),
-    MPGeneric(Sitemap),
-    MPGeneric(SuccessMessageMixin),
-    MPGeneric(FileProxyMixin),
-    MPGeneric(Lookup),
-    MPGeneric(BaseConnectionHandler),
-    MPGeneric(ExpressionWrapper),
-    MPGeneric(Func),
-    MPGeneric(Subquery),
-    MPGeneric(ReverseManyToOneDescriptor),
-    MPGeneric(ModelIterable),
-    MPGeneric(View),
-    MPGeneric(TemplateResponseMixin),
+    MPGeneric("django.contrib.admin", "ModelAdmin"),
+    MPGeneric("django.views.generic.detail", "SingleObjectMixin"),
+    MPGeneric("django.views.generic.edit", "FormMixin"),
+    MPGeneric("django.views.generic.edit", "DeletionMixin"),
+    MPGeneric("django.views.generic.list", "MultipleObjectMixin"),
+    MPGeneric("django.contrib.admin.options", "BaseModelAdmin"),
+    MPGeneric("django.db.models.fields", "Field"),
+    MPGeneric("django.core.paginator", "Paginator"),
+    MPGeneric("django.forms.formsets", "BaseFormSet"),
+    MPGeneric("django.forms.models", "BaseModelForm"),
+    MPGeneric("django.forms.models", "BaseModelFormSet"),
+    MPGeneric("django.forms.models", "ModelChoiceField"),
+    MPGeneric("django.forms.models", "ModelChoiceIterator"),
+    MPGeneric("django.contrib.syndication.views", "Feed"),
+    MPGeneric("django.contrib.sitemaps", "Sitemap"),
+    MPGeneric("django.contrib.messages.views", "SuccessMessageMixin"),
+    MPGeneric("django.core.files.utils", "FileProxyMixin"),
+    MPGeneric("django.db.models.lookups", "Lookup"),
+    MPGeneric("django.utils.connection", "BaseConnectionHandler"),
+    MPGeneric("django.db.models.expressions", "ExpressionWrapper"),
+    MPGeneric("django.db.models.expressions", "Func"),
+    MPGeneric("django.db.models.expressions", "Subquery"),
+    MPGeneric("django.db.models.fields.related_descriptors", "ReverseManyToOneDescriptor"),
+    MPGeneric("django.db.models.query", "ModelIterable"),
+    MPGeneric("django.views", "View"),
+    MPGeneric("django.views.generic.base", "TemplateResponseMixin"),
     # These types do have native `__class_getitem__` method since django 3.1:
-    MPGeneric(QuerySet, (3, 1)),
-    MPGeneric(BaseManager, (3, 1)),
+    MPGeneric("django.db.models.query", "QuerySet", (3, 1)),
+    MPGeneric("django.db.models.manager", "BaseManager", (3, 1)),
     # These types do have native `__class_getitem__` method since django 4.1:
-    MPGeneric(ForeignKey, (4, 1)),
-    MPGeneric(RawQuerySet),
-    MPGeneric(classproperty),
-    MPGeneric(LazyObject),
-    MPGeneric(ConnectionProxy),
-    MPGeneric(ModelFormOptions),
-    MPGeneric(Options),
-    MPGeneric(BaseIterable),
-    MPGeneric(ForwardManyToOneDescriptor),
-    MPGeneric(ReverseOneToOneDescriptor),
-    MPGeneric(Prefetch),
-    MPGeneric(SessionStore),
-    MPGeneric(OrderedSet),
+    MPGeneric("django.db.models.fields.related", "ForeignKey", (4, 1)),
+    MPGeneric("django.db.models.query", "RawQuerySet"),
+    MPGeneric("django.utils.functional", "classproperty"),
+    MPGeneric("django.utils.functional", "LazyObject"),
+    MPGeneric("django.utils.connection", "ConnectionProxy"),
+    MPGeneric("django.forms.models", "ModelFormOptions"),
+    MPGeneric("django.db.models.options", "Options"),
+    MPGeneric("django.db.models.query", "BaseIterable"),
+    MPGeneric("django.db.models.fields.related_descriptors", "ForwardManyToOneDescriptor"),
+    MPGeneric("django.db.models.fields.related_descriptors", "ReverseOneToOneDescriptor"),
+    MPGeneric("django.db.models.query", "Prefetch"),
+    MPGeneric("django.contrib.sessions.backends.db", "SessionStore"),
+    MPGeneric("django.utils.datastructures", "OrderedSet"),
 ]
 
 if VERSION >= (6, 0):
-    from django.core.paginator import AsyncPage, AsyncPaginator, BasePaginator
-    from django.tasks import Task, TaskContext, TaskResult
-    from django.utils.datastructures import DeferredSubDict
-
     _need_generic.extend(
         [
-            MPGeneric(Task),
-            MPGeneric(TaskContext),
-            MPGeneric(TaskResult),
-            MPGeneric(BasePaginator),
-            MPGeneric(AsyncPaginator),
-            MPGeneric(AsyncPage),
-            MPGeneric(DeferredSubDict),
+            MPGeneric("django.tasks", "Task"),
+            MPGeneric("django.tasks", "TaskContext"),
+            MPGeneric("django.tasks", "TaskResult"),
+            MPGeneric("django.core.paginator", "BasePaginator"),
+            MPGeneric("django.core.paginator", "AsyncPaginator"),
+            MPGeneric("django.core.paginator", "AsyncPage"),
+            MPGeneric("django.utils.datastructures", "DeferredSubDict"),
         ]
     )
 
 
+def _make_generic(cls: type) -> None:
+    cls.__class_getitem__ = classmethod(lambda cls, *args, **kwargs: cls)  # type: ignore[attr-defined]
+
+
+class _PatchingLoader(Loader):
+    """Load a module with the loader found for it, then patch its classes."""
+
+    def __init__(self, loader: Loader, patch_on_import: _PatchOnImport) -> None:
+        self._loader = loader
+        self._patch_on_import = patch_on_import
+
+    @override
+    def create_module(self, spec: ModuleSpec) -> ModuleType | None:
+        return self._loader.create_module(spec)
+
+    @override
+    def exec_module(self, module: ModuleType) -> None:
+        self._loader.exec_module(module)
+        self._patch_on_import.patch(module)
+
+    def __getattr__(self, name: str) -> Any:
+        # Other loader APIs, e.g. `get_resource_reader()` or `is_package()`
+        return getattr(self._loader, name)
+
+
+class _PatchOnImport(MetaPathFinder):
+    """Make the classes of a module generic once it is imported.
+
+    Inserted first in `sys.meta_path` while patches are pending, it returns the spec found by the other
+    finders with a loader patching the module once executed, and removes itself once every module is patched.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # Names of the classes to patch, by module
+        self._pending: dict[str, list[str]] = {}
+
+    def add(self, module: str, name: str) -> None:
+        with self._lock:
+            self._pending.setdefault(module, []).append(name)
+            if self not in sys.meta_path:
+                sys.meta_path.insert(0, self)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+            self._remove()
+
+    def patch(self, module: ModuleType) -> None:
+        with self._lock:
+            names = self._pending.pop(module.__name__, [])
+            if not self._pending:
+                self._remove()
+        for name in names:
+            _make_generic(getattr(module, name))
+
+    def _remove(self) -> None:
+        with suppress(ValueError):
+            sys.meta_path.remove(self)
+
+    @override
+    def find_spec(
+        self, fullname: str, path: Sequence[str] | None, target: ModuleType | None = None
+    ) -> ModuleSpec | None:
+        if fullname not in self._pending:
+            return None
+        finders = sys.meta_path[sys.meta_path.index(self) + 1 :] if self in sys.meta_path else []
+        for finder in finders:
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        if loader is None or not hasattr(loader, "exec_module"):
+            return spec
+        # Loaders may be shared by modules (`zipimporter`) or be classes (`BuiltinImporter`), they're left as is
+        spec = copy.copy(spec)
+        spec.loader = _PatchingLoader(loader, self)
+        return spec
+
+
+_patch_on_import = _PatchOnImport()
+
+
 def monkeypatch(extra_classes: Iterable[type] | None = None) -> None:
     """Monkey patch django as necessary to work properly with mypy."""
-    # Add the __class_getitem__ dunder.
+    # Add the __class_getitem__ dunder, on import for the modules that aren't imported yet.
     suited_for_this_version = filter(
         lambda spec: spec.version is None or VERSION[:2] <= spec.version,
         _need_generic,
     )
     for el in suited_for_this_version:
-        el.cls.__class_getitem__ = classmethod(lambda cls, *args, **kwargs: cls)
+        if el.module in sys.modules:
+            _make_generic(el.cls)
+        else:
+            _patch_on_import.add(el.module, el.name)
     if extra_classes:
         for cls in extra_classes:
-            cls.__class_getitem__ = classmethod(lambda cls, *args, **kwargs: cls)  # type: ignore[attr-defined]
+            _make_generic(cls)
@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import importlib.util
+import subprocess
+import sys
+import zipfile
 from contextlib import suppress
 from typing import TYPE_CHECKING, Protocol
 
@@ -9,10 +13,11 @@ from django.forms.models import ModelForm
 
 import django_stubs_ext
 from django_stubs_ext import patch
-from django_stubs_ext.patch import _need_generic, _VersionSpec
+from django_stubs_ext.patch import MPGeneric, _need_generic, _VersionSpec
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
+    from pathlib import Path
 
 
 class _MakeGenericClasses(Protocol):
@@ -33,6 +38,7 @@ def make_generic_classes(
     _extra_classes: list[type] = []
 
     def fin() -> None:
+        patch._patch_on_import.clear()
         for el in _need_generic:
             with suppress(AttributeError):
                 delattr(el.cls, "__class_getitem__")
@@ -104,3 +110,58 @@ def test_patched_version_specific(
     for el in _need_generic:
         if el.version is not None and django_version <= el.version:
             assert el.cls[int] is el.cls
+
+
+def test_patches_modules_on_import(
+    make_generic_classes: _MakeGenericClasses,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Test that the classes of a module imported after `monkeypatch` are patched on import."""
+    (tmp_path / "not_imported_yet.py").write_text("class NotGeneric: ...\n")
+    monkeypatch.syspath_prepend(tmp_path)
+    monkeypatch.setattr(patch, "_need_generic", [MPGeneric("not_imported_yet", "NotGeneric")])
+    monkeypatch.delitem(sys.modules, "not_imported_yet", raising=False)
+    make_generic_classes()
+
+    assert "not_imported_yet" not in sys.modules
+    from not_imported_yet import NotGeneric  # type: ignore[import-not-found]
+
+    assert NotGeneric[int] is NotGeneric
+    # Nothing left to patch
+    assert patch._patch_on_import not in sys.meta_path
+
+
+def test_shared_loaders_are_left_alone(
+    make_generic_classes: _MakeGenericClasses,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Test that patching a module on import doesn't change the loaders shared by other modules."""
+    archive = str(tmp_path / "modules.zip")
+    with zipfile.ZipFile(archive, "w") as f:
+        f.writestr("zipped_module.py", "class NotGeneric: ...\n")
+    monkeypatch.syspath_prepend(archive)
+    monkeypatch.setattr(patch, "_need_generic", [MPGeneric("zipped_module", "NotGeneric")])
+    monkeypatch.delitem(sys.modules, "zipped_module", raising=False)
+    make_generic_classes()
+
+    # Only probing for the module
+    assert importlib.util.find_spec("zipped_module") is not None
+    assert patch._patch_on_import in sys.meta_path
+    from zipped_module import NotGeneric  # type: ignore[import-not-found]
+
+    assert NotGeneric[int] is NotGeneric
+    # The same `zipimporter` loads every module of the archive
+    assert "exec_module" not in vars(sys.path_importer_cache[archive])
+    assert patch._patch_on_import not in sys.meta_path
+
+
+def test_monkeypatch_does_not_import_unused_modules() -> None:
+    """Test that `monkeypatch` leaves the modules to patch alone until the project imports them."""
+    code = (
+        "import sys; import django_stubs_ext; django_stubs_ext.monkeypatch(); "
+        "assert 'django.contrib.sitemaps' not in sys.modules; "
+        "from django.contrib.sitemaps import Sitemap; Sitemap[int]"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,119 @@
+"""Command line tools of the plugin, run with `python -m mypy_django_plugin <command>`.
+
+`dump-schema` sets up Django once and writes the model registry snapshot (see `mypy_django_plugin.django.snapshot`)
+to a file, e.g. generated once per commit in CI and shared by parallel mypy runs with the `model_snapshot_file`
+setting, or read by other tools.
+
+`generate-overlays` writes the stubs of the project's model modules with the members the plugin adds to the
+models (see `mypy_django_plugin.django.overlays`), for type checkers without the plugin.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+from mypy.defaults import CONFIG_NAMES, SHARED_CONFIG_NAMES
+from mypy.modulefinder import mypy_path
+
+from mypy_django_plugin.config import DjangoPluginConfig
+from mypy_django_plugin.django.context import DjangoContext
+from mypy_django_plugin.django.overlays import add_field_types, generate_overlays
+from mypy_django_plugin.django.snapshot import (
+    SNAPSHOT_FILENAME,
+    ModelRegistrySnapshot,
+    distribution_source,
+    dump_snapshot,
+    load_snapshot,
+)
+
+
+def _default_config_file() -> str | None:
+    return next((name for name in [*CONFIG_NAMES, *SHARED_CONFIG_NAMES] if os.path.isfile(name)), None)
+
+
+def _shareable_sources(snapshot: ModelRegistrySnapshot, start: str) -> ModelRegistrySnapshot:
+    """Make the sources of the snapshot independent of the checkout and of the Python environment.
+
+    The paths of the project's sources are made relative to `start`, and the files of installed distributions
+    (Django, third party apps) are replaced by the distribution's version. A snapshot with relative paths is only
+    valid for mypy runs from `start`.
+    """
+    start = os.path.abspath(start)
+    sources = {}
+    for path, digest in snapshot.sources.items():
+        if (source := distribution_source(path)) is not None:
+            distribution, version = source
+            sources[distribution] = version
+            continue
+        relative_path = os.path.relpath(path, start)
+        sources[path if relative_path.startswith(os.pardir) else relative_path] = digest
+    return snapshot._replace(sources=dict(sorted(sources.items())))
+
+
+def _django_context(plugin_config: DjangoPluginConfig) -> DjangoContext:
+    sys.path.extend(mypy_path())
+    return DjangoContext(plugin_config.django_settings_module, static_settings=plugin_config.static_settings)
+
+
+def dump_schema(args: argparse.Namespace) -> int:
+    plugin_config = DjangoPluginConfig(args.config_file)
+    django_context = _django_context(plugin_config)
+    snapshot = add_field_types(_shareable_sources(django_context.registry_snapshot, os.getcwd()))
+    output = args.output or plugin_config.model_snapshot_file or SNAPSHOT_FILENAME
+    dump_snapshot(snapshot, output)
+    # Also checks that the snapshot is valid for runs from this directory
+    if load_snapshot(output, plugin_config.django_settings_module) != snapshot:
+        print(f"error: could not write {output}", file=sys.stderr)
+        return 1
+    print(f"Wrote the schema of {len(snapshot.models)} models to {output}")
+    return 0
+
+
+def generate_overlays_command(args: argparse.Namespace) -> int:
+    written = generate_overlays(_django_context(DjangoPluginConfig(args.config_file)), args.output_dir)
+    print(f"Wrote {len(written)} overlays to {args.output_dir}")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m mypy_django_plugin", description="django-stubs mypy plugin tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    config_file_help = (
+        "mypy config file with the plugin settings (default: the first of mypy.ini, .mypy.ini, "
+        "pyproject.toml and setup.cfg found)"
+    )
+
+    dump_schema_parser = commands.add_parser(
+        "dump-schema",
+        help="write the models, fields, relations and managers of the project to a JSON file",
+        description="Set up Django and write the model registry snapshot, valid for mypy runs from this directory.",
+    )
+    dump_schema_parser.add_argument("--config-file", default=_default_config_file(), help=config_file_help)
+    dump_schema_parser.add_argument(
+        "-o",
+        "--output",
+        help=f"file to write (default: the `model_snapshot_file` setting, or {SNAPSHOT_FILENAME})",
+    )
+    dump_schema_parser.set_defaults(handler=dump_schema)
+
+    overlays_parser = commands.add_parser(
+        "generate-overlays",
+        help="write the stubs of the model modules of the project, for type checkers without the plugin",
+        description="Set up Django and write the stubs of the model modules in the current directory, with the "
+        "members the plugin adds to the models: managers, reverse relations, implicit through models, exceptions "
+        "and `_id` attributes.",
+    )
+    overlays_parser.add_argument("--config-file", default=_default_config_file(), help=config_file_help)
+    overlays_parser.add_argument(
+        "-o", "--output-dir", default="typings", help="directory to write the stubs to (default: typings)"
+    )
+    overlays_parser.set_defaults(handler=generate_overlays_command)
+
+    args = parser.parse_args(argv)
+    return int(args.handler(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
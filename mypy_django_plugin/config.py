@@ -6,7 +6,7 @@ import textwrap
 import tomllib
 from functools import partial
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, NoReturn
+from typing import TYPE_CHECKING, Any, Final, NoReturn
 
 if TYPE_CHECKING:
     from collections.abc import Callable
@@ -16,8 +16,13 @@ INI_USAGE = """
 ...
 [mypy.plugins.django-stubs]
 django_settings_module = str (default: `os.getenv("DJANGO_SETTINGS_MODULE")`)
+static_settings = bool (default: false)
 strict_settings = bool (default: true)
 strict_model_abstract_attrs = bool (default: true)
+model_snapshot = bool (default: false)
+model_snapshot_file = str (default: none)
+validation_level = "types-only" | "standard" | "strict" (default: "strict")
+profile_dir = str (default: `os.getenv("DJANGO_STUBS_PROFILE_DIR")`)
 ...
 """
 TOML_USAGE = """
@@ -25,19 +30,30 @@ TOML_USAGE = """
 ...
 [tool.django-stubs]
 django_settings_module = str (default: `os.getenv("DJANGO_SETTINGS_MODULE")`)
+static_settings = bool (default: false)
 strict_settings = bool (default: true)
 strict_model_abstract_attrs = bool (default: true)
+model_snapshot = bool (default: false)
+model_snapshot_file = str (default: none)
+validation_level = "types-only" | "standard" | "strict" (default: "strict")
+profile_dir = str (default: `os.getenv("DJANGO_STUBS_PROFILE_DIR")`)
 ...
 """
 INVALID_FILE = "mypy config file is not specified or found"
 COULD_NOT_LOAD_FILE = "could not load configuration file"
 MISSING_SECTION = "no section [{section}] found"
 DJANGO_SETTINGS_ENV_VAR = "DJANGO_SETTINGS_MODULE"
+PROFILE_DIR_ENV_VAR = "DJANGO_STUBS_PROFILE_DIR"
 MISSING_DJANGO_SETTINGS = (
     "missing required 'django_settings_module' config.\n"
     f"Either specify this config or set your `{DJANGO_SETTINGS_ENV_VAR}` env var"
 )
 INVALID_BOOL_SETTING = "invalid {key!r}: the setting must be a boolean"
+# From the least to the most checks, see `DjangoPluginConfig.validates`
+VALIDATION_LEVELS: Final = ("types-only", "standard", "strict")
+INVALID_VALIDATION_LEVEL = (
+    f"invalid 'validation_level': the setting must be one of {', '.join(map(repr, VALIDATION_LEVELS))}"
+)
 
 
 def exit_with_error(msg: str, is_toml: bool = False) -> NoReturn:
@@ -57,10 +73,24 @@ def exit_with_error(msg: str, is_toml: bool = False) -> NoReturn:
 
 
 class DjangoPluginConfig:
-    __slots__ = ("django_settings_module", "strict_model_abstract_attrs", "strict_settings")
+    __slots__ = (
+        "django_settings_module",
+        "model_snapshot",
+        "model_snapshot_file",
+        "profile_dir",
+        "static_settings",
+        "strict_model_abstract_attrs",
+        "strict_settings",
+        "validation_level",
+    )
 
     django_settings_module: str
+    static_settings: bool
     strict_settings: bool
+    model_snapshot: bool
+    model_snapshot_file: str | None
+    validation_level: str
+    profile_dir: str | None
 
     def __init__(self, config_file: str | None) -> None:
         if not config_file:
@@ -99,12 +129,27 @@ class DjangoPluginConfig:
         if not isinstance(self.django_settings_module, str):
             toml_exit("invalid 'django_settings_module': the setting must be a string")
 
+        self.static_settings = config.get("static_settings", False)
+        if not isinstance(self.static_settings, bool):
+            toml_exit(INVALID_BOOL_SETTING.format(key="static_settings"))
         self.strict_settings = config.get("strict_settings", True)
         if not isinstance(self.strict_settings, bool):
             toml_exit(INVALID_BOOL_SETTING.format(key="strict_settings"))
         self.strict_model_abstract_attrs = config.get("strict_model_abstract_attrs", True)
         if not isinstance(self.strict_model_abstract_attrs, bool):
             toml_exit(INVALID_BOOL_SETTING.format(key="strict_model_abstract_attrs"))
+        self.model_snapshot = config.get("model_snapshot", False)
+        if not isinstance(self.model_snapshot, bool):
+            toml_exit(INVALID_BOOL_SETTING.format(key="model_snapshot"))
+        self.model_snapshot_file = config.get("model_snapshot_file")
+        if self.model_snapshot_file is not None and not isinstance(self.model_snapshot_file, str):
+            toml_exit("invalid 'model_snapshot_file': the setting must be a string")
+        self.validation_level = config.get("validation_level", "strict")
+        if self.validation_level not in VALIDATION_LEVELS:
+            toml_exit(INVALID_VALIDATION_LEVEL)
+        self.profile_dir = config.get("profile_dir") or os.getenv(PROFILE_DIR_ENV_VAR)
+        if self.profile_dir is not None and not isinstance(self.profile_dir, str):
+            toml_exit("invalid 'profile_dir': the setting must be a string")
 
     def parse_ini_file(self, filepath: Path) -> None:
         parser = configparser.ConfigParser()
@@ -129,6 +174,11 @@ class DjangoPluginConfig:
 
         self.django_settings_module = django_settings_module
 
+        try:
+            self.static_settings = parser.getboolean(section, "static_settings", fallback=False)
+        except ValueError:
+            exit_with_error(INVALID_BOOL_SETTING.format(key="static_settings"))
+
         try:
             self.strict_settings = parser.getboolean(section, "strict_settings", fallback=True)
         except ValueError:
@@ -139,11 +189,36 @@ class DjangoPluginConfig:
         except ValueError:
             exit_with_error(INVALID_BOOL_SETTING.format(key="strict_model_abstract_attrs"))
 
+        try:
+            self.model_snapshot = parser.getboolean(section, "model_snapshot", fallback=False)
+        except ValueError:
+            exit_with_error(INVALID_BOOL_SETTING.format(key="model_snapshot"))
+
+        model_snapshot_file = parser.get(section, "model_snapshot_file", fallback=None)
+        self.model_snapshot_file = model_snapshot_file.strip("'\"") if model_snapshot_file else None
+
+        self.validation_level = parser.get(section, "validation_level", fallback="strict").strip("'\"")
+        if self.validation_level not in VALIDATION_LEVELS:
+            exit_with_error(INVALID_VALIDATION_LEVEL)
+
+        self.profile_dir = parser.get(section, "profile_dir", fallback=None) or os.getenv(PROFILE_DIR_ENV_VAR)
+
+    def validates(self, level: str) -> bool:
+        """Whether the checks of the validation `level` are enabled.
+
+        - "types-only" only refines the types of ORM calls (`values()`, `annotate()`, ...)
+        - "standard" also checks the arguments naming model fields: lookups, `create()`, `update()`, ...
+        - "strict" also checks the field paths traversing relations: `select_related()`, `order_by()`, ...
+        """
+        return VALIDATION_LEVELS.index(self.validation_level) >= VALIDATION_LEVELS.index(level)
+
     def to_json(self, extra_data: dict[str, Any]) -> dict[str, Any]:
         """We use this method to reset mypy cache via `report_config_data` hook."""
         return {
             "django_settings_module": self.django_settings_module,
+            "static_settings": self.static_settings,
             "strict_settings": self.strict_settings,
             "strict_model_abstract_attrs": self.strict_model_abstract_attrs,
+            "validation_level": self.validation_level,
             **dict(sorted(extra_data.items())),
         }
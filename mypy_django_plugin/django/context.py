@@ -1,25 +1,42 @@
 from __future__ import annotations
 
+import hashlib
+import importlib
 import os
 import sys
 from collections import defaultdict
 from contextlib import contextmanager
 from functools import cached_property
-from typing import TYPE_CHECKING, Any, Literal
+from typing import TYPE_CHECKING, Any, Final, Literal, NamedTuple, Self
 
 from django.core.exceptions import FieldDoesNotExist, FieldError
 from django.db import models
 from django.db.models.base import Model
 from django.db.models.constants import LOOKUP_SEP
 from django.db.models.fields import AutoField, CharField, Field
-from django.db.models.fields.related import ForeignKey, RelatedField
+from django.db.models.fields.related import ForeignKey, ForeignObject, RelatedField
 from django.db.models.fields.reverse_related import ForeignObjectRel
 from django.db.models.lookups import Exact, In
 from django.db.models.sql.query import Query
+from mypy.nodes import Var
 from mypy.typeanal import make_optional_type
-from mypy.types import AnyType, Instance, ProperType, TypeOfAny, UnionType, get_proper_type
+from mypy.types import AnyType, Instance, ProperType, TupleType, TypeOfAny, UnionType, get_proper_type
 from mypy.types import Type as MypyType
-
+from typing_extensions import TypeVar
+
+from mypy_django_plugin.django.snapshot import (
+    FieldSnapshot,
+    ModelRegistrySnapshot,
+    ModelSnapshot,
+    SettingsSnapshot,
+    digest_files,
+    digest_source_files,
+    dump_snapshot,
+    load_snapshot,
+    related_modules_by_module,
+    snapshot_lock,
+)
+from mypy_django_plugin.django.static_settings import read_static_settings
 from mypy_django_plugin.exceptions import UnregisteredModelError
 from mypy_django_plugin.lib import fullnames, helpers
 
@@ -33,7 +50,7 @@ except ImportError:
 
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable, Iterator, Mapping, Sequence
+    from collections.abc import Callable, Iterator, Mapping, Sequence
 
     from django.apps.registry import Apps
     from django.conf import LazySettings
@@ -55,29 +72,80 @@ def temp_environ() -> Iterator[None]:
         os.environ.update(environ)
 
 
-def initialize_django(settings_module: str) -> tuple[Apps, LazySettings]:
+def initialize_settings(settings_module: str, *, static: bool = False) -> LazySettings:
+    """Configure the settings by importing `settings_module`, or from its source when `static`."""
     with temp_environ():
         os.environ["DJANGO_SETTINGS_MODULE"] = settings_module
 
         # add current directory to sys.path
         sys.path.append(os.getcwd())
 
-        from django.apps import apps
         from django.conf import settings
 
+        if not settings.configured:
+            if static:
+                settings.configure(**read_static_settings(settings_module))
+            else:
+                settings._setup()  # type: ignore[misc]
+
+    assert settings.configured, "Settings are not configured"
+
+    return settings
+
+
+def _model_module_names(apps: Apps) -> set[str]:
+    """Modules defining the registered models or any of their (abstract) bases"""
+    return {
+        model_cls.__module__
+        for concrete_model_cls in apps.get_models(include_auto_created=True, include_swapped=True)
+        for model_cls in concrete_model_cls.__mro__
+        if issubclass(model_cls, Model)
+    }
+
+
+def _module_file(module_name: str) -> str | None:
+    module_file = getattr(sys.modules.get(module_name), "__file__", None)
+    return os.path.abspath(module_file) if module_file is not None else None
+
+
+def model_fingerprint_name(model_fullname: str) -> str:
+    """Name of the symbol holding the fingerprint of a model in the settings modules, see `model_fingerprints`.
+
+    Without dots: mypy takes a dotted name for a reference to another module and doesn't compare its value.
+    """
+    return "__django_model__:" + model_fullname.replace(".", ":")
+
+
+def initialize_django(settings_module: str, *, static_settings: bool = False) -> tuple[Apps, LazySettings]:
+    settings = initialize_settings(settings_module, static=static_settings)
+
+    with temp_environ():
+        os.environ["DJANGO_SETTINGS_MODULE"] = settings_module
+
+        from django.apps import apps
+
         apps.get_swappable_settings_name.cache_clear()  # type: ignore[attr-defined]
         apps.clear_cache()
-
-        if not settings.configured:
-            settings._setup()  # type: ignore[misc]
         apps.populate(settings.INSTALLED_APPS)
 
     assert apps.apps_ready, "Apps are not ready"
-    assert settings.configured, "Settings are not configured"
 
     return apps, settings
 
 
+# Upper bound of entries in each lookup resolution cache, the oldest entries are evicted first
+LOOKUP_CACHE_SIZE: Final = 8192
+
+_K = TypeVar("_K")
+_V = TypeVar("_V")
+
+
+def _remember(cache: dict[_K, _V], key: _K, value: _V) -> None:
+    if len(cache) >= LOOKUP_CACHE_SIZE:
+        del cache[next(iter(cache))]
+    cache[key] = value
+
+
 class LookupsAreUnsupported(Exception):
     pass
 
@@ -106,6 +174,11 @@ def _get_field_set_type_from_model_type_info(info: TypeInfo | None, field_name:
     return None
 
 
+def _is_uninferred_attribute(info: TypeInfo, name: str) -> bool:
+    sym = info.get(name)
+    return sym is not None and isinstance(sym.node, Var) and sym.node.type is None
+
+
 def _get_field_get_type_from_model_type_info(info: TypeInfo | None, field_name: str) -> MypyType | None:
     field_type = get_field_type_from_model_type_info(info, field_name)
     if field_type is not None:
@@ -113,13 +186,387 @@ def _get_field_get_type_from_model_type_info(info: TypeInfo | None, field_name:
     return None
 
 
+class _LookupStep(NamedTuple):
+    """A name of a lookup resolved on a model, an edge of the tree of the lookups walked from the model."""
+
+    # Whether the name is a field of the model, the rest of the lookup being lookups and transforms otherwise
+    is_field: bool
+    # The model a relation leads to, the rest of the lookup being resolved on it
+    related_model: type[Model] | None
+
+
+class ModelFieldIndex(NamedTuple):
+    """A model's fields grouped by kind, built once from `_meta.get_fields()`."""
+
+    all_fields: tuple[_AnyField, ...]
+    fields: tuple[Field[Any, Any], ...]
+    foreign_keys: tuple[ForeignKey[Any, Any], ...]
+    # Forward relations
+    related_fields: tuple[RelatedField[Any, Any], ...]
+    # Reverse relations
+    relations: tuple[ForeignObjectRel, ...]
+    primary_key: Field[Any, Any] | None
+    fields_by_name: Mapping[str, Field[Any, Any]]
+    fields_by_attname: Mapping[str, Field[Any, Any]]
+
+    @classmethod
+    def from_model(cls, model_cls: type[Model]) -> Self:
+        all_fields = tuple(model_cls._meta.get_fields())
+        fields = tuple(field for field in all_fields if isinstance(field, Field))
+        return cls(
+            all_fields=all_fields,
+            fields=fields,
+            foreign_keys=tuple(field for field in fields if isinstance(field, ForeignKey)),
+            related_fields=tuple(field for field in fields if isinstance(field, RelatedField)),
+            relations=tuple(field for field in all_fields if isinstance(field, ForeignObjectRel)),
+            primary_key=next((field for field in fields if field.primary_key), None),
+            fields_by_name={field.name: field for field in fields},
+            fields_by_attname={field.attname: field for field in fields},
+        )
+
+
 class DjangoContext:
-    def __init__(self, django_settings_module: str) -> None:
+    """Access to the project's Django setup.
+
+    Django is set up lazily: settings are configured on first access of `settings` and the app
+    registry is populated on first access of `apps_registry` (or anything derived from it), so
+    runs that never need runtime model data don't pay for importing the project.
+    """
+
+    def __init__(
+        self,
+        django_settings_module: str,
+        snapshot_file: str | None = None,
+        *,
+        shared_snapshot_file: str | None = None,
+        watch_sources: bool = False,
+        static_settings: bool = False,
+    ) -> None:
         self.django_settings_module = django_settings_module
+        # Whether the settings are read from the source of the settings module instead of importing it
+        self.static_settings = static_settings
+        # When set, registry data is read from (and persisted to) this file
+        self.snapshot_file = snapshot_file
+        # When set, registry data is read from this file first, e.g. written by `dump-schema`. It's never
+        # written: rebuilt on another machine, its sources wouldn't be valid where it was generated.
+        self.shared_snapshot_file = shared_snapshot_file
+        # Whether the registry is brought up to date with edited sources, see `refresh_changed_source`
+        self.watch_sources = watch_sources
+        # Digests of the settings and model module files the registry was populated from
+        self._populated_sources: dict[str, str] = {}
+
+        self._solved_lookups: dict[
+            tuple[type[Model], str], tuple[Sequence[str], Sequence[str], Expression | Literal[False]] | None
+        ] = {}
+        self._resolved_fields: dict[tuple[type[Model], tuple[str, ...]], tuple[_AnyField, type[Model]]] = {}
+        self._lookup_steps: dict[tuple[type[Model], str], _LookupStep | None] = {}
+        self._field_indexes: dict[type[Model], ModelFieldIndex] = {}
+        # Mypy types computed from the `TypeInfo`s of the current build, see `clear_type_caches`
+        self._class_typeinfos: dict[type, TypeInfo] = {}
+        self._expected_types: dict[tuple[type[Model], str], Mapping[str, MypyType]] = {}
+        self._manager_methods: dict[tuple[str, str, tuple[MypyType, ...]], ProperType | None] = {}
+        self._row_types: dict[tuple[str, type[Model] | None, tuple[tuple[str, MypyType], ...]], TypeInfo] = {}
 
-        apps, settings = initialize_django(self.django_settings_module)
-        self.apps_registry = apps
-        self.settings = settings
+    @cached_property
+    def settings(self) -> LazySettings:
+        return initialize_settings(self.django_settings_module, static=self.static_settings)
+
+    @cached_property
+    def apps_registry(self) -> Apps:
+        apps, _ = initialize_django(self.django_settings_module, static_settings=self.static_settings)
+        if self.watch_sources:
+            self._populated_sources = digest_source_files(self.django_settings_module, _model_module_names(apps))
+        return apps
+
+    @property
+    def is_django_set_up(self) -> bool:
+        return "apps_registry" in self.__dict__
+
+    def refresh_changed_source(self, path: str) -> bool:
+        """Bring the registry up to date when `path` is a settings or model module edited since Django was set up.
+
+        Meant for long running processes, like the mypy daemon, checking the project again after edits.
+        An edited model module reloads itself and the modules whose models point at its models (or inherit
+        from them), while edited settings re-populate the whole registry. Returns whether anything changed.
+        """
+        if not self.watch_sources or not self.is_django_set_up:
+            # Django isn't set up yet, it will read the current sources
+            return False
+        path = os.path.abspath(path)
+        digest = self._populated_sources.get(path)
+        if digest is None or digest_files([path])[path] == digest:
+            return False
+
+        changed_module = next(
+            (module for module in self.model_modules if _module_file(module) == path),
+            None,
+        )
+        if changed_module is not None and changed_module != self.django_settings_module:
+            self._reload_model_module(changed_module)
+        else:
+            self._repopulate()
+        self._clear_registry_caches()
+        # Sets up Django again after `_repopulate()`
+        self._populated_sources = digest_source_files(
+            self.django_settings_module, _model_module_names(self.apps_registry)
+        )
+        return True
+
+    @cached_property
+    def settings_source_modules(self) -> frozenset[str]:
+        """The settings module and the (split settings) modules it's read from, only known when watching sources."""
+        if not self.watch_sources:
+            return frozenset()
+        # The digested model modules include the modules of the bases of the models, like `django.db.models.base`
+        model_modules = _model_module_names(self.apps_registry)
+        return frozenset(
+            {
+                self.django_settings_module,
+                *(
+                    module
+                    for module in list(sys.modules)
+                    if module not in model_modules and _module_file(module) in self._populated_sources
+                ),
+            }
+        )
+
+    def model_fingerprints(self) -> dict[str, str]:
+        """A digest of the registry data of every model, by `<module>.<name>`.
+
+        The daemon only reprocesses what depends on symbols that changed, while edited settings change the
+        models without changing the models' modules. Publishing these in the settings modules lets an edit of
+        the settings trigger exactly the models whose registry data changed, see `AddRelatedModelDependencies`.
+        """
+        snapshot = self._persisted_registry_snapshot
+        models = snapshot.models if snapshot is not None else self._snapshot_models()
+        auth_user_model = self.model_class_fullname_for_label(self.settings_snapshot.auth_user_model)
+        return {
+            fullname: hashlib.sha256(repr((model, fullname == auth_user_model)).encode()).hexdigest()
+            for fullname, model in models.items()
+        }
+
+    def _reload_model_module(self, changed_module: str) -> None:
+        affected_modules = {changed_module}
+        for module, model_classes in self.model_modules.items():
+            for model_cls in model_classes.values():
+                if module == changed_module:
+                    # The fields of these models hold the classes about to be replaced
+                    for relation in self.get_model_field_index(model_cls).relations:
+                        affected_modules.add(relation.related_model.__module__)
+                elif any(base.__module__ == changed_module for base in model_cls.__mro__[1:]):
+                    affected_modules.add(module)
+
+        apps = self.apps_registry
+        # Unregister the previous classes, so that reloading doesn't conflict with them and relations
+        # declared as strings are resolved against the new ones
+        for app_models in apps.all_models.values():
+            for name, model_cls in list(app_models.items()):
+                if model_cls.__module__ in affected_modules:
+                    del app_models[name]
+        # Modules importing the changed module's classes must be reloaded after it
+        for module in sorted(affected_modules, key=lambda module: module != changed_module):
+            if module in sys.modules:
+                importlib.reload(sys.modules[module])
+        apps.clear_cache()
+
+    def _repopulate(self) -> None:
+        from django.apps import apps
+        from django.conf import settings
+        from django.utils.functional import empty
+
+        # Import the settings (including split settings modules) and every model module again,
+        # registering new model classes
+        source_modules = [module for module in sys.modules if _module_file(module) in self._populated_sources]
+        for module in [*source_modules, *self.model_modules]:
+            sys.modules.pop(module, None)
+        settings._wrapped = empty
+        apps.app_configs = {}
+        apps.all_models = defaultdict(dict)
+        apps.apps_ready = apps.models_ready = apps.ready = apps.loading = False
+        apps.clear_cache()
+        for name in ("settings", "apps_registry"):
+            self.__dict__.pop(name, None)
+
+    def _clear_registry_caches(self) -> None:
+        for name in (
+            "_stored_registry_snapshot",
+            "registry_snapshot",
+            "settings_snapshot",
+            "auth_user_module",
+            "related_modules",
+            "model_modules",
+            "settings_source_modules",
+            "all_registered_model_classes",
+            "_model_class_fullnames_by_label_lower",
+            "is_contrib_auth_installed",
+            "is_contenttypes_installed",
+        ):
+            self.__dict__.pop(name, None)
+        self._solved_lookups.clear()
+        self._resolved_fields.clear()
+        self._lookup_steps.clear()
+        self._field_indexes.clear()
+        self.clear_type_caches()
+
+    def clear_type_caches(self) -> None:
+        """Forget the mypy types computed during the current build.
+
+        The daemon updates the `TypeInfo`s of reprocessed modules in place, the types computed from them are
+        only valid until the next (re)build of a module, see `NewSemanalDjangoPlugin.set_modules`.
+        """
+        self._class_typeinfos.clear()
+        self._expected_types.clear()
+        self._manager_methods.clear()
+        self._row_types.clear()
+
+    @cached_property
+    def _stored_registry_snapshot(self) -> ModelRegistrySnapshot | None:
+        if self.shared_snapshot_file is not None:
+            snapshot = load_snapshot(self.shared_snapshot_file, self.django_settings_module)
+            if snapshot is not None:
+                return snapshot
+        if self.snapshot_file is None:
+            return None
+        return load_snapshot(self.snapshot_file, self.django_settings_module)
+
+    @cached_property
+    def registry_snapshot(self) -> ModelRegistrySnapshot:
+        """Registry data that doesn't require Django to be initialized when loaded from a snapshot file.
+
+        This is a picklable, immutable description of the registry, shared through `snapshot_file` by
+        all processes of a build (e.g. parallel mypy workers): only the first one sets up Django for it.
+        """
+        snapshot = self._stored_registry_snapshot
+        if snapshot is not None:
+            return snapshot
+        if self.snapshot_file is None:
+            return self._build_registry_snapshot()
+
+        with snapshot_lock(self.snapshot_file):
+            # Written by another process while waiting for the lock
+            snapshot = self._stored_registry_snapshot = load_snapshot(self.snapshot_file, self.django_settings_module)
+            if snapshot is None:
+                snapshot = self._build_registry_snapshot()
+                dump_snapshot(snapshot, self.snapshot_file)
+        return snapshot
+
+    @cached_property
+    def settings_snapshot(self) -> SettingsSnapshot:
+        """Settings the plugin depends on, available without populating the app registry."""
+        if self._stored_registry_snapshot is not None:
+            return self._stored_registry_snapshot.settings
+        return SettingsSnapshot(
+            installed_apps=tuple(self.settings.INSTALLED_APPS),
+            auth_user_model=self.settings.AUTH_USER_MODEL,
+            default_auto_field=self.settings.DEFAULT_AUTO_FIELD,
+        )
+
+    @property
+    def _persisted_registry_snapshot(self) -> ModelRegistrySnapshot | None:
+        """The registry snapshot when it's read from or written to a file.
+
+        Without a snapshot file, building the snapshot (every field of every model, and the digests of the
+        source files) would only slow down the run: the registry is read directly instead.
+        """
+        if self.snapshot_file is None and self._stored_registry_snapshot is None:
+            return None
+        return self.registry_snapshot
+
+    @cached_property
+    def auth_user_module(self) -> str | None:
+        """Module of the model behind `AUTH_USER_MODEL`, `None` when its app isn't installed."""
+        snapshot = self._persisted_registry_snapshot
+        if snapshot is not None:
+            return snapshot.auth_user_module
+        return self._get_auth_user_module()
+
+    @cached_property
+    def related_modules(self) -> dict[str, tuple[str, ...]]:
+        """Model module -> modules of all models related to its models, see `ModelSnapshot.related_modules`."""
+        snapshot = self._persisted_registry_snapshot
+        if snapshot is not None:
+            return snapshot.related_modules
+        related_modules: dict[str, set[str]] = {}
+        for module, model_classes in self.model_modules.items():
+            module_related = related_modules.setdefault(module, set())
+            for model_cls in model_classes.values():
+                relations: list[RelatedField[Any, Any] | ForeignObjectRel] = [
+                    *self.get_model_related_fields(model_cls),
+                    *model_cls._meta.related_objects,
+                ]
+                module_related.update(
+                    key.rpartition(".")[0]
+                    for relation in relations
+                    if (key := self._related_model_key(relation)) is not None
+                )
+        return {module: tuple(sorted(related - {module})) for module, related in sorted(related_modules.items())}
+
+    def _get_auth_user_module(self) -> str | None:
+        try:
+            return self.apps_registry.get_model(self.settings_snapshot.auth_user_model).__module__
+        except LookupError:
+            # get_user_model() model app is not installed
+            return None
+
+    def _related_model_key(self, field: RelatedField[Any, Any] | ForeignObjectRel) -> str | None:
+        try:
+            related_model_cls = self.get_field_related_model_cls(field)
+        except UnregisteredModelError:
+            return None
+        return f"{related_model_cls.__module__}.{related_model_cls.__name__}"
+
+    def _snapshot_model(self, model_cls: type[Model]) -> ModelSnapshot:
+        reverse_related_models = {
+            key for rel in model_cls._meta.related_objects if (key := self._related_model_key(rel)) is not None
+        }
+        reverse_accessors = {
+            (accessor_name, key)
+            for rel in model_cls._meta.related_objects
+            if (accessor_name := rel.get_accessor_name()) is not None
+            and (key := self._related_model_key(rel)) is not None
+        }
+        return ModelSnapshot(
+            module=model_cls.__module__,
+            name=model_cls.__name__,
+            label_lower=model_cls._meta.label_lower,
+            is_abstract=model_cls._meta.abstract,
+            fields=tuple(
+                FieldSnapshot(
+                    name=field.name,
+                    attname=field.attname,
+                    field_class=helpers.get_class_fullname(field.__class__),
+                    null=field.null,
+                    primary_key=field.primary_key,
+                    related_model=self._related_model_key(field) if isinstance(field, RelatedField) else None,
+                    to_fields=tuple(field.to_fields) if isinstance(field, ForeignObject) else (),
+                )
+                for field in self.get_model_fields(model_cls)
+            ),
+            reverse_related_models=tuple(sorted(reverse_related_models)),
+            reverse_accessors=tuple(sorted(reverse_accessors)),
+            managers=tuple(
+                (manager.name, helpers.get_class_fullname(manager.__class__)) for manager in model_cls._meta.managers
+            ),
+        )
+
+    def _snapshot_models(self) -> dict[str, ModelSnapshot]:
+        return {
+            f"{module}.{name}": self._snapshot_model(model_cls)
+            for module, model_classes in self.model_modules.items()
+            for name, model_cls in model_classes.items()
+        }
+
+    def _build_registry_snapshot(self) -> ModelRegistrySnapshot:
+        models = self._snapshot_models()
+        return ModelRegistrySnapshot(
+            django_settings_module=self.django_settings_module,
+            settings=self.settings_snapshot,
+            auth_user_module=self._get_auth_user_module(),
+            models=models,
+            labels=dict(self._model_class_fullnames_by_label_lower),
+            related_modules=related_modules_by_module(models.values()),
+            sources=digest_source_files(self.django_settings_module, self.model_modules),
+        )
 
     @cached_property
     def model_modules(self) -> dict[str, dict[str, type[Model]]]:
@@ -138,32 +585,30 @@ class DjangoContext:
         module, _, model_cls_name = fullname.rpartition(".")
         return self.model_modules.get(module, {}).get(model_cls_name)
 
-    def get_model_fields(self, model_cls: type[Model]) -> Iterator[Field[Any, Any]]:
-        for field in model_cls._meta.get_fields():
-            if isinstance(field, Field):
-                yield field
+    def get_model_field_index(self, model_cls: type[Model]) -> ModelFieldIndex:
+        index = self._field_indexes.get(model_cls)
+        if index is None:
+            index = self._field_indexes[model_cls] = ModelFieldIndex.from_model(model_cls)
+        return index
+
+    def get_model_fields(self, model_cls: type[Model]) -> Sequence[Field[Any, Any]]:
+        return self.get_model_field_index(model_cls).fields
 
-    def get_model_foreign_keys(self, model_cls: type[Model]) -> Iterator[ForeignKey[Any, Any]]:
-        for field in model_cls._meta.get_fields():
-            if isinstance(field, ForeignKey):
-                yield field
+    def get_model_foreign_keys(self, model_cls: type[Model]) -> Sequence[ForeignKey[Any, Any]]:
+        return self.get_model_field_index(model_cls).foreign_keys
 
-    def get_model_related_fields(self, model_cls: type[Model]) -> Iterator[RelatedField[Any, Any]]:
+    def get_model_related_fields(self, model_cls: type[Model]) -> Sequence[RelatedField[Any, Any]]:
         """Get model forward relations"""
-        for field in model_cls._meta.get_fields():
-            if isinstance(field, RelatedField):
-                yield field
+        return self.get_model_field_index(model_cls).related_fields
 
-    def get_model_relations(self, model_cls: type[Model]) -> Iterator[ForeignObjectRel]:
+    def get_model_relations(self, model_cls: type[Model]) -> Sequence[ForeignObjectRel]:
         """Get model reverse relations"""
-        for field in model_cls._meta.get_fields():
-            if isinstance(field, ForeignObjectRel):
-                yield field
+        return self.get_model_field_index(model_cls).relations
 
     def get_field_lookup_exact_type(self, api: TypeChecker, field: _AnyField) -> MypyType:
         if isinstance(field, RelatedField | ForeignObjectRel):
             related_model_cls = self.get_field_related_model_cls(field)
-            rel_model_info = helpers.lookup_class_typeinfo(api, related_model_cls)
+            rel_model_info = self.lookup_class_typeinfo(api, related_model_cls)
             if rel_model_info is None:
                 return AnyType(TypeOfAny.explicit)
 
@@ -173,7 +618,7 @@ class DjangoContext:
             model_and_primary_key_type = UnionType.make_union([Instance(rel_model_info, []), primary_key_type])
             return make_optional_type(model_and_primary_key_type)
 
-        field_info = helpers.lookup_class_typeinfo(api, field.__class__)
+        field_info = self.lookup_class_typeinfo(api, field.__class__)
         if field_info is None:
             return AnyType(TypeOfAny.explicit)
         return helpers.get_private_descriptor_type(field_info, "_pyi_lookup_exact_type", is_nullable=field.null)
@@ -185,38 +630,100 @@ class DjangoContext:
         assert len(field.to_fields) == 1
         to_field_name = field.to_fields[0]
         if to_field_name:
-            rel_field = related_model_cls._meta.get_field(to_field_name)
-            if not isinstance(rel_field, Field):
-                return None  # Not supported
+            rel_field = self.get_model_field_index(related_model_cls).fields_by_name.get(to_field_name)
+            if rel_field is None:
+                # Raises for an unknown field, anything else than a `Field` is not supported
+                related_model_cls._meta.get_field(to_field_name)
+                return None
             return rel_field
         return self.get_primary_key_field(related_model_cls)
 
     def get_primary_key_field(self, model_cls: type[Model]) -> Field[Any, Any]:
-        for field in model_cls._meta.get_fields():
-            if isinstance(field, Field):
-                if field.primary_key:
-                    return field
-        raise ValueError("No primary key defined")
+        primary_key = self.get_model_field_index(model_cls).primary_key
+        if primary_key is None:
+            raise ValueError("No primary key defined")
+        return primary_key
+
+    def lookup_class_typeinfo(self, api: TypeChecker, klass: type | None) -> TypeInfo | None:
+        if klass is None:
+            return None
+
+        info = self._class_typeinfos.get(klass)
+        # The daemon removes deleted modules from the build without reloading the build graph
+        if info is not None and info.module_name in api.modules:
+            return info
+        info = helpers.lookup_class_typeinfo(api, klass)
+        # Misses aren't remembered, the class can be found later on, e.g. once its module is processed
+        if info is not None:
+            _remember(self._class_typeinfos, klass, info)
+        return info
+
+    def get_expected_types(self, api: TypeChecker, model_cls: type[Model], *, method: str) -> Mapping[str, MypyType]:
+        key = (model_cls, method)
+        cached = self._expected_types.get(key)
+        if cached is not None:
+            return cached
+
+        model_info = self.lookup_class_typeinfo(api, model_cls)
+        expected_types, reusable = self._get_expected_types_uncached(api, model_cls, model_info, method=method)
+        if model_info is not None and reusable:
+            _remember(self._expected_types, key, expected_types)
+        return expected_types
+
+    def make_row_type(self, api: TypeChecker, model_cls: type[Model] | None, fields: dict[str, MypyType]) -> TupleType:
+        """A `Row` named tuple with `fields`, for a `values_list(named=True)` projection of `model_cls`.
+
+        Identical projections in a module share one class, instead of adding (and serializing) a class per call.
+        """
+        current_module = helpers.get_current_module(api)
+        key = (current_module.fullname, model_cls, tuple(fields.items()))
+        row_info = self._row_types.get(key)
+        if row_info is not None and helpers.is_module_class(current_module, row_info):
+            return TupleType(list(fields.values()), fallback=Instance(row_info, []))
+
+        row_type = helpers.make_oneoff_named_tuple(api, "Row", fields)
+        _remember(self._row_types, key, row_type.partial_fallback.type)
+        return row_type
 
-    def get_expected_types(self, api: TypeChecker, model_cls: type[Model], *, method: str) -> dict[str, MypyType]:
+    def get_manager_method_type(
+        self,
+        manager_instance: Instance,
+        method_name: str,
+        resolve: Callable[[], ProperType | None],
+    ) -> ProperType | None:
+        """Returns the type of a method of a `from_queryset` manager, resolved with `resolve` once per type arguments"""
+        key = (manager_instance.type.fullname, method_name, manager_instance.args)
+        if key in self._manager_methods:
+            return self._manager_methods[key]
+
+        method_type = resolve()
+        # A method whose type isn't inferred yet is resolved again on its next access
+        if not isinstance(method_type, AnyType):
+            _remember(self._manager_methods, key, method_type)
+        return method_type
+
+    def _get_expected_types_uncached(
+        self, api: TypeChecker, model_cls: type[Model], model_info: TypeInfo | None, *, method: str
+    ) -> tuple[dict[str, MypyType], bool]:
+        """Returns the expected types and whether they can be reused for later calls"""
         contenttypes_in_apps = self.apps_registry.is_installed("django.contrib.contenttypes")
 
         expected_types = {}
+        reusable = True
         # add pk if not abstract=True
         if not model_cls._meta.abstract:
             primary_key_field = self.get_primary_key_field(model_cls)
             field_set_type = self.get_field_set_type(api, primary_key_field, method=method)
             expected_types["pk"] = field_set_type
 
-        model_info = helpers.lookup_class_typeinfo(api, model_cls)
-        for field in model_cls._meta.get_fields():
+        for field in self.get_model_field_index(model_cls).all_fields:
             if contenttypes_in_apps:
                 from django.contrib.contenttypes.fields import GenericForeignKey
 
                 if isinstance(field, GenericForeignKey):
                     # it's generic, so cannot set specific model
                     field_name = field.name
-                    gfk_info = helpers.lookup_class_typeinfo(api, field.__class__)
+                    gfk_info = self.lookup_class_typeinfo(api, field.__class__)
                     if gfk_info is None:
                         gfk_set_type: MypyType = AnyType(TypeOfAny.unannotated)
                     else:
@@ -236,14 +743,18 @@ class DjangoContext:
                 # Try to retrieve set type from a model's TypeInfo object and fallback to retrieving it manually
                 # from django-stubs own declaration. This is to align with the setter types declared for
                 # assignment.
-                field_set_type = _get_field_set_type_from_model_type_info(
-                    model_info, field_name
-                ) or self.get_field_set_type(api, field, method=method)
-                expected_types[field_name] = field_set_type
+                info_set_type = _get_field_set_type_from_model_type_info(model_info, field_name)
+                if info_set_type is None:
+                    if model_info is not None and _is_uninferred_attribute(model_info, field_name):
+                        # The model's module isn't checked yet, its attribute type may differ from the fallback
+                        reusable = False
+                    expected_types[field_name] = self.get_field_set_type(api, field, method=method)
+                else:
+                    expected_types[field_name] = info_set_type
 
                 if isinstance(field, ForeignKey):
                     field_name = field.name
-                    foreign_key_info = helpers.lookup_class_typeinfo(api, field.__class__)
+                    foreign_key_info = self.lookup_class_typeinfo(api, field.__class__)
                     if foreign_key_info is None:
                         # maybe there's no type annotation for the field
                         expected_types[field_name] = AnyType(TypeOfAny.unannotated)
@@ -259,7 +770,7 @@ class DjangoContext:
                     if related_model._meta.proxy_for_model is not None:
                         related_model = related_model._meta.proxy_for_model
 
-                    related_model_info = helpers.lookup_class_typeinfo(api, related_model)
+                    related_model_info = self.lookup_class_typeinfo(api, related_model)
                     if related_model_info is None:
                         expected_types[field_name] = AnyType(TypeOfAny.unannotated)
                         continue
@@ -272,7 +783,7 @@ class DjangoContext:
 
                     expected_types[field_name] = model_set_type
 
-        return expected_types
+        return expected_types, reusable
 
     @cached_property
     def all_registered_model_classes(self) -> set[type[models.Model]]:
@@ -297,7 +808,9 @@ class DjangoContext:
     def model_class_fullname_for_label(self, label: str) -> str | None:
         """Model names are case-insensitive, app labels are not (as in `Apps.get_model`)."""
         app_label, _, model_name = label.partition(".")
-        return self._model_class_fullnames_by_label_lower.get(f"{app_label}.{model_name.lower()}")
+        snapshot = self._persisted_registry_snapshot
+        labels = snapshot.labels if snapshot is not None else self._model_class_fullnames_by_label_lower
+        return labels.get(f"{app_label}.{model_name.lower()}")
 
     def get_field_nullability(self, field: _AnyField, method: str | None) -> bool:
         if method in ("values", "values_list"):
@@ -327,7 +840,7 @@ class DjangoContext:
             except ValueError:
                 return AnyType(TypeOfAny.from_error)
 
-        field_info = helpers.lookup_class_typeinfo(api, target_field.__class__)
+        field_info = self.lookup_class_typeinfo(api, target_field.__class__)
         if field_info is None:
             return AnyType(TypeOfAny.from_error)
 
@@ -353,20 +866,20 @@ class DjangoContext:
             if get_type is not None:
                 return get_type
 
-        field_info = helpers.lookup_class_typeinfo(api, field.__class__)
+        field_info = self.lookup_class_typeinfo(api, field.__class__)
         if field_info is None:
             return AnyType(TypeOfAny.unannotated)
 
         is_nullable = self.get_field_nullability(field, method)
         if isinstance(field, RelatedField):
             related_model_cls = self.get_field_related_model_cls(field)
-            rel_model_info = helpers.lookup_class_typeinfo(api, related_model_cls)
+            rel_model_info = self.lookup_class_typeinfo(api, related_model_cls)
 
             if method in ("values", "values_list"):
                 primary_key_field = self.get_primary_key_field(related_model_cls)
                 return self.get_field_get_type(api, rel_model_info, primary_key_field, method=method)
 
-            model_info = helpers.lookup_class_typeinfo(api, related_model_cls)
+            model_info = self.lookup_class_typeinfo(api, related_model_cls)
             if model_info is None:
                 return AnyType(TypeOfAny.unannotated)
 
@@ -401,37 +914,65 @@ class DjangoContext:
         return related_model_cls
 
     def _resolve_field_from_parts(
-        self, field_parts: Iterable[str], model_cls: type[Model]
+        self, field_parts: Sequence[str], model_cls: type[Model]
+    ) -> tuple[_AnyField, type[Model]]:
+        key = (model_cls, tuple(field_parts))
+        if key not in self._resolved_fields:
+            _remember(self._resolved_fields, key, self._resolve_field_from_parts_uncached(key[1], model_cls))
+        return self._resolved_fields[key]
+
+    def _resolve_field_from_parts_uncached(
+        self, field_parts: tuple[str, ...], model_cls: type[Model]
     ) -> tuple[_AnyField, type[Model]]:
+        """Resolves the last part on the model the other parts lead to, which lookups sharing them reuse:
+        `author__profile__city` and `author__profile__country` both resolve `author__profile` once.
+        """
+        # Guaranteed by `query.solve_lookup_type` before.
+        assert field_parts
         currently_observed_model = model_cls
-        field: _AnyField | None = None
-        for field_part in field_parts:
-            if field_part == "pk":
-                field = self.get_primary_key_field(currently_observed_model)
-                continue
+        if len(field_parts) > 1:
+            _, currently_observed_model = self._resolve_field_from_parts(field_parts[:-1], model_cls)
+
+        field_part = field_parts[-1]
+        if field_part == "pk":
+            return self.get_primary_key_field(currently_observed_model), currently_observed_model
 
-            field = currently_observed_model._meta.get_field(field_part)
-            if isinstance(field, RelatedField):
-                currently_observed_model = self.get_field_related_model_cls(field)
-                model_name = currently_observed_model._meta.model_name
-                if model_name is not None and field_part == (model_name + "_id"):
-                    field = self.get_primary_key_field(currently_observed_model)
+        field = currently_observed_model._meta.get_field(field_part)
+        if isinstance(field, RelatedField):
+            currently_observed_model = self.get_field_related_model_cls(field)
+            model_name = currently_observed_model._meta.model_name
+            if model_name is not None and field_part == (model_name + "_id"):
+                field = self.get_primary_key_field(currently_observed_model)
 
-            if isinstance(field, ForeignObjectRel):
-                currently_observed_model = self.get_field_related_model_cls(field)
+        if isinstance(field, ForeignObjectRel):
+            currently_observed_model = self.get_field_related_model_cls(field)
 
-        # Guaranteed by `query.solve_lookup_type` before.
         assert isinstance(field, Field | ForeignObjectRel)
         return field, currently_observed_model
 
     def solve_lookup_type(
         self, model_cls: type[Model], lookup: str
     ) -> tuple[Sequence[str], Sequence[str], Expression | Literal[False]] | None:
-        query = Query(model_cls)
-        if (lookup == "pk" or lookup.startswith("pk__")) and query.get_meta().pk is None:  # type: ignore[comparison-overlap]
+        """Memoized, as the same lookups tend to be repeated throughout a codebase.
+
+        Raises `FieldError` for lookups that can't be resolved, these are not memoized.
+        """
+        key = (model_cls, lookup)
+        if key not in self._solved_lookups:
+            _remember(self._solved_lookups, key, self._solve_lookup_type_uncached(model_cls, lookup))
+        return self._solved_lookups[key]
+
+    def _solve_lookup_type_uncached(
+        self, model_cls: type[Model], lookup: str
+    ) -> tuple[Sequence[str], Sequence[str], Expression | Literal[False]] | None:
+        if (lookup == "pk" or lookup.startswith("pk__")) and model_cls._meta.pk is None:  # type: ignore[comparison-overlap]
             # Primary key lookup when no primary key field is found, model is presumably
             # abstract and we can't say anything about 'pk'.
-            return None
+            return None  # type: ignore[unreachable]
+        walked_lookup = self._walk_lookup(model_cls, lookup.split(LOOKUP_SEP))
+        if walked_lookup is not None:
+            return walked_lookup
+        query = Query(model_cls)
         try:
             return query.solve_lookup_type(lookup)
         # This occurs when the following conditions are met:
@@ -458,6 +999,58 @@ class DjangoContext:
         entire_query_parts = [query_parts[0], *sub_query[1]]
         return sub_query[0], entire_query_parts, sub_query[2]
 
+    def _walk_lookup(
+        self, model_cls: type[Model], names: list[str]
+    ) -> tuple[list[str], list[str], Literal[False]] | None:
+        """Split a lookup into its field parts and its lookup parts, as `Query.solve_lookup_type` does.
+
+        The names are resolved one model at a time with `_lookup_step`, so the lookups of a call, and of the
+        whole run, walk a relation they share once, e.g. `author__profile` in `filter(author__profile__city=...,
+        author__profile__country__code=...)`. Returns `None` for lookups left to Django, like invalid ones
+        failing with its error message.
+        """
+        if model_cls._meta.abstract:
+            # Relations of abstract models to models referenced by name are never resolved
+            return None
+        current_model = model_cls
+        for position, name in enumerate(names):
+            step = self._lookup_step(current_model, name)
+            if step is None or (not step.is_field and position == 0):
+                return None
+            if not step.is_field:
+                return names[position:], names[:position], False
+            if step.related_model is None:
+                # A field without relations, the rest are lookups and transforms
+                return names[position + 1 :], names[: position + 1], False
+            current_model = step.related_model
+        return [], names, False
+
+    def _lookup_step(self, model_cls: type[Model], name: str) -> _LookupStep | None:
+        key = (model_cls, name)
+        if key not in self._lookup_steps:
+            _remember(self._lookup_steps, key, self._lookup_step_uncached(model_cls, name))
+        return self._lookup_steps[key]
+
+    @staticmethod
+    def _lookup_step_uncached(model_cls: type[Model], name: str) -> _LookupStep | None:
+        """Resolve a name of a lookup like `Query.names_to_path`, `None` for the cases left to it."""
+        opts = model_cls._meta
+        if name == "pk":
+            if opts.pk is None:  # type: ignore[comparison-overlap]
+                return None  # type: ignore[unreachable]
+            name = opts.pk.name
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            return _LookupStep(is_field=False, related_model=None)
+        if field.is_relation and not field.related_model:
+            # e.g. a `GenericForeignKey`, which Django refuses
+            return None
+        path_infos = getattr(field, "path_infos", None)
+        if path_infos is None:
+            return _LookupStep(is_field=True, related_model=None)
+        return _LookupStep(is_field=True, related_model=path_infos[-1].to_opts.model)
+
     def resolve_lookup_into_field(self, model_cls: type[Model], lookup: str) -> tuple[_AnyField | None, type[Model]]:
         solved_lookup = self.solve_lookup_type(model_cls, lookup)
         if solved_lookup is None:
@@ -480,7 +1073,7 @@ class DjangoContext:
         Returns:
             The resolved type, or None if it couldn't be determined
         """
-        lookup_info = helpers.lookup_class_typeinfo(helpers.get_typechecker_api(ctx), lookup_cls)
+        lookup_info = self.lookup_class_typeinfo(helpers.get_typechecker_api(ctx), lookup_cls)
         if lookup_info is None:
             return None
 
@@ -491,7 +1084,7 @@ class DjangoContext:
                     if field is None:
                         # No field available (e.g., annotation), can't resolve further
                         return None
-                    field_info = helpers.lookup_class_typeinfo(helpers.get_typechecker_api(ctx), field.__class__)
+                    field_info = self.lookup_class_typeinfo(helpers.get_typechecker_api(ctx), field.__class__)
                     if field_info is None:
                         return None
                     return get_proper_type(
@@ -588,4 +1181,8 @@ class DjangoContext:
 
     @cached_property
     def is_contrib_auth_installed(self) -> bool:
-        return "django.contrib.auth" in self.settings.INSTALLED_APPS
+        return "django.contrib.auth" in self.settings_snapshot.installed_apps
+
+    @cached_property
+    def is_contenttypes_installed(self) -> bool:
+        return "django.contrib.contenttypes" in self.settings_snapshot.installed_apps
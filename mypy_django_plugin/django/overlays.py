@@ -0,0 +1,643 @@
+"""Generate `.pyi` overlays of the project's model modules, for type checkers without the mypy plugin.
+
+An overlay is the stub of a model module, with the members the plugin otherwise adds to the models during
+semantic analysis written out: the `DoesNotExist`, `NotUpdated` and `MultipleObjectsReturned` exceptions,
+the implicit primary key and the `<field>_id` attributes, the managers (including the classes created by
+`from_queryset`), the reverse relations, and the implicit through models of many to many fields.
+
+Overlays are written for the modules of the project, i.e. the model modules whose source is in the project
+directory, mirroring the package layout, e.g. to pyright's `stubPath` (`typings` by default). Like the model
+registry snapshot, they describe the models at the time they were generated and have to be regenerated when
+the models change. A few things still need the plugin: the types of the ORM calls (`filter`, `values`,
+`annotate`, ...), and related managers based on a custom default manager of the related model, which are
+typed as plain `RelatedManager`.
+"""
+
+from __future__ import annotations
+
+import ast
+import builtins
+import copy
+import inspect
+import os
+import sys
+from typing import TYPE_CHECKING, Any, Final
+
+from django.db.models import Model
+from django.db.models.fields.related import ForeignKey
+from django.db.models.fields.related_descriptors import (
+    ManyToManyDescriptor,
+    ReverseManyToOneDescriptor,
+    ReverseOneToOneDescriptor,
+)
+from django.db.models.fields.reverse_related import ManyToManyRel, OneToOneRel
+from django.db.models.manager import BaseManager
+from typing_extensions import override
+
+from mypy_django_plugin.exceptions import UnregisteredModelError
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from django.db.models.fields import Field
+    from django.db.models.fields.reverse_related import ForeignObjectRel
+    from django.db.models.query import QuerySet
+
+    from mypy_django_plugin.django.context import DjangoContext
+    from mypy_django_plugin.django.snapshot import ModelRegistrySnapshot
+
+HEADER: Final = "# Generated by `python -m mypy_django_plugin generate-overlays`, do not edit.\n"
+
+MODEL_TYPE_VAR: Final = "_OverlayModel"
+
+EXCEPTION_NAMES: Final = ("DoesNotExist", "NotUpdated", "MultipleObjectsReturned")
+
+# Python types of the values of the fields, by `Field.get_internal_type()`, used for the primary keys
+# and the `<field>_id` attributes. Other fields are typed as `Any`.
+_FIELD_PYTHON_TYPES: Final[dict[str, tuple[str, str]]] = {
+    **dict.fromkeys(
+        [
+            "AutoField",
+            "BigAutoField",
+            "SmallAutoField",
+            "IntegerField",
+            "BigIntegerField",
+            "SmallIntegerField",
+            "PositiveIntegerField",
+            "PositiveBigIntegerField",
+            "PositiveSmallIntegerField",
+        ],
+        ("builtins", "int"),
+    ),
+    **dict.fromkeys(
+        [
+            "CharField",
+            "TextField",
+            "SlugField",
+            "EmailField",
+            "URLField",
+            "FilePathField",
+            "GenericIPAddressField",
+            "IPAddressField",
+        ],
+        ("builtins", "str"),
+    ),
+    "BooleanField": ("builtins", "bool"),
+    "FloatField": ("builtins", "float"),
+    "DecimalField": ("decimal", "Decimal"),
+    "UUIDField": ("uuid", "UUID"),
+    "DateField": ("datetime", "date"),
+    "DateTimeField": ("datetime", "datetime"),
+    "TimeField": ("datetime", "time"),
+    "DurationField": ("datetime", "timedelta"),
+}
+
+
+def generate_overlays(django_context: DjangoContext, output_dir: str, project_dir: str | None = None) -> list[str]:
+    """Write the overlays of the model modules with their source in `project_dir` (the current directory by
+    default) to `output_dir`, returns the paths of the files written.
+
+    The packages of the model modules get an overlay of their `__init__` module too, without which
+    the overlays of their submodules wouldn't be found.
+    """
+    project_dir = os.path.abspath(project_dir or os.getcwd())
+    source_files = {}
+    for module_name in sorted(django_context.model_modules):
+        source_file = _module_source_file(module_name)
+        if source_file is not None and _is_in_directory(source_file, project_dir):
+            source_files[module_name] = source_file
+
+    parsed_modules = _ParsedModules()
+    overlays = {
+        module_name: _ModuleOverlay(django_context, module_name, parsed_modules).render()
+        for module_name in source_files
+    }
+    for module_name in list(source_files):
+        package = module_name.rpartition(".")[0]
+        while package and package not in overlays:
+            tree = parsed_modules.get(package)
+            overlays[package] = HEADER + (_unparse(_StubTransformer().visit(copy.deepcopy(tree))) if tree else "")
+            source_files[package] = _module_source_file(package) or os.path.join(package, "__init__.py")
+            package = package.rpartition(".")[0]
+
+    written = []
+    for module_name, overlay in sorted(overlays.items()):
+        parts = module_name.split(".")
+        if os.path.basename(source_files[module_name]) == "__init__.py":
+            parts.append("__init__")
+        path = os.path.join(output_dir, *parts) + ".pyi"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(overlay)
+        written.append(path)
+    return written
+
+
+def add_field_types(snapshot: ModelRegistrySnapshot) -> ModelRegistrySnapshot:
+    """Fill in the `set_type` and `get_type` of the fields of the snapshot, see `FieldSnapshot`.
+
+    Read from the `_pyi_private_set_type` and `_pyi_private_get_type` declarations of the (stubs of the) field
+    classes, which must be imported. Left to `None` when the field class or its declarations can't be found.
+    """
+    parsed_modules = _ParsedModules()
+    models = {}
+    for key, model in snapshot.models.items():
+        fields = []
+        for field in model.fields:
+            module_name, _, name = field.field_class.rpartition(".")
+            field_cls = getattr(sys.modules.get(module_name), name, None)
+            if isinstance(field_cls, type):
+                field = field._replace(
+                    set_type=parsed_modules.declared_type(field_cls, "_pyi_private_set_type"),
+                    get_type=parsed_modules.declared_type(field_cls, "_pyi_private_get_type"),
+                )
+            fields.append(field)
+        models[key] = model._replace(fields=tuple(fields))
+    return snapshot._replace(models=models)
+
+
+def _module_source_file(module_name: str) -> str | None:
+    module = sys.modules.get(module_name)
+    source_file: str | None = getattr(module, "__file__", None)
+    if source_file is None or not source_file.endswith(".py"):
+        return None
+    return os.path.abspath(source_file)
+
+
+def _django_stub_file(module_name: str) -> str | None:
+    parts = ["django-stubs", *module_name.split(".")[1:]]
+    for search_path in sys.path:
+        base = os.path.join(search_path or os.curdir, *parts)
+        for candidate in (f"{base}.pyi", os.path.join(base, "__init__.pyi")):
+            if os.path.isfile(candidate):
+                return os.path.abspath(candidate)
+    return None
+
+
+def _is_in_directory(path: str, directory: str) -> bool:
+    return os.path.commonpath([path, directory]) == directory
+
+
+def _unparse(tree: ast.Module) -> str:
+    source = ast.unparse(ast.fix_missing_locations(tree))
+    return f"{source}\n" if source else ""
+
+
+class _ParsedModules:
+    """The syntax trees of the modules of the project, and of the stubs of the Django modules, by name."""
+
+    __slots__ = ("_trees", "_type_parameters")
+
+    def __init__(self) -> None:
+        self._trees: dict[str, ast.Module | None] = {}
+        self._type_parameters: dict[type, list[bool]] = {}
+
+    def get(self, module_name: str) -> ast.Module | None:
+        if module_name not in self._trees:
+            if module_name.partition(".")[0] == "django":
+                source_file = _django_stub_file(module_name)
+            else:
+                source_file = _module_source_file(module_name)
+            if source_file is None:
+                self._trees[module_name] = None
+            else:
+                with open(source_file, "rb") as f:
+                    self._trees[module_name] = ast.parse(f.read(), filename=source_file)
+        return self._trees[module_name]
+
+    def get_class(self, cls: type) -> ast.ClassDef | None:
+        tree = self.get(cls.__module__)
+        if tree is None or "." in cls.__qualname__:
+            return None
+        return next((node for node in tree.body if isinstance(node, ast.ClassDef) and node.name == cls.__name__), None)
+
+    def type_parameters(self, cls: type) -> list[bool]:
+        """The type parameters of the (stub of the) class, as whether they have a default."""
+        if cls not in self._type_parameters:
+            self._type_parameters[cls] = self._get_type_parameters(cls)
+        return self._type_parameters[cls]
+
+    def _get_type_parameters(self, cls: type) -> list[bool]:
+        if _is_dynamic_class(cls):
+            return self.type_parameters(cls.__bases__[0])
+        classdef = self.get_class(cls)
+        if classdef is None:
+            return []
+        type_params = getattr(classdef, "type_params", None)
+        if type_params:
+            return [getattr(param, "default_value", None) is not None for param in type_params]
+        tree = self.get(cls.__module__)
+        assert tree is not None
+        # Type variables of the module, as whether they have a default
+        type_vars = {
+            target.id: any(keyword.arg == "default" for keyword in node.value.keywords)
+            for node in tree.body
+            if isinstance(node, ast.Assign)
+            and isinstance(node.value, ast.Call)
+            and _callee_name(node.value) == "TypeVar"
+            for target in node.targets
+            if isinstance(target, ast.Name)
+        }
+        parameters = {
+            name.id: type_vars[name.id]
+            for base in classdef.bases
+            if isinstance(base, ast.Subscript)
+            for name in ast.walk(base.slice)
+            if isinstance(name, ast.Name) and name.id in type_vars
+        }
+        return list(parameters.values())
+
+    def declared_type(self, cls: type, name: str) -> str | None:
+        """The annotation of the attribute in the (stub of the) first class of the MRO declaring it,
+        with the names it refers to replaced by their fullnames.
+        """
+        for base in cls.__mro__:
+            classdef = self.get_class(base)
+            if classdef is None:
+                continue
+            statement = _declared_names(classdef).get(name)
+            if isinstance(statement, ast.AnnAssign):
+                tree = self.get(base.__module__)
+                assert tree is not None
+                transformer = _FullnameTransformer(base.__module__, tree)
+                return ast.unparse(transformer.visit(copy.deepcopy(statement.annotation)))
+        return None
+
+
+def _callee_name(call: ast.Call) -> str | None:
+    if isinstance(call.func, ast.Name):
+        return call.func.id
+    if isinstance(call.func, ast.Attribute):
+        return call.func.attr
+    return None
+
+
+def _is_dynamic_class(cls: type) -> bool:
+    """Whether the class can't be imported by its name, e.g. a manager class created by `from_queryset`."""
+    module = sys.modules.get(cls.__module__)
+    target: Any = module
+    for name in cls.__qualname__.split("."):
+        target = getattr(target, name, None)
+    return target is not cls
+
+
+def _declared_names(classdef: ast.ClassDef) -> dict[str, ast.stmt]:
+    """The names bound in the body of a class, with the statement binding them."""
+    names: dict[str, ast.stmt] = {}
+    for statement in classdef.body:
+        if isinstance(statement, ast.Assign):
+            names.update({target.id: statement for target in statement.targets if isinstance(target, ast.Name)})
+        elif isinstance(statement, ast.AnnAssign) and isinstance(statement.target, ast.Name):
+            names[statement.target.id] = statement
+        elif isinstance(statement, ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef):
+            names[statement.name] = statement
+    return names
+
+
+def _parse_statement(source: str) -> ast.stmt:
+    return ast.parse(source).body[0]
+
+
+class _StubTransformer(ast.NodeTransformer):
+    """Turn a module into its stub, leaving out the bodies of the functions."""
+
+    @staticmethod
+    def stub_body(node: ast.FunctionDef | ast.AsyncFunctionDef) -> None:
+        node.body = [ast.Expr(ast.Constant(...))]
+
+    @override
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> ast.FunctionDef:
+        self.stub_body(node)
+        return node
+
+    @override
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> ast.AsyncFunctionDef:
+        self.stub_body(node)
+        return node
+
+
+class _FullnameTransformer(ast.NodeTransformer):
+    """Replace the names of an expression of a module by their fullnames, e.g. `str` by `builtins.str`.
+
+    Names imported with relative imports are left as they are.
+    """
+
+    def __init__(self, module_name: str, tree: ast.Module) -> None:
+        self.fullnames: dict[str, str] = {}
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname is not None:
+                        self.fullnames[alias.asname] = alias.name
+                    else:
+                        top_level = alias.name.partition(".")[0]
+                        self.fullnames[top_level] = top_level
+            elif isinstance(node, ast.ImportFrom) and node.module is not None and node.level == 0:
+                for alias in node.names:
+                    self.fullnames[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+            elif isinstance(node, ast.ClassDef):
+                self.fullnames[node.name] = f"{module_name}.{node.name}"
+            elif isinstance(node, ast.Assign | ast.AnnAssign):
+                for target in node.targets if isinstance(node, ast.Assign) else [node.target]:
+                    if isinstance(target, ast.Name):
+                        self.fullnames[target.id] = f"{module_name}.{target.id}"
+
+    @override
+    def visit_Name(self, node: ast.Name) -> ast.Name:
+        fullname = self.fullnames.get(node.id)
+        if fullname is None and hasattr(builtins, node.id):
+            fullname = f"builtins.{node.id}"
+        return ast.Name(fullname or node.id, node.ctx)
+
+
+class _ModuleOverlay:
+    __slots__ = (
+        "_django_context",
+        "_generated_managers",
+        "_imports",
+        "_module_classes",
+        "_module_name",
+        "_parsed_modules",
+        "_uses_type_var",
+    )
+
+    def __init__(self, django_context: DjangoContext, module_name: str, parsed_modules: _ParsedModules) -> None:
+        self._django_context = django_context
+        self._module_name = module_name
+        self._parsed_modules = parsed_modules
+        # Aliases of the modules imported by the overlay, by module name
+        self._imports: dict[str, str] = {}
+        # Classes added to the module: implicit through models and managers created by `from_queryset`
+        self._module_classes: list[ast.stmt] = []
+        self._generated_managers: dict[type, str] = {}
+        self._uses_type_var = False
+
+    def reference(self, module_name: str, qualname: str) -> str:
+        """An expression referring to a module attribute in the overlay, importing its module if needed."""
+        if module_name == "builtins" and hasattr(builtins, qualname):
+            return qualname
+        if module_name == self._module_name:
+            return qualname
+        alias = self._imports.get(module_name)
+        if alias is None:
+            alias = self._imports[module_name] = "_" + module_name.replace(".", "_")
+        return f"{alias}.{qualname}"
+
+    def class_reference(self, cls: type) -> str:
+        return self.reference(cls.__module__, cls.__qualname__)
+
+    def typing(self, name: str) -> str:
+        return self.reference("typing", name)
+
+    def render(self) -> str:
+        tree = self._parsed_modules.get(self._module_name)
+        assert tree is not None
+        tree = _StubTransformer().visit(copy.deepcopy(tree))
+        classdefs = {node.name: node for node in tree.body if isinstance(node, ast.ClassDef)}
+        for model_cls in self._django_context.model_modules[self._module_name].values():
+            if model_cls.__qualname__ != model_cls.__name__:
+                continue
+            classdef = classdefs.get(model_cls.__name__)
+            if classdef is None:
+                if not model_cls._meta.auto_created:
+                    continue
+                classdef = self.implicit_through_model(model_cls)
+                self._module_classes.append(classdef)
+            self.add_model_members(model_cls, classdef)
+        self.replace_from_queryset_assignments(tree)
+
+        position = next(
+            (
+                index
+                for index, node in enumerate(tree.body)
+                if not (isinstance(node, ast.ImportFrom) and node.module == "__future__")
+                and not (index == 0 and isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant))
+            ),
+            len(tree.body),
+        )
+        if self._uses_type_var:
+            type_var = f"{MODEL_TYPE_VAR} = {self.typing('TypeVar')}({MODEL_TYPE_VAR!r}, bound={self.model_reference})"
+            self._module_classes.insert(0, _parse_statement(type_var))
+        imports = [_parse_statement(f"import {module} as {alias}") for module, alias in sorted(self._imports.items())]
+        tree.body[position:position] = imports
+        tree.body.extend(self._module_classes)
+        return HEADER + _unparse(tree)
+
+    @property
+    def model_reference(self) -> str:
+        return self.class_reference(Model)
+
+    def implicit_through_model(self, model_cls: type[Model]) -> ast.ClassDef:
+        classdef = _parse_statement(f"class {model_cls.__name__}({self.model_reference}): ...")
+        assert isinstance(classdef, ast.ClassDef)
+        classdef.body = []
+        return classdef
+
+    def parametrize(self, cls: type, reference: str, arguments: list[str]) -> str:
+        """`reference` to `cls` with its type parameters filled with `arguments`, then `Any` without a default."""
+        parameters = self._parsed_modules.type_parameters(cls)
+        if not parameters:
+            return reference
+        arguments = arguments[: len(parameters)]
+        arguments += [self.typing("Any") for has_default in parameters[len(arguments) :] if not has_default]
+        return f"{reference}[{', '.join(arguments)}]"
+
+    def add_model_members(self, model_cls: type[Model], classdef: ast.ClassDef) -> None:
+        declared = _declared_names(classdef)
+        # Members added unless the model declares them
+        members: dict[str, ast.stmt] = {}
+        # Members replacing the assignments of the model, e.g. `objects = MyManager()`
+        replacements: dict[str, ast.stmt] = {}
+        is_concrete = not model_cls._meta.abstract
+
+        if is_concrete:
+            for name in EXCEPTION_NAMES:
+                exception = model_cls.__dict__.get(name)
+                if isinstance(exception, type):
+                    bases = ", ".join(self.class_reference(base) for base in exception.__bases__)
+                    members[name] = _parse_statement(f"class {name}({bases}): ...")
+
+        for field in model_cls._meta.local_fields:
+            if field.name in declared or model_cls._meta.auto_created or field is model_cls._meta.auto_field:
+                replacements[field.name] = _parse_statement(f"{field.name}: {self.field_type(field)}")
+        if is_concrete:
+            members["pk"] = _parse_statement(f"pk: {self.field_python_type(model_cls._meta.pk)}")
+
+        for field in self._django_context.get_model_foreign_keys(model_cls):
+            id_type = self.field_python_type(field)
+            if self._django_context.get_field_nullability(field, None):
+                id_type = f"{id_type} | None"
+            members[field.attname] = _parse_statement(f"{field.attname}: {id_type}")
+
+        if is_concrete:
+            for field in model_cls._meta.local_many_to_many:
+                to, through = field.remote_field.model, field.remote_field.through
+                if through is None:
+                    continue
+                m2m_field = self.class_reference(type(field))
+                annotation = self.parametrize(
+                    type(field), m2m_field, [self.class_reference(to), self.class_reference(through)]
+                )
+                replacements[field.name] = _parse_statement(f"{field.name}: {annotation}")
+
+            for relation in self._django_context.get_model_relations(model_cls):
+                attname = relation.get_accessor_name()
+                reverse_lookup = self.reverse_lookup_annotation(model_cls, relation)
+                if attname is not None and reverse_lookup is not None:
+                    members[attname] = _parse_statement(f"{attname}: {reverse_lookup}")
+
+            managers = {**model_cls._meta.managers_map, "_default_manager": model_cls._meta.default_manager}
+            for name, manager in managers.items():
+                manager_type = self.manager_type(type(manager)) if manager is not None else None
+                if manager_type is not None:
+                    replacements[name] = _parse_statement(f"{name}: {self.typing('ClassVar')}[{manager_type}]")
+
+        for name, statement in replacements.items():
+            if not isinstance(declared.get(name), ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef):
+                members[name] = statement
+                declared.pop(name, None)
+        replaced = replacements.keys() & members.keys()
+        classdef.body = [
+            statement
+            for statement in classdef.body
+            if not (
+                isinstance(statement, ast.Assign | ast.AnnAssign) and any(_binds(statement, name) for name in replaced)
+            )
+        ]
+        classdef.body.extend(statement for name, statement in members.items() if name not in declared)
+        if not classdef.body:
+            classdef.body.append(ast.Expr(ast.Constant(...)))
+
+    def field_type(self, field: Field[Any, Any]) -> str:
+        """The field with the type of its value as `__get__` type, and `Any` as `__set__` type."""
+        if isinstance(field, ForeignKey):
+            try:
+                get_type = self.class_reference(self._django_context.get_field_related_model_cls(field))
+            except UnregisteredModelError:
+                get_type = self.typing("Any")
+        else:
+            get_type = self.field_python_type(field)
+        if field.null and get_type != self.typing("Any"):
+            get_type = f"{get_type} | None"
+        field_cls = type(field)
+        return self.parametrize(field_cls, self.class_reference(field_cls), [self.typing("Any"), get_type])
+
+    def field_python_type(self, field: Field[Any, Any]) -> str:
+        if isinstance(field, ForeignKey):
+            try:
+                related_model_cls = self._django_context.get_field_related_model_cls(field)
+            except UnregisteredModelError:
+                return self.typing("Any")
+            target_field = self._django_context.get_related_target_field(related_model_cls, field)
+            if target_field is None:
+                return self.typing("Any")
+            return self.field_python_type(target_field)
+        python_type = _FIELD_PYTHON_TYPES.get(field.get_internal_type())
+        if python_type is None:
+            return self.typing("Any")
+        return self.reference(*python_type)
+
+    def reverse_lookup_annotation(self, model_cls: type[Model], relation: ForeignObjectRel) -> str | None:
+        related_model_cls = self._django_context.get_field_related_model_cls(relation)
+        if related_model_cls._meta.abstract:
+            return None
+        related_model = self.class_reference(related_model_cls)
+        if isinstance(relation, OneToOneRel):
+            descriptor = self.class_reference(ReverseOneToOneDescriptor)
+            return f"{descriptor}[{self.class_reference(model_cls)}, {related_model}]"
+        if isinstance(relation, ManyToManyRel):
+            if not isinstance(relation.through, type):
+                return None
+            descriptor = self.class_reference(ManyToManyDescriptor)
+            descriptor = f"{descriptor}[{related_model}, {self.class_reference(relation.through)}]"
+        else:
+            descriptor = f"{self.class_reference(ReverseManyToOneDescriptor)}[{related_model}]"
+        return f"{self.typing('ClassVar')}[{descriptor}]"
+
+    def manager_type(self, manager_cls: type[BaseManager[Any]]) -> str | None:
+        """The manager parametrized with `Self`, which the managers of the subclasses of the model override."""
+        if _is_dynamic_class(manager_cls):
+            if not hasattr(manager_cls, "_queryset_class"):
+                return None
+            manager = self.generated_manager(manager_cls)
+        else:
+            manager = self.class_reference(manager_cls)
+        return self.parametrize(manager_cls, manager, [self.reference("typing_extensions", "Self")])
+
+    def generated_manager(self, manager_cls: type[BaseManager[Any]]) -> str:
+        """Add the class of a manager created by `from_queryset` to the module, with the queryset methods."""
+        name = self._generated_managers.get(manager_cls)
+        if name is not None:
+            return name
+        name = self._generated_managers[manager_cls] = manager_cls.__name__
+        base = manager_cls.__bases__[0]
+        is_generic = bool(self._parsed_modules.type_parameters(base))
+        self._uses_type_var |= is_generic
+        model = MODEL_TYPE_VAR if is_generic else self.model_reference
+        classdef = _parse_statement(f"class {name}({self.parametrize(base, self.class_reference(base), [model])}): ...")
+        assert isinstance(classdef, ast.ClassDef)
+
+        queryset_cls: type[QuerySet[Any]] = manager_cls._queryset_class  # type: ignore[attr-defined]
+        queryset = self.parametrize(queryset_cls, self.class_reference(queryset_cls), [model])
+        methods = [
+            self.queryset_method(queryset_cls, method_name, queryset)
+            for method_name, method in vars(manager_cls).items()
+            if inspect.isfunction(method)
+        ]
+        if methods:
+            classdef.body = methods
+        self._module_classes.append(classdef)
+        return name
+
+    def queryset_method(self, queryset_cls: type[QuerySet[Any]], name: str, queryset: str) -> ast.stmt:
+        """A manager method copied from the queryset, as the plugin does, or an untyped stand-in."""
+        for cls in queryset_cls.__mro__:
+            if name not in vars(cls):
+                continue
+            classdef = self._parsed_modules.get_class(cls) if cls.__module__ == self._module_name else None
+            for node in classdef.body if classdef is not None else []:
+                if isinstance(node, ast.FunctionDef | ast.AsyncFunctionDef) and node.name == name:
+                    method = copy.deepcopy(node)
+                    _StubTransformer.stub_body(method)
+                    if method.returns is not None and _annotation_name(method.returns) == "Self":
+                        method.returns = ast.parse(queryset, mode="eval").body
+                    return method
+            break
+        any_type = self.typing("Any")
+        return _parse_statement(f"def {name}(self, *args: {any_type}, **kwargs: {any_type}) -> {any_type}: ...")
+
+    def replace_from_queryset_assignments(self, tree: ast.Module) -> None:
+        """Alias the module level managers created by `from_queryset` to their generated class."""
+        module = sys.modules[self._module_name]
+        body = []
+        for statement in tree.body:
+            if (
+                isinstance(statement, ast.Assign)
+                and len(statement.targets) == 1
+                and isinstance(statement.targets[0], ast.Name)
+                and isinstance(statement.value, ast.Call)
+                and _callee_name(statement.value) == "from_queryset"
+            ):
+                target = statement.targets[0].id
+                manager_cls = getattr(module, target, None)
+                if isinstance(manager_cls, type) and issubclass(manager_cls, BaseManager):
+                    name = self.generated_manager(manager_cls)
+                    if name == target:
+                        # The generated class takes the place of the assignment
+                        continue
+                    statement = _parse_statement(f"{target} = {name}")
+            body.append(statement)
+        tree.body = body
+
+
+def _annotation_name(annotation: ast.expr) -> str | None:
+    if isinstance(annotation, ast.Name):
+        return annotation.id
+    if isinstance(annotation, ast.Constant) and isinstance(annotation.value, str):
+        return annotation.value
+    return None
+
+
+def _binds(statement: ast.Assign | ast.AnnAssign, name: str) -> bool:
+    targets: Iterable[ast.expr] = statement.targets if isinstance(statement, ast.Assign) else [statement.target]
+    return any(isinstance(target, ast.Name) and target.id == name for target in targets)
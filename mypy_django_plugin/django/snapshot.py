@@ -0,0 +1,322 @@
+"""A serializable view of the Django model registry.
+
+Booting Django (`settings._setup()` + `apps.populate()`) imports every model module of the project and
+usually dominates the plugin startup. The data the plugin needs before any model class is actually
+analyzed (build graph dependencies, cache invalidation data, app labels) is small and only changes
+when settings or model source files do, so it can be persisted to disk and reused by later runs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.metadata
+import json
+import os
+import site
+import sys
+import sysconfig
+from contextlib import contextmanager
+from functools import cache
+from typing import TYPE_CHECKING, Any, Final, NamedTuple
+
+from mypy_django_plugin.django.static_settings import find_module_file
+
+if sys.platform != "win32":
+    import fcntl
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping
+
+# Bump whenever the layout of the serialized data changes
+SNAPSHOT_VERSION: Final = 5
+SNAPSHOT_FILENAME: Final = "django_stubs_model_snapshot.json"
+# Module -> `get_model()` lazy references, `None` when any model may be returned
+GET_MODEL_REFERENCES_FILENAME: Final = "django_stubs_get_model_references.json"
+# Prefix of the `sources` entries standing for the files of an installed distribution, by its version
+DISTRIBUTION_SOURCE_PREFIX: Final = "distribution:"
+
+
+class FieldSnapshot(NamedTuple):
+    name: str
+    attname: str
+    field_class: str
+    null: bool
+    primary_key: bool
+    # `<module>.<name>` of the target model, `None` for non-relational or unresolvable fields
+    related_model: str | None
+    to_fields: tuple[str | None, ...]
+    # Types accepted and returned by the attribute of the field, from the `_pyi_private_set_type` and
+    # `_pyi_private_get_type` of the stubs with fullnames. Only recorded by `dump-schema`, for other tools:
+    # the plugin reads them from the stubs themselves
+    set_type: str | None = None
+    get_type: str | None = None
+
+
+class ModelSnapshot(NamedTuple):
+    module: str
+    name: str
+    label_lower: str
+    is_abstract: bool
+    fields: tuple[FieldSnapshot, ...]
+    # `<module>.<name>` of models pointing at this model, from `_meta.related_objects`
+    reverse_related_models: tuple[str, ...]
+    # (accessor name, `<module>.<name>` of the related model) of the reverse relations that have an accessor
+    reverse_accessors: tuple[tuple[str, str], ...] = ()
+    # (name, class fullname) of the managers, in `_meta.managers` order
+    managers: tuple[tuple[str, str], ...] = ()
+
+    def related_modules(self) -> set[str]:
+        """Modules of all models on the other side of a forward or reverse relation"""
+        related_models = {field.related_model for field in self.fields if field.related_model is not None}
+        related_models.update(self.reverse_related_models)
+        return {related_model.rpartition(".")[0] for related_model in related_models}
+
+
+def related_modules_by_module(models: Iterable[ModelSnapshot]) -> dict[str, tuple[str, ...]]:
+    """Map every model module to the other modules its models have a forward or reverse relation with."""
+    related_modules: dict[str, set[str]] = {}
+    for model in models:
+        related_modules.setdefault(model.module, set()).update(model.related_modules())
+    return {module: tuple(sorted(related - {module})) for module, related in sorted(related_modules.items())}
+
+
+class SettingsSnapshot(NamedTuple):
+    installed_apps: tuple[str, ...]
+    auth_user_model: str
+    default_auto_field: str
+
+
+class ModelRegistrySnapshot(NamedTuple):
+    django_settings_module: str
+    settings: SettingsSnapshot
+    # Module of the model behind `AUTH_USER_MODEL`, `None` when its app isn't installed
+    auth_user_module: str | None
+    # Keyed by `<module>.<name>`, same as `DjangoContext.model_modules`
+    models: dict[str, ModelSnapshot]
+    # `label_lower` -> class fullname, same as `DjangoContext.model_class_fullname_for_label`
+    labels: dict[str, str]
+    # Model module -> modules of all models related to its models, see `ModelSnapshot.related_modules`
+    related_modules: dict[str, tuple[str, ...]]
+    # Source file path -> content digest, the snapshot is stale as soon as any of them changes.
+    # Or `distribution:<name>` -> version for the files of an installed distribution, see `distribution_source`
+    sources: dict[str, str]
+
+
+def digest_source_files(django_settings_module: str, model_modules: Iterable[str]) -> dict[str, str]:
+    """Digest the files whose content determines the registry: the settings (package) and every model module.
+
+    Must be called with the project imported, module files are looked up in `sys.modules`.
+    The settings module is looked up on the path when it isn't imported, see `static_settings`.
+    """
+    files = set()
+    for module_name in model_modules:
+        module = sys.modules.get(module_name)
+        module_file = getattr(module, "__file__", None)
+        if module_file is not None:
+            files.add(os.path.abspath(module_file))
+
+    settings_file = getattr(sys.modules.get(django_settings_module), "__file__", None)
+    if settings_file is None:
+        # Not imported with `static_settings`
+        settings_file = find_module_file(django_settings_module)
+    if settings_file is not None:
+        files.add(os.path.abspath(settings_file))
+    # Split settings (`settings/base.py`, `settings/dev.py`, ...) are often star imported into each other
+    if settings_file is not None and "." in django_settings_module:
+        settings_dir = os.path.dirname(os.path.abspath(settings_file))
+        files.update(os.path.join(settings_dir, name) for name in os.listdir(settings_dir) if name.endswith(".py"))
+    return digest_files(files)
+
+
+def digest_files(files: Iterable[str]) -> dict[str, str]:
+    digests = {}
+    for path in files:
+        try:
+            with open(path, "rb") as f:
+                digests[path] = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            # A vanished file has no digest, it will never match and invalidates the snapshot
+            digests[path] = ""
+    return dict(sorted(digests.items()))
+
+
+def digest_sources(sources: Iterable[str]) -> dict[str, str]:
+    """Digest the `sources` of a snapshot, the installed version standing for the digest of a distribution."""
+    files = []
+    digests = {}
+    for source in sources:
+        if source.startswith(DISTRIBUTION_SOURCE_PREFIX):
+            digests[source] = _package_version(source.removeprefix(DISTRIBUTION_SOURCE_PREFIX)) or ""
+        else:
+            files.append(source)
+    return dict(sorted({**digests, **digest_files(files)}.items()))
+
+
+def distribution_source(path: str) -> tuple[str, str] | None:
+    """The `sources` entry of a file installed by a distribution, independent of the environment's location.
+
+    Returns `None` for files outside of the installation directories, e.g. the project's sources or an
+    editable install, whose content may change without a new version.
+    """
+    path = os.path.abspath(path)
+    for install_dir in _install_dirs():
+        if path.startswith(install_dir + os.sep):
+            top_level = os.path.relpath(path, install_dir).split(os.sep)[0].removesuffix(".py")
+            for distribution in _packages_distributions().get(top_level, []):
+                if (version := _package_version(distribution)) is not None:
+                    return DISTRIBUTION_SOURCE_PREFIX + distribution, version
+    return None
+
+
+@cache
+def _install_dirs() -> tuple[str, ...]:
+    install_dirs = {sysconfig.get_paths()["purelib"], sysconfig.get_paths()["platlib"], *site.getsitepackages()}
+    if site.ENABLE_USER_SITE:
+        install_dirs.add(site.getusersitepackages())
+    return tuple(sorted(os.path.abspath(install_dir) for install_dir in install_dirs))
+
+
+@cache
+def _packages_distributions() -> Mapping[str, list[str]]:
+    return importlib.metadata.packages_distributions()
+
+
+def _header(django_settings_module: str) -> dict[str, Any]:
+    return {
+        "version": SNAPSHOT_VERSION,
+        "django_settings_module": django_settings_module,
+        "django_version": _package_version("django"),
+        "django_stubs_version": _package_version("django-stubs"),
+    }
+
+
+def _package_version(package: str) -> str | None:
+    try:
+        return importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def dump_snapshot(snapshot: ModelRegistrySnapshot, path: str) -> None:
+    """Atomically write the snapshot, so concurrent runs never observe a partially written file."""
+    models = {
+        key: {**model._asdict(), "fields": [field._asdict() for field in model.fields]}
+        for key, model in snapshot.models.items()
+    }
+    data = {
+        **_header(snapshot.django_settings_module),
+        "snapshot": {**snapshot._asdict(), "settings": snapshot.settings._asdict(), "models": models},
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except OSError:
+        # Persisting is an optimization only, the current run already has its data.
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+@contextmanager
+def snapshot_lock(path: str) -> Iterator[None]:
+    """Hold an exclusive lock on the snapshot at `path`, across processes.
+
+    Processes sharing a cache directory, like the workers of a parallel mypy run, would all set up Django
+    to build the same missing snapshot. Building under this lock lets the first one do it, the others find
+    the snapshot written once they get the lock. Not supported on Windows, where this doesn't lock.
+    """
+    if sys.platform == "win32":
+        yield
+        return
+
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        lock_file = open(f"{path}.lock", "w")
+    except OSError:
+        yield
+        return
+    with lock_file:
+        # Released when the file is closed, or when the process dies
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def load_snapshot(path: str, django_settings_module: str) -> ModelRegistrySnapshot | None:
+    """Read a snapshot, returning `None` when it's missing, unreadable or stale."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        if any(data.get(key) != value for key, value in _header(django_settings_module).items()):
+            return None
+        raw = data["snapshot"]
+        snapshot = ModelRegistrySnapshot(
+            django_settings_module=raw["django_settings_module"],
+            settings=SettingsSnapshot(
+                installed_apps=tuple(raw["settings"]["installed_apps"]),
+                auth_user_model=raw["settings"]["auth_user_model"],
+                default_auto_field=raw["settings"]["default_auto_field"],
+            ),
+            auth_user_module=raw["auth_user_module"],
+            models={
+                key: ModelSnapshot(
+                    module=model["module"],
+                    name=model["name"],
+                    label_lower=model["label_lower"],
+                    is_abstract=model["is_abstract"],
+                    fields=tuple(
+                        FieldSnapshot(**{**field, "to_fields": tuple(field["to_fields"])}) for field in model["fields"]
+                    ),
+                    reverse_related_models=tuple(model["reverse_related_models"]),
+                    reverse_accessors=tuple(tuple(accessor) for accessor in model["reverse_accessors"]),
+                    managers=tuple(tuple(manager) for manager in model["managers"]),
+                )
+                for key, model in raw["models"].items()
+            },
+            labels=raw["labels"],
+            related_modules={module: tuple(related) for module, related in raw["related_modules"].items()},
+            sources=raw["sources"],
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+    if digest_sources(snapshot.sources) != snapshot.sources:
+        return None
+    return snapshot
+
+
+def load_get_model_references(path: str) -> dict[str, list[str] | None]:
+    """Read the `get_model()` references recorded by earlier runs, see `record_get_model_references`."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def record_get_model_references(path: str, module: str, references: list[str] | None) -> None:
+    """Store the `get_model()` references of a parsed module, so later runs know them without parsing it.
+
+    Modules without references are dropped. The file is shared by the processes using the same cache
+    directory, entries are merged under `snapshot_lock`.
+    """
+    with snapshot_lock(path):
+        data = load_get_model_references(path)
+        if references == []:
+            data.pop(module, None)
+        else:
+            data[module] = references
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
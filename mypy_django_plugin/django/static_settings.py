@@ -0,0 +1,231 @@
+"""Read the project's settings from the source of the settings module, without importing it.
+
+Used with the `static_settings` option: settings modules importing heavy or environment dependent
+packages (error reporting, task queues, vendor SDKs, ...) are slow to import, or fail to, where mypy runs.
+
+Only the literal values of the uppercase names are read, following the assignments at the top level of the
+module (and in `try` blocks or `if` blocks whose condition can be evaluated), including names star imported
+from other settings modules: `INSTALLED_APPS = [*BASE_APPS, "myapp"]`, `INSTALLED_APPS += ["debug_toolbar"]`
+or `from .base import *` are read, while settings computed by calls, e.g. `SECRET_KEY = os.environ["KEY"]`,
+are left to their Django default. The settings the model registry depends on (`REGISTRY_SETTINGS`) are the
+exception: an error is raised when they're assigned a value that can't be read, or in an `if` block whose
+condition can't be evaluated or an `except` handler, rather than reading the models with the wrong settings.
+"""
+
+from __future__ import annotations
+
+import ast
+import operator
+import os
+import sys
+from typing import TYPE_CHECKING, Any, Final
+
+from django.core.exceptions import ImproperlyConfigured
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+_BINARY_OPERATORS: Final[dict[type[ast.operator], Callable[[Any, Any], Any]]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.BitOr: operator.or_,
+}
+
+# Settings changing which models are registered and how, that must be read when they're assigned
+REGISTRY_SETTINGS: Final = ("INSTALLED_APPS", "AUTH_USER_MODEL", "DEFAULT_AUTO_FIELD")
+
+
+class _UnknownValue(Exception):
+    """The value of an expression can't be known without running the module."""
+
+
+class _UnreadableSetting:
+    """Stands for a name whose last assignment couldn't be read, at `location`."""
+
+    __slots__ = ("location",)
+
+    def __init__(self, location: str) -> None:
+        self.location = location
+
+
+def find_module_file(module_name: str, search_paths: Iterable[str] | None = None) -> str | None:
+    """The source file of a module, found in `search_paths` (the current directory and `sys.path` by default)."""
+    parts = module_name.split(".")
+    for search_path in search_paths if search_paths is not None else [os.getcwd(), *sys.path]:
+        base = os.path.join(search_path or os.curdir, *parts)
+        for candidate in (f"{base}.py", os.path.join(base, "__init__.py")):
+            if os.path.isfile(candidate):
+                return os.path.abspath(candidate)
+    return None
+
+
+def read_static_settings(settings_module: str) -> dict[str, Any]:
+    """The settings defined by `settings_module` that can be read from its source, by name.
+
+    Raises `ImproperlyConfigured` when one of the `REGISTRY_SETTINGS` is assigned a value that can't be read.
+    """
+    settings_file = find_module_file(settings_module)
+    if settings_file is None:
+        raise ModuleNotFoundError(f"No module named {settings_module!r}", name=settings_module)
+    reader = _SettingsReader(top_level_package=settings_module.partition(".")[0])
+    namespace = reader.read_module(settings_module, settings_file)
+    for name in REGISTRY_SETTINGS:
+        value = namespace.get(name)
+        if isinstance(value, _UnreadableSetting):
+            raise ImproperlyConfigured(
+                f"The value of {name} assigned at {value.location} can't be read with `static_settings`, "
+                "use a literal value or disable `static_settings`"
+            )
+    return {
+        name: value for name, value in namespace.items() if name.isupper() and not isinstance(value, _UnreadableSetting)
+    }
+
+
+class _SettingsReader:
+    __slots__ = ("_modules", "_top_level_package")
+
+    def __init__(self, top_level_package: str) -> None:
+        # Other settings modules are only read in the package of the settings module
+        self._top_level_package = top_level_package
+        # Namespaces of the modules read, `None` while reading it to break import cycles
+        self._modules: dict[str, dict[str, Any] | None] = {}
+
+    def read_module(self, module_name: str, module_file: str) -> dict[str, Any]:
+        if module_name in self._modules:
+            return self._modules[module_name] or {}
+        self._modules[module_name] = None
+        with open(module_file, "rb") as f:
+            tree = ast.parse(f.read(), filename=module_file)
+        namespace: dict[str, Any] = {}
+        is_package = os.path.basename(module_file) == "__init__.py"
+        package = module_name if is_package else module_name.rpartition(".")[0]
+        self._read_statements(tree.body, namespace, package, module_file)
+        self._modules[module_name] = namespace
+        return namespace
+
+    def _read_statements(
+        self, statements: list[ast.stmt], namespace: dict[str, Any], package: str, module_file: str
+    ) -> None:
+        for statement in statements:
+            if isinstance(statement, ast.Assign):
+                for target in statement.targets:
+                    self._assign(target, statement.value, namespace, module_file)
+            elif isinstance(statement, ast.AnnAssign) and statement.value is not None:
+                self._assign(statement.target, statement.value, namespace, module_file)
+            elif isinstance(statement, ast.AugAssign) and isinstance(statement.target, ast.Name):
+                name = statement.target.id
+                value = ast.BinOp(left=ast.Name(id=name, ctx=ast.Load()), op=statement.op, right=statement.value)
+                ast.copy_location(value, statement)
+                self._assign(statement.target, value, namespace, module_file)
+            elif isinstance(statement, ast.ImportFrom):
+                self._import_from(statement, namespace, package, os.path.dirname(module_file))
+            elif isinstance(statement, ast.Try):
+                self._read_statements(statement.body, namespace, package, module_file)
+                for handler in statement.handlers:
+                    self._skip_statements(handler.body, namespace, module_file)
+                self._read_statements(statement.orelse, namespace, package, module_file)
+                self._read_statements(statement.finalbody, namespace, package, module_file)
+            elif isinstance(statement, ast.If):
+                try:
+                    condition = _evaluate(statement.test, namespace)
+                except (_UnknownValue, TypeError, ValueError):
+                    self._skip_statements([*statement.body, *statement.orelse], namespace, module_file)
+                    continue
+                body = statement.body if condition else statement.orelse
+                self._read_statements(body, namespace, package, module_file)
+
+    def _skip_statements(self, statements: list[ast.stmt], namespace: dict[str, Any], module_file: str) -> None:
+        """Statements that may run or not: the `REGISTRY_SETTINGS` they assign become unreadable."""
+        for name, lineno in _assigned_names(statements):
+            if name in REGISTRY_SETTINGS:
+                namespace[name] = _UnreadableSetting(f"{module_file}:{lineno}")
+
+    def _assign(self, target: ast.expr, value: ast.expr, namespace: dict[str, Any], module_file: str) -> None:
+        if not isinstance(target, ast.Name):
+            return
+        try:
+            namespace[target.id] = _evaluate(value, namespace)
+        except (_UnknownValue, TypeError, ValueError):
+            # Left to the Django default rather than a previous value, see `read_static_settings`
+            namespace[target.id] = _UnreadableSetting(f"{module_file}:{value.lineno}")
+
+    def _import_from(self, statement: ast.ImportFrom, namespace: dict[str, Any], package: str, path: str) -> None:
+        if statement.module is None:
+            return
+        if statement.level:
+            package_parts = package.split(".") if package else []
+            if statement.level - 1 > len(package_parts):
+                return
+            base = package_parts[: len(package_parts) - (statement.level - 1)]
+            module_name = ".".join([*base, statement.module])
+            # Relative to the package of the settings module, wherever it is on the path
+            search_path = os.path.normpath(os.path.join(path, *[os.pardir] * (statement.level - 1)))
+            module_file = find_module_file(statement.module, [search_path])
+        elif statement.module.partition(".")[0] == self._top_level_package:
+            module_name = statement.module
+            module_file = find_module_file(module_name)
+        else:
+            return
+        if module_file is None:
+            return
+
+        imported = self.read_module(module_name, module_file)
+        for alias in statement.names:
+            if alias.name == "*":
+                namespace.update({name: value for name, value in imported.items() if not name.startswith("_")})
+            elif alias.name in imported:
+                namespace[alias.asname or alias.name] = imported[alias.name]
+
+
+def _assigned_names(statements: list[ast.stmt]) -> Iterator[tuple[str, int]]:
+    """The names assigned by the statements, including nested blocks but not function or class bodies."""
+    for statement in statements:
+        targets: list[ast.expr] = []
+        if isinstance(statement, ast.Assign):
+            targets = statement.targets
+        elif isinstance(statement, ast.AnnAssign | ast.AugAssign):
+            targets = [statement.target]
+        elif isinstance(statement, ast.ImportFrom):
+            yield from ((alias.asname or alias.name, statement.lineno) for alias in statement.names)
+        elif not isinstance(statement, ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef):
+            for field in ("body", "orelse", "finalbody", "handlers"):
+                yield from _assigned_names(getattr(statement, field, []))
+        for target in targets:
+            yield from ((node.id, statement.lineno) for node in ast.walk(target) if isinstance(node, ast.Name))
+
+
+def _evaluate(node: ast.expr, namespace: dict[str, Any]) -> Any:
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.Name):
+        if node.id in namespace and not isinstance(namespace[node.id], _UnreadableSetting):
+            return namespace[node.id]
+        raise _UnknownValue
+    if isinstance(node, ast.List | ast.Tuple | ast.Set):
+        items = []
+        for element in node.elts:
+            if isinstance(element, ast.Starred):
+                items.extend(_evaluate(element.value, namespace))
+            else:
+                items.append(_evaluate(element, namespace))
+        if isinstance(node, ast.Tuple):
+            return tuple(items)
+        return set(items) if isinstance(node, ast.Set) else items
+    if isinstance(node, ast.Dict):
+        result = {}
+        for key, value in zip(node.keys, node.values, strict=True):
+            if key is None:
+                result.update(_evaluate(value, namespace))
+            else:
+                result[_evaluate(key, namespace)] = _evaluate(value, namespace)
+        return result
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        return _BINARY_OPERATORS[type(node.op)](_evaluate(node.left, namespace), _evaluate(node.right, namespace))
+    if isinstance(node, ast.UnaryOp):
+        operand = _evaluate(node.operand, namespace)
+        if isinstance(node.op, ast.USub):
+            return -operand
+        if isinstance(node.op, ast.Not):
+            return not operand
+    raise _UnknownValue
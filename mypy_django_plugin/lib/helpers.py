@@ -78,6 +78,7 @@ class DjangoTypeMetadata(TypedDict, total=False):
     m2m_throughs: dict[str, str]
     m2m_managers: dict[str, str]
     manager_to_model: str
+    completed_initializers: list[str]
 
 
 def get_django_metadata(model_info: TypeInfo) -> DjangoTypeMetadata:
@@ -490,15 +491,24 @@ def make_oneoff_named_tuple(
     return TupleType(list(fields.values()), fallback=Instance(namedtuple_info, []))
 
 
-def extend_oneoff_named_tuple(
-    api: TypeChecker, name: str, original: TupleType, extra_fields: Mapping[str, MypyType]
-) -> TupleType:
-    existing_fields = {
+def is_module_class(module: MypyFile, info: TypeInfo) -> bool:
+    """Whether `info` is still defined in `module`"""
+    sym = module.names.get(info.name)
+    return sym is not None and sym.node is info
+
+
+def get_oneoff_named_tuple_fields(named_tuple: TupleType) -> dict[str, MypyType]:
+    return {
         field_name: sym.node.type or AnyType(TypeOfAny.special_form)
-        for field_name, sym in original.partial_fallback.type.names.items()
+        for field_name, sym in named_tuple.partial_fallback.type.names.items()
         if sym.plugin_generated and isinstance(sym.node, Var)
     }
-    return make_oneoff_named_tuple(api, name, {**existing_fields, **extra_fields})
+
+
+def extend_oneoff_named_tuple(
+    api: TypeChecker, name: str, original: TupleType, extra_fields: Mapping[str, MypyType]
+) -> TupleType:
+    return make_oneoff_named_tuple(api, name, {**get_oneoff_named_tuple_fields(original), **extra_fields})
 
 
 def make_tuple(api: TypeChecker, fields: list[MypyType]) -> TupleType:
@@ -703,7 +713,7 @@ def get_model_from_expression(
         and isinstance(expr.expr, NameExpr)
         and f"{expr.expr.fullname}.{expr.name}" == fullnames.AUTH_USER_MODEL_FULLNAME
     ):
-        lazy_reference = django_context.settings.AUTH_USER_MODEL
+        lazy_reference = django_context.settings_snapshot.auth_user_model
 
     if lazy_reference is not None:
         model_info = resolve_lazy_reference(lazy_reference, api=api, django_context=django_context, ctx=expr)
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from functools import partial, wraps
+from typing import TYPE_CHECKING, Any, Final
+
+from mypy.checker import TypeChecker
+from mypy.nodes import MypyFile
+from mypy.semanal import SemanticAnalyzer
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from mypy.options import Options
+    from mypy.plugin import ReportConfigContext
+    from typing_extensions import TypeVar
+
+    _T = TypeVar("_T")
+
+# Every trace event is kept in memory until the report is written, stop recording past this limit
+MAX_TRACE_EVENTS: Final = 1_000_000
+
+UNKNOWN_MODULE: Final = "<unknown>"
+
+# The daemon's reports are written once no hook has run for this long, see `HookProfiler.install`
+IDLE_SECONDS: Final = 1.0
+
+
+class HookStats:
+    __slots__ = ("calls", "seconds")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+
+    def to_json(self) -> dict[str, Any]:
+        return {"calls": self.calls, "seconds": round(self.seconds, 6)}
+
+
+class HookProfiler:
+    """Record call counts and wall time of plugin hooks, per hook and per module.
+
+    At the end of each build, a JSON summary and a trace in the Chrome trace event format
+    (viewable in `chrome://tracing` or https://ui.perfetto.dev) of everything recorded so far
+    are written to `output_dir`, see `install`.
+    """
+
+    def __init__(self, output_dir: str) -> None:
+        self.output_dir = output_dir
+        self.hooks: dict[str, HookStats] = {}
+        self.modules: dict[str, dict[str, HookStats]] = {}
+        self.trace_events: list[tuple[str, str, str, int, int]] = []
+        self._started_ns = time.perf_counter_ns()
+        # Held while recording and writing, the daemon's reports are written by another thread
+        self._lock = threading.Lock()
+        # Whether anything was recorded since the reports were last written
+        self._dirty = False
+        self._last_record_ns = self._started_ns
+        # Modules parsed in the current build whose cache isn't written yet, see `profile_call`
+        self._unfinished_modules: set[str] = set()
+        self._idle_writes = False
+
+    def install(self, options: Options) -> None:
+        """Write the reports at the end of every build.
+
+        mypy tells plugins nothing about the end of a build: the last plugin call for a module parsed in a build
+        is `report_config_data` writing its cache. The build is over once every parsed module is written, or
+        when the build graph is loaded without parsing any module, i.e. from the cache. The daemon doesn't
+        write caches, its reports are written once the plugin has been idle for `IDLE_SECONDS` instead, which
+        is also when the daemon waits for the next command.
+        """
+        if options.fine_grained_incremental:
+            self._idle_writes = True
+            threading.Thread(target=self._write_when_idle, name="django-stubs-profiler", daemon=True).start()
+
+    def record(self, category: str, name: str, module: str, started_ns: int, ended_ns: int) -> None:
+        seconds = (ended_ns - started_ns) / 1e9
+        with self._lock:
+            for stats in (_get_stats(self.hooks, name), _get_stats(self.modules.setdefault(module, {}), name)):
+                stats.calls += 1
+                stats.seconds += seconds
+            if len(self.trace_events) < MAX_TRACE_EVENTS:
+                self.trace_events.append((category, name, module, started_ns, ended_ns))
+            self._dirty = True
+            self._last_record_ns = ended_ns
+
+    def profile_hook(self, category: str, hook: Callable[[Any], _T]) -> Callable[[Any], _T]:
+        """Wrap a hook returned by one of the plugin's `get_*_hook` methods."""
+        name = _hook_name(hook)
+
+        def profiled_hook(ctx: Any) -> _T:
+            started_ns = time.perf_counter_ns()
+            try:
+                return hook(ctx)
+            finally:
+                self.record(category, name, _current_module(ctx), started_ns, time.perf_counter_ns())
+
+        return profiled_hook
+
+    def profile_dispatch(self, method: Callable[[str], Callable[[Any], _T] | None]) -> Callable[[str], Any]:
+        """Wrap a `get_*_hook` method: its own lookup time and every hook it returns are recorded."""
+        category = method.__name__
+
+        @wraps(method)
+        def profiled_method(fullname: str) -> Callable[[Any], _T] | None:
+            started_ns = time.perf_counter_ns()
+            hook = method(fullname)
+            self._record_dispatch(category, started_ns)
+            if hook is None:
+                return None
+            return self.profile_hook(category, hook)
+
+        return profiled_method
+
+    def profile_call(
+        self, method: Callable[[MypyFile | ReportConfigContext], _T]
+    ) -> Callable[[MypyFile | ReportConfigContext], _T]:
+        """Wrap a plugin method called once per module, `get_additional_deps` or `report_config_data`."""
+        name = method.__name__
+
+        @wraps(method)
+        def profiled_method(file_or_ctx: MypyFile | ReportConfigContext) -> _T:
+            started_ns = time.perf_counter_ns()
+            try:
+                return method(file_or_ctx)
+            finally:
+                module = file_or_ctx.fullname if isinstance(file_or_ctx, MypyFile) else file_or_ctx.id
+                self.record(name, name, module, started_ns, time.perf_counter_ns())
+                if isinstance(file_or_ctx, MypyFile):
+                    self._unfinished_modules.add(module)
+                elif not file_or_ctx.is_check and module in self._unfinished_modules:
+                    self._unfinished_modules.remove(module)
+                    if not self._unfinished_modules:
+                        self._write_at_build_end()
+
+        return profiled_method
+
+    def graph_loaded(self) -> None:
+        """Called once the build graph is loaded, by `set_modules`."""
+        if not self._unfinished_modules:
+            # Nothing parsed, nothing else to process
+            self._write_at_build_end()
+
+    def _record_dispatch(self, category: str, started_ns: int) -> None:
+        # Dispatch happens for every name mypy checks, only aggregate it
+        stats = _get_stats(self.hooks, f"dispatch:{category}")
+        stats.calls += 1
+        stats.seconds += (time.perf_counter_ns() - started_ns) / 1e9
+
+    def _write_at_build_end(self) -> None:
+        if not self._idle_writes:
+            self.write_reports()
+
+    def _write_when_idle(self) -> None:
+        while True:
+            time.sleep(IDLE_SECONDS)
+            if self._dirty and time.perf_counter_ns() - self._last_record_ns >= IDLE_SECONDS * 1e9:
+                self.write_reports()
+
+    def write_reports(self) -> None:
+        with self._lock:
+            self._write_reports()
+            self._dirty = False
+
+    def _write_reports(self) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        pid = os.getpid()
+
+        def by_time(stats: dict[str, HookStats]) -> dict[str, Any]:
+            ordered = sorted(stats.items(), key=lambda item: item[1].seconds, reverse=True)
+            return {name: hook_stats.to_json() for name, hook_stats in ordered}
+
+        report = {
+            "wall_seconds": round((time.perf_counter_ns() - self._started_ns) / 1e9, 6),
+            "hooks": by_time(self.hooks),
+            "modules": {module: by_time(stats) for module, stats in sorted(self.modules.items())},
+        }
+        with open(os.path.join(self.output_dir, f"django_stubs_profile.{pid}.json"), "w") as f:
+            json.dump(report, f, indent=2)
+
+        trace = {
+            "traceEvents": [
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": (started_ns - self._started_ns) / 1e3,
+                    "dur": (ended_ns - started_ns) / 1e3,
+                    "pid": pid,
+                    "tid": 0,
+                    "args": {"module": module},
+                }
+                for category, name, module, started_ns, ended_ns in self.trace_events
+            ],
+            "displayTimeUnit": "ms",
+        }
+        with open(os.path.join(self.output_dir, f"django_stubs_trace.{pid}.json"), "w") as f:
+            json.dump(trace, f)
+
+
+def _get_stats(stats: dict[str, HookStats], name: str) -> HookStats:
+    hook_stats = stats.get(name)
+    if hook_stats is None:
+        hook_stats = stats[name] = HookStats()
+    return hook_stats
+
+
+def _hook_name(hook: Callable[..., Any]) -> str:
+    func = hook.func if isinstance(hook, partial) else hook
+    return f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"
+
+
+def _current_module(ctx: Any) -> str:
+    api = getattr(ctx, "api", None)
+    if isinstance(api, TypeChecker):
+        return api.tree.fullname
+    # The type analyzer wraps the semantic analyzer
+    api = getattr(api, "api", api)
+    if isinstance(api, SemanticAnalyzer):
+        return api.cur_mod_id
+    return UNKNOWN_MODULE
@@ -1,14 +1,26 @@
 from __future__ import annotations
 
 import importlib.metadata
-import itertools
+import os
 import sys
 from functools import cache, cached_property, partial
-from typing import TYPE_CHECKING, Any, Final
+from typing import TYPE_CHECKING, Any, Final, NamedTuple
 
 from mypy.build import PRI_MED, PRI_MYPY
 from mypy.modulefinder import mypy_path
-from mypy.nodes import Import, ImportFrom, MypyFile, TypeInfo
+from mypy.nodes import (
+    ClassDef,
+    ForStmt,
+    IfStmt,
+    Import,
+    ImportFrom,
+    MypyFile,
+    Statement,
+    TryStmt,
+    TypeInfo,
+    WhileStmt,
+    WithStmt,
+)
 from mypy.plugin import (
     AnalyzeTypeContext,
     AttributeContext,
@@ -19,12 +31,19 @@ from mypy.plugin import (
     Plugin,
     ReportConfigContext,
 )
+from mypy.types import Instance
 from typing_extensions import override
 
 from mypy_django_plugin.config import DjangoPluginConfig
 from mypy_django_plugin.django.context import DjangoContext
-from mypy_django_plugin.exceptions import UnregisteredModelError
+from mypy_django_plugin.django.snapshot import (
+    GET_MODEL_REFERENCES_FILENAME,
+    SNAPSHOT_FILENAME,
+    load_get_model_references,
+    record_get_model_references,
+)
 from mypy_django_plugin.lib import fullnames, helpers
+from mypy_django_plugin.lib.profiling import HookProfiler
 from mypy_django_plugin.transformers import (
     apps,
     choices,
@@ -51,6 +70,7 @@ from mypy_django_plugin.transformers.managers import (
 )
 from mypy_django_plugin.transformers.models import (
     MetaclassAdjustments,
+    add_model_fingerprints,
     handle_annotated_type,
     process_model_class,
     set_auth_user_model_boolean_fields,
@@ -58,13 +78,36 @@ from mypy_django_plugin.transformers.models import (
 from mypy_django_plugin.transformers.request import check_querydict_is_mutable
 
 if TYPE_CHECKING:
-    from collections.abc import Callable
+    from collections.abc import Callable, Iterable
 
     from mypy.options import Options
     from mypy.types import Type as MypyType
+    from typing_extensions import TypeVar
+
+    _Hook = TypeVar("_Hook", bound=Callable[..., Any])
 
 
 _APPS_MODULES: Final = frozenset({"django.apps", "django.apps.registry"})
+_HOOK_METHODS: Final = (
+    "get_function_hook",
+    "get_method_hook",
+    "get_customize_class_mro_hook",
+    "get_metaclass_hook",
+    "get_base_class_hook",
+    "get_attribute_hook",
+    "get_type_analyze_hook",
+    "get_dynamic_class_hook",
+)
+
+
+class _CachedHook(NamedTuple):
+    info: TypeInfo
+    # `TypeInfo.mro` is replaced, not mutated, whenever it's recalculated
+    mro: list[TypeInfo]
+    hook: Any
+
+    def is_valid_for(self, info: TypeInfo) -> bool:
+        return info is self.info and info.mro is self.mro
 
 
 class NewSemanalDjangoPlugin(Plugin):
@@ -75,7 +118,47 @@ class NewSemanalDjangoPlugin(Plugin):
         sys.path.extend(mypy_path())
         # Add paths from mypy_path config option
         sys.path.extend(options.mypy_path)
-        self.django_context = DjangoContext(self.plugin_config.django_settings_module)
+        snapshot_file = None
+        # Shared between runs, e.g. generated once with `python -m mypy_django_plugin dump-schema`.
+        # When it's stale, the snapshot is rebuilt in the cache directory instead.
+        shared_snapshot_file = self.plugin_config.model_snapshot_file or None
+        # Parallel workers share the snapshot instead of each setting up Django for the build graph data,
+        # `num_workers` is only available on recent mypy versions
+        parallel = getattr(options, "num_workers", 0) > 0
+        if (self.plugin_config.model_snapshot or shared_snapshot_file or parallel) and options.cache_dir != os.devnull:
+            snapshot_file = os.path.join(options.cache_dir, SNAPSHOT_FILENAME)
+        self.django_context = DjangoContext(
+            self.plugin_config.django_settings_module,
+            snapshot_file=snapshot_file,
+            shared_snapshot_file=shared_snapshot_file,
+            # The daemon keeps the plugin across runs, while settings and models get edited
+            watch_sources=options.fine_grained_incremental,
+            static_settings=self.plugin_config.static_settings,
+        )
+        # Hooks resolved for a fullname, including "no hook", see `_get_cached_hook`
+        self._function_hooks: dict[str, _CachedHook] = {}
+        self._method_hooks: dict[str, _CachedHook] = {}
+        self._attribute_hooks: dict[str, _CachedHook] = {}
+        # Per module `report_config_data`, only when the registry snapshot is enabled
+        self._module_config_data: dict[str, dict[str, Any]] = {}
+        self._get_model_references_file = (
+            os.path.join(options.cache_dir, GET_MODEL_REFERENCES_FILENAME)
+            if snapshot_file is not None and options.cache_dir != os.devnull
+            else None
+        )
+
+        self._profiler: HookProfiler | None = None
+        if self.plugin_config.profile_dir:
+            self._profiler = HookProfiler(self.plugin_config.profile_dir)
+            self._install_profiler(self._profiler, options)
+
+    def _install_profiler(self, profiler: HookProfiler, options: Options) -> None:
+        profiler.install(options)
+        # Shadow the hook methods on the instance, this keeps the default path free of any overhead
+        for method_name in _HOOK_METHODS:
+            setattr(self, method_name, profiler.profile_dispatch(getattr(self, method_name)))
+        for method_name in ("get_additional_deps", "report_config_data"):
+            setattr(self, method_name, profiler.profile_call(getattr(self, method_name)))
 
     def _get_typeinfo_or_none(self, class_name: str) -> TypeInfo | None:
         sym = self.lookup_fully_qualified(class_name)
@@ -83,6 +166,26 @@ class NewSemanalDjangoPlugin(Plugin):
             return sym.node
         return None
 
+    def _get_cached_hook(
+        self,
+        cache: dict[str, _CachedHook],
+        fullname: str,
+        info: TypeInfo,
+        resolve: Callable[[TypeInfo, str], _Hook | None],
+    ) -> _Hook | None:
+        """Resolve the hook for `fullname` once, as long as the class it belongs to stays the same.
+
+        The class is still looked up on every call: a `TypeInfo` is recreated when its module is
+        reprocessed (e.g. by the daemon) and its bases may change, which invalidates the entry.
+        """
+        cached = cache.get(fullname)
+        if cached is not None and cached.is_valid_for(info):
+            hook: _Hook | None = cached.hook
+            return hook
+        hook = resolve(info, fullname)
+        cache[fullname] = _CachedHook(info, info.mro, hook)
+        return hook
+
     def _new_dependency(self, module: str, priority: int = PRI_MYPY) -> tuple[int, str, int]:
         fake_lineno = -1
         return (priority, module, fake_lineno)
@@ -96,8 +199,63 @@ class NewSemanalDjangoPlugin(Plugin):
                 return True
         return False
 
+    def _get_model_modules_referenced_by(self, lazy_references: Iterable[str] | None) -> Iterable[str]:
+        if lazy_references is None:
+            # A non-literal `get_model()` call may return any model, `related_modules` has all model modules
+            return self.django_context.related_modules
+        modules = set()
+        for lazy_reference in lazy_references:
+            fullname = self.django_context.model_class_fullname_for_label(lazy_reference)
+            if fullname is not None:
+                modules.add(fullname.rpartition(".")[0])
+        return modules
+
+    @cached_property
+    def _get_model_references(self) -> dict[str, list[str] | None]:
+        if self._get_model_references_file is None:
+            return {}
+        return load_get_model_references(self._get_model_references_file)
+
+    def _record_get_model_references(self, module: str, lazy_references: set[str] | None) -> None:
+        """Keep the references of a parsed module for `report_config_data`, which is called before parsing."""
+        if self._get_model_references_file is None:
+            return
+        references = None if lazy_references is None else sorted(lazy_references)
+        if self._get_model_references.get(module, []) == references:
+            return
+        if references == []:
+            del self._get_model_references[module]
+        else:
+            self._get_model_references[module] = references
+        self._module_config_data.pop(module, None)
+        record_get_model_references(self._get_model_references_file, module, references)
+
+    @override
+    def set_modules(self, modules: dict[str, MypyFile]) -> None:
+        # Called once the build graph is loaded, and again by the daemon after (re)parsing changed modules
+        super().set_modules(modules)
+        self.django_context.clear_type_caches()
+        if self._profiler is not None:
+            self._profiler.graph_loaded()
+
     @override
     def get_additional_deps(self, file: MypyFile) -> list[tuple[int, str, int]]:
+        # Called for every (re)parsed file, before it's analyzed
+        if self.django_context.refresh_changed_source(file.path):
+            for name in ("_report_config_data", "_model_labels_by_module"):
+                self.__dict__.pop(name, None)
+            self._module_config_data.clear()
+        # The daemon compares the symbols of a reparsed settings module with the previous ones, see
+        # `AddRelatedModelDependencies`. The models publish them once `str` is analyzed on a cold start.
+        if (
+            self._modules is not None
+            and self.django_context.is_django_set_up
+            and file.fullname in self.django_context.settings_source_modules
+        ):
+            str_info = self._get_typeinfo_or_none("builtins.str")
+            if str_info is not None:
+                add_model_fingerprints(file, self.django_context, Instance(str_info, []))
+
         # for settings
         if file.fullname == "django.conf" and self.django_context.django_settings_module:
             return [self._new_dependency(self.django_context.django_settings_module, PRI_MED)]
@@ -108,42 +266,41 @@ class NewSemanalDjangoPlugin(Plugin):
 
         # for `get_user_model()`
         if file.fullname == "django.contrib.auth" or file.fullname in {"django.http", "django.http.request"}:
-            auth_user_model_name = self.django_context.settings.AUTH_USER_MODEL
-            try:
-                auth_user_module = self.django_context.apps_registry.get_model(auth_user_model_name).__module__
-            except LookupError:
+            auth_user_module = self.django_context.auth_user_module
+            if auth_user_module is None:
                 # get_user_model() model app is not installed
                 return []
             return [self._new_dependency(auth_user_module), self._new_dependency("django_stubs_ext")]
 
         deps: set[tuple[int, str, int]] = set()
 
-        # A file using `apps.get_model()` may depend on any model module.
+        # A file using `apps.get_model()` depends on the model modules it references.
         # Skip stubs to keep Django's own build graph untouched.
+        lazy_references: set[str] | None = set()
         if not file.is_stub and self._file_imports_apps_module(file):
+            lazy_references = apps.collect_get_model_lazy_references(file.path)
             deps.update(
-                self._new_dependency(module) for module in self.django_context.model_modules if module != file.fullname
+                self._new_dependency(module)
+                for module in self._get_model_modules_referenced_by(lazy_references)
+                if module != file.fullname
             )
+        self._record_get_model_references(file.fullname, lazy_references)
+
+        # Only a module executing a class statement can define models. This doesn't avoid setting up Django
+        # on a cold run, where stubs like `builtins` define classes, but incremental and daemon runs only
+        # reparsing modules without classes don't need the registry here.
+        # Parallel builds only deserialize the imports of a file here, keeping the rest in `raw_data`.
+        has_all_defs = getattr(file, "raw_data", None) is None
+        if has_all_defs and not _defines_class(file.defs):
+            return list(deps)
 
-        # ensure that all mentions to='someapp.SomeModel' are loaded with corresponding related Fields
-        defined_model_classes = self.django_context.model_modules.get(file.fullname)
-        if not defined_model_classes:
+        # ensure that all mentions to='someapp.SomeModel' are loaded with corresponding related Fields,
+        # forward relations and reverse relations (`related_objects` is private API according to docstring)
+        related_modules = self.django_context.related_modules.get(file.fullname)
+        if related_modules is None:
             return list(deps)
 
-        for model_class in defined_model_classes.values():
-            for field in itertools.chain(
-                # forward relations
-                self.django_context.get_model_related_fields(model_class),
-                # reverse relations - `related_objects` is private API (according to docstring)
-                model_class._meta.related_objects,
-            ):
-                try:
-                    related_model_cls = self.django_context.get_field_related_model_cls(field)  # type: ignore[arg-type]
-                except UnregisteredModelError:
-                    continue
-                related_model_module = related_model_cls.__module__
-                if related_model_module != file.fullname:
-                    deps.add(self._new_dependency(related_model_module))
+        deps.update(self._new_dependency(related_model_module) for related_model_module in related_modules)
 
         return [
             *deps,
@@ -160,11 +317,15 @@ class NewSemanalDjangoPlugin(Plugin):
         info = self._get_typeinfo_or_none(fullname)
         if not info:
             return None
+        return self._get_cached_hook(self._function_hooks, fullname, info, self._resolve_function_hook)
 
+    def _resolve_function_hook(self, info: TypeInfo, fullname: str) -> Callable[[FunctionContext], MypyType] | None:
         if info.has_base(fullnames.FIELD_FULLNAME):
             return partial(fields.transform_into_proper_return_type, django_context=self.django_context)
 
         if helpers.is_model_type(info):
+            if not self.plugin_config.validates("standard"):
+                return None
             return partial(init_create.typecheck_model_init, django_context=self.django_context)
 
         if info.has_base(fullnames.BASE_MANAGER_CLASS_FULLNAME):
@@ -180,53 +341,70 @@ class NewSemanalDjangoPlugin(Plugin):
 
     @cached_property
     def manager_and_queryset_method_hooks(self) -> dict[str, Callable[[MethodContext], MypyType]]:
-        typecheck_filtering_method = partial(orm_lookups.typecheck_queryset_filter, django_context=self.django_context)
-        return {
+        # Hooks refining the return type are always registered, those only validating arguments depend
+        # on the validation level
+        hooks: dict[str, Callable[[MethodContext], MypyType]] = {
             "values": partial(querysets.extract_proper_type_queryset_values, django_context=self.django_context),
             "values_list": partial(
                 querysets.extract_proper_type_queryset_values_list, django_context=self.django_context
             ),
             "alias": partial(querysets.extract_proper_type_queryset_annotate, django_context=self.django_context),
             "annotate": partial(querysets.extract_proper_type_queryset_annotate, django_context=self.django_context),
-            "create": partial(init_create.typecheck_model_create, django_context=self.django_context),
-            "acreate": partial(init_create.typecheck_model_acreate, django_context=self.django_context),
-            "filter": typecheck_filtering_method,
-            "get": typecheck_filtering_method,
-            "aget": typecheck_filtering_method,
-            "get_or_create": typecheck_filtering_method,
-            "aget_or_create": typecheck_filtering_method,
-            "update_or_create": typecheck_filtering_method,
-            "aupdate_or_create": typecheck_filtering_method,
-            "exclude": typecheck_filtering_method,
             "prefetch_related": partial(
-                querysets.extract_prefetch_related_annotations, django_context=self.django_context
-            ),
-            "select_related": partial(querysets.validate_select_related, django_context=self.django_context),
-            "bulk_update": partial(
-                querysets.validate_bulk_update, django_context=self.django_context, method="bulk_update"
-            ),
-            "abulk_update": partial(
-                querysets.validate_bulk_update, django_context=self.django_context, method="abulk_update"
-            ),
-            "bulk_create": partial(
-                querysets.validate_bulk_create, django_context=self.django_context, method="bulk_create"
-            ),
-            "abulk_create": partial(
-                querysets.validate_bulk_create, django_context=self.django_context, method="abulk_create"
+                querysets.extract_prefetch_related_annotations,
+                django_context=self.django_context,
+                validate_lookups=self.plugin_config.validates("strict"),
             ),
-            "order_by": partial(querysets.validate_order_by, django_context=self.django_context),
-            "earliest": partial(querysets.validate_order_by, django_context=self.django_context),
-            "aearliest": partial(querysets.validate_order_by, django_context=self.django_context),
-            "latest": partial(querysets.validate_order_by, django_context=self.django_context),
-            "alatest": partial(querysets.validate_order_by, django_context=self.django_context),
-            "defer": partial(querysets.validate_defer_only, django_context=self.django_context, is_defer=True),
-            "only": partial(querysets.validate_defer_only, django_context=self.django_context, is_defer=False),
-            "distinct": partial(querysets.validate_distinct, django_context=self.django_context),
-            "update": partial(querysets.validate_update, django_context=self.django_context),
-            "aupdate": partial(querysets.validate_update, django_context=self.django_context),
-            "in_bulk": partial(querysets.validate_in_bulk, django_context=self.django_context),
-            "ain_bulk": partial(querysets.validate_in_bulk, django_context=self.django_context),
         }
+        if self.plugin_config.validates("standard"):
+            typecheck_filtering_method = partial(
+                orm_lookups.typecheck_queryset_filter, django_context=self.django_context
+            )
+            hooks.update(
+                {
+                    "create": partial(init_create.typecheck_model_create, django_context=self.django_context),
+                    "acreate": partial(init_create.typecheck_model_acreate, django_context=self.django_context),
+                    "filter": typecheck_filtering_method,
+                    "get": typecheck_filtering_method,
+                    "aget": typecheck_filtering_method,
+                    "get_or_create": typecheck_filtering_method,
+                    "aget_or_create": typecheck_filtering_method,
+                    "update_or_create": typecheck_filtering_method,
+                    "aupdate_or_create": typecheck_filtering_method,
+                    "exclude": typecheck_filtering_method,
+                    "bulk_update": partial(
+                        querysets.validate_bulk_update, django_context=self.django_context, method="bulk_update"
+                    ),
+                    "abulk_update": partial(
+                        querysets.validate_bulk_update, django_context=self.django_context, method="abulk_update"
+                    ),
+                    "bulk_create": partial(
+                        querysets.validate_bulk_create, django_context=self.django_context, method="bulk_create"
+                    ),
+                    "abulk_create": partial(
+                        querysets.validate_bulk_create, django_context=self.django_context, method="abulk_create"
+                    ),
+                    "update": partial(querysets.validate_update, django_context=self.django_context),
+                    "aupdate": partial(querysets.validate_update, django_context=self.django_context),
+                    "in_bulk": partial(querysets.validate_in_bulk, django_context=self.django_context),
+                    "ain_bulk": partial(querysets.validate_in_bulk, django_context=self.django_context),
+                }
+            )
+        if self.plugin_config.validates("strict"):
+            hooks.update(
+                {
+                    "select_related": partial(querysets.validate_select_related, django_context=self.django_context),
+                    "order_by": partial(querysets.validate_order_by, django_context=self.django_context),
+                    "earliest": partial(querysets.validate_order_by, django_context=self.django_context),
+                    "aearliest": partial(querysets.validate_order_by, django_context=self.django_context),
+                    "latest": partial(querysets.validate_order_by, django_context=self.django_context),
+                    "alatest": partial(querysets.validate_order_by, django_context=self.django_context),
+                    "defer": partial(querysets.validate_defer_only, django_context=self.django_context, is_defer=True),
+                    "only": partial(querysets.validate_defer_only, django_context=self.django_context, is_defer=False),
+                    "distinct": partial(querysets.validate_distinct, django_context=self.django_context),
+                }
+            )
+        return hooks
 
     @override
     def get_method_hook(self, fullname: str) -> Callable[[MethodContext], MypyType] | None:
@@ -246,7 +424,10 @@ class NewSemanalDjangoPlugin(Plugin):
         info = self._get_typeinfo_or_none(class_fullname)
         if not info:
             return None
+        return self._get_cached_hook(self._method_hooks, fullname, info, self._resolve_method_hook)
 
+    def _resolve_method_hook(self, info: TypeInfo, fullname: str) -> Callable[[MethodContext], MypyType] | None:
+        class_fullname, _, method_name = fullname.rpartition(".")
         if class_fullname.endswith("QueryDict") and info.has_base(fullnames.QUERYDICT_CLASS_FULLNAME):
             return check_querydict_is_mutable
 
@@ -255,7 +436,11 @@ class NewSemanalDjangoPlugin(Plugin):
         ):
             return self.manager_and_queryset_method_hooks[method_name]
 
-        if method_name in ("save", "asave") and helpers.is_model_type(info):
+        if (
+            method_name in ("save", "asave")
+            and helpers.is_model_type(info)
+            and self.plugin_config.validates("standard")
+        ):
             return partial(save.validate_save_update_fields, django_context=self.django_context, method=method_name)
 
         if method_name == "get_field" and info.has_base(fullnames.OPTIONS_CLASS_FULLNAME):
@@ -319,7 +504,7 @@ class NewSemanalDjangoPlugin(Plugin):
 
     @override
     def get_attribute_hook(self, fullname: str) -> Callable[[AttributeContext], MypyType] | None:
-        class_name, _, attr_name = fullname.rpartition(".")
+        class_name = fullname.rpartition(".")[0]
 
         # Lookup of a settings variable
         if class_name == fullnames.DUMMY_SETTINGS_BASE_CLASS:
@@ -332,7 +517,10 @@ class NewSemanalDjangoPlugin(Plugin):
         info = self._get_typeinfo_or_none(class_name)
         if not info:
             return None
+        return self._get_cached_hook(self._attribute_hooks, fullname, info, self._resolve_attribute_hook)
 
+    def _resolve_attribute_hook(self, info: TypeInfo, fullname: str) -> Callable[[AttributeContext], MypyType] | None:
+        attr_name = fullname.rpartition(".")[2]
         # Lookup of the '.is_superuser' attribute
         if info.has_base(fullnames.PERMISSION_MIXIN_CLASS_FULLNAME) and attr_name == "is_superuser":
             return partial(set_auth_user_model_boolean_fields, django_context=self.django_context)
@@ -346,7 +534,7 @@ class NewSemanalDjangoPlugin(Plugin):
         if info.has_base(
             fullnames.BASE_MANAGER_CLASS_FULLNAME
         ) and "from_queryset_manager" in helpers.get_django_metadata(info):
-            return resolve_manager_method
+            return partial(resolve_manager_method, django_context=self.django_context)
 
         if info.has_base(fullnames.STR_PROMISE_FULLNAME):
             return resolve_str_promise_attribute
@@ -380,23 +568,79 @@ class NewSemanalDjangoPlugin(Plugin):
     @cached_property
     def _report_config_data(self) -> dict[str, Any]:
         # Cache would be cleared if any settings do change.
-        extra_data = {
-            # The additional deps depend on the installed apps
-            "INSTALLED_APPS": list(self.django_context.settings.INSTALLED_APPS),
+        django_settings = self.django_context.settings_snapshot
+        extra_data: dict[str, Any] = {
             # The user model determines the `_User` alias expansion
-            "AUTH_USER_MODEL": self.django_context.settings.AUTH_USER_MODEL,
+            "AUTH_USER_MODEL": django_settings.auth_user_model,
             # The implicit `pk` field type depends on `DEFAULT_AUTO_FIELD`
-            "DEFAULT_AUTO_FIELD": self.django_context.settings.DEFAULT_AUTO_FIELD,
+            "DEFAULT_AUTO_FIELD": django_settings.default_auto_field,
             "django_version": _package_version("django"),
             "django_stubs_version": _package_version("django-stubs"),
         }
+        if self.django_context.snapshot_file is None:
+            # Only settings are needed here, this must not populate the app registry.
+            # The additional deps depend on the installed apps
+            extra_data["INSTALLED_APPS"] = list(django_settings.installed_apps)
+        else:
+            # Registry data is available from the snapshot without populating the app registry, installed
+            # apps are only folded into the data of the modules depending on them, see `_get_module_config_data`
+            extra_data["contrib_auth_installed"] = self.django_context.is_contrib_auth_installed
+            extra_data["contenttypes_installed"] = self.django_context.is_contenttypes_installed
+            extra_data["auth_user_module"] = self.django_context.auth_user_module
         if (django_stubs_ext_version := _package_version("django-stubs-ext")) is not None:
             extra_data["django_stubs_ext_version"] = django_stubs_ext_version
         return self.plugin_config.to_json(extra_data)
 
+    @cached_property
+    def _model_labels_by_module(self) -> dict[str, list[str]]:
+        labels: dict[str, list[str]] = {}
+        for model in self.django_context.registry_snapshot.models.values():
+            labels.setdefault(model.module, []).append(model.label_lower)
+        return {module: sorted(module_labels) for module, module_labels in labels.items()}
+
+    def _get_module_config_data(self, ctx: ReportConfigContext) -> dict[str, Any]:
+        """The parts of the app registry a module's plugin output and additional deps depend on."""
+        module_data: dict[str, Any] = {}
+        related_modules = self.django_context.related_modules.get(ctx.id)
+        if related_modules is not None:
+            module_data["models"] = self._model_labels_by_module.get(ctx.id, [])
+            module_data["related_modules"] = list(related_modules)
+        # The references recorded when the module was last parsed, the same as its `get_model()` additional deps
+        if ctx.id in self._get_model_references:
+            lazy_references = self._get_model_references[ctx.id]
+            module_data["get_model_modules"] = sorted(self._get_model_modules_referenced_by(lazy_references))
+        return module_data
+
     @override
     def report_config_data(self, ctx: ReportConfigContext) -> dict[str, Any]:
-        return self._report_config_data
+        if self.django_context.snapshot_file is None:
+            return self._report_config_data
+        # Called once to validate the cache of a module and once more when writing it
+        config_data = self._module_config_data.get(ctx.id)
+        if config_data is None:
+            config_data = {**self._report_config_data, **self._get_module_config_data(ctx)}
+            self._module_config_data[ctx.id] = config_data
+        return config_data
+
+
+def _defines_class(statements: Iterable[Statement]) -> bool:
+    """Whether a class statement is found outside of function bodies, i.e. runs on module import."""
+    for stmt in statements:
+        if isinstance(stmt, ClassDef):
+            return True
+        if isinstance(stmt, IfStmt):
+            blocks = [*stmt.body, stmt.else_body]
+        elif isinstance(stmt, TryStmt):
+            blocks = [stmt.body, *stmt.handlers, stmt.else_body, stmt.finally_body]
+        elif isinstance(stmt, ForStmt | WhileStmt):
+            blocks = [stmt.body, stmt.else_body]
+        elif isinstance(stmt, WithStmt):
+            blocks = [stmt.body]
+        else:
+            continue
+        if any(block is not None and _defines_class(block.body) for block in blocks):
+            return True
+    return False
 
 
 @cache
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import ast
 from typing import TYPE_CHECKING
 
 from mypy.nodes import StrExpr
 from mypy.types import Instance, TypeType
 from mypy.types import Type as MypyType
+from typing_extensions import override
 
 from mypy_django_plugin.lib import helpers
 
@@ -54,3 +56,91 @@ def resolve_model_for_get_model(ctx: MethodContext, django_context: DjangoContex
     ):
         return TypeType(Instance(model_info, []))
     return ctx.default_return_type
+
+
+class _GetModelCallCollector(ast.NodeVisitor):
+    def __init__(self) -> None:
+        self.lazy_references: set[str] = set()
+        self.has_dynamic_reference = False
+
+    @override
+    def visit_Call(self, node: ast.Call) -> None:
+        if not _is_get_model_reference(node.func):
+            self.generic_visit(node)
+            return
+
+        # Skip `node.func`, the `get_model` reference itself
+        if isinstance(node.func, ast.Attribute):
+            self.visit(node.func.value)
+        for child in (*node.args, *node.keywords):
+            self.visit(child)
+
+        lazy_reference = _get_call_lazy_reference(node)
+        if lazy_reference is None or "." not in lazy_reference:
+            self.has_dynamic_reference = True
+        else:
+            self.lazy_references.add(lazy_reference)
+
+    # Only reached when `get_model` isn't called directly, e.g. `get = apps.get_model`
+    @override
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        self.has_dynamic_reference |= _is_get_model_reference(node)
+        self.generic_visit(node)
+
+    @override
+    def visit_Name(self, node: ast.Name) -> None:
+        self.has_dynamic_reference |= _is_get_model_reference(node)
+
+
+def _is_get_model_reference(node: ast.expr) -> bool:
+    return (isinstance(node, ast.Name) and node.id == "get_model") or (
+        isinstance(node, ast.Attribute) and node.attr == "get_model"
+    )
+
+
+def _get_call_lazy_reference(call: ast.Call) -> str | None:
+    if any(isinstance(arg, ast.Starred) for arg in call.args) or any(kw.arg is None for kw in call.keywords):
+        # `*args` or `**kwargs`
+        return None
+    arguments = dict(zip(("app_label", "model_name"), call.args, strict=False))
+    arguments.update((kw.arg, kw.value) for kw in call.keywords if kw.arg is not None)
+
+    values = {}
+    for name in ("app_label", "model_name"):
+        arg = arguments.get(name)
+        if arg is None:
+            continue
+        if not (isinstance(arg, ast.Constant) and isinstance(arg.value, str)):
+            return None
+        values[name] = arg.value
+
+    if "app_label" not in values:
+        return None
+    if "model_name" not in values:
+        # Shortcut form: `app_label` is already "<app_label>.<model_name>".
+        return values["app_label"]
+    return f"{values['app_label']}.{values['model_name']}"
+
+
+def collect_get_model_lazy_references(path: str) -> set[str] | None:
+    """Collect the `<app_label>.<model_name>` references of all `get_model()` calls in a source file.
+
+    Names aren't resolved at this point, so any `get_model` counts. Returns `None` when a call or
+    reference can't be resolved statically, it may then return any model.
+    """
+    try:
+        with open(path, "rb") as f:
+            source = f.read()
+    except OSError:
+        return None
+    if b"get_model" not in source:
+        return set()
+
+    collector = _GetModelCallCollector()
+    try:
+        collector.visit(ast.parse(source, path))
+    except (SyntaxError, ValueError):
+        return None
+    if collector.has_dynamic_reference:
+        return None
+    return collector.lazy_references
@@ -30,6 +30,8 @@ if TYPE_CHECKING:
     from mypy.plugin import AttributeContext, ClassDefContext, DynamicClassDefContext
     from mypy.semanal import SemanticAnalyzer
 
+    from mypy_django_plugin.django.context import DjangoContext
+
 MANAGER_METHODS_RETURNING_QUERYSET: Final = frozenset(
     (
         "alias",
@@ -57,10 +59,12 @@ MANAGER_METHODS_RETURNING_QUERYSET: Final = frozenset(
 
 
 def get_method_type_from_dynamic_manager(
-    api: TypeChecker, method_name: str, manager_instance: Instance
+    api: TypeChecker, method_name: str, manager_instance: Instance, django_context: DjangoContext
 ) -> ProperType | None:
     """
     Attempt to resolve a method on a manager that was built from '.from_queryset'
+
+    The method is resolved once per manager, method name and type arguments of the manager in a build.
     """
 
     manager_type_info = manager_instance.type.get_containing_type_info(method_name)
@@ -78,6 +82,14 @@ def get_method_type_from_dynamic_manager(
     queryset_info = helpers.lookup_fully_qualified_typeinfo(api, queryset_fullname)
     assert queryset_info is not None
 
+    return django_context.get_manager_method_type(
+        manager_instance, method_name, lambda: _resolve_queryset_method(method_name, manager_instance, queryset_info)
+    )
+
+
+def _resolve_queryset_method(
+    method_name: str, manager_instance: Instance, queryset_info: TypeInfo
+) -> ProperType | None:
     manager_model = get_proper_type(find_member("model", manager_instance, manager_instance))
     assert isinstance(manager_model, TypeType), manager_model
 
@@ -104,13 +116,15 @@ def _get_funcdef_type(definition: Node | None) -> ProperType | None:
     return None
 
 
-def resolve_manager_method_from_instance(instance: Instance, method_name: str, ctx: AttributeContext) -> MypyType:
+def resolve_manager_method_from_instance(
+    instance: Instance, method_name: str, ctx: AttributeContext, django_context: DjangoContext
+) -> MypyType:
     api = helpers.get_typechecker_api(ctx)
-    method_type = get_method_type_from_dynamic_manager(api, method_name, instance)
+    method_type = get_method_type_from_dynamic_manager(api, method_name, instance, django_context)
     return method_type if method_type is not None else ctx.default_attr_type
 
 
-def resolve_manager_method(ctx: AttributeContext) -> MypyType:
+def resolve_manager_method(ctx: AttributeContext, django_context: DjangoContext) -> MypyType:
     """
     A 'get_attribute_hook' that is intended to be invoked whenever the TypeChecker encounters
     an attribute on a class that has 'django.db.models.BaseManager' as a base.
@@ -133,10 +147,14 @@ def resolve_manager_method(ctx: AttributeContext) -> MypyType:
         return AnyType(TypeOfAny.from_error)
 
     if isinstance(ctx.type, Instance):
-        return resolve_manager_method_from_instance(instance=ctx.type, method_name=method_name, ctx=ctx)
+        return resolve_manager_method_from_instance(
+            instance=ctx.type, method_name=method_name, ctx=ctx, django_context=django_context
+        )
     if isinstance(ctx.type, UnionType) and all(isinstance(get_proper_type(item), Instance) for item in ctx.type.items):
         resolved = tuple(
-            resolve_manager_method_from_instance(instance=instance, method_name=method_name, ctx=ctx)
+            resolve_manager_method_from_instance(
+                instance=instance, method_name=method_name, ctx=ctx, django_context=django_context
+            )
             for item in ctx.type.items
             if isinstance((instance := get_proper_type(item)), Instance)
         )
@@ -33,7 +33,7 @@ def return_proper_field_type_from_get_field(ctx: MethodContext, django_context:
 
     try:
         field = django_model.cls._meta.get_field(field_name)
-        if field_info := helpers.lookup_class_typeinfo(helpers.get_typechecker_api(ctx), field.__class__):
+        if field_info := django_context.lookup_class_typeinfo(helpers.get_typechecker_api(ctx), field.__class__):
             return Instance(field_info, [])
     except FieldDoesNotExist as e:
         ctx.api.fail(str(e), ctx.context)
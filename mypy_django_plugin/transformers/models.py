@@ -2,12 +2,13 @@ from __future__ import annotations
 
 from collections import deque
 from functools import cached_property
-from typing import TYPE_CHECKING, Any, cast
+from typing import TYPE_CHECKING, Any, ClassVar, cast
 
 from django.db.models.fields import DateField, DateTimeField, Field
 from django.db.models.fields.reverse_related import ForeignObjectRel, ManyToManyRel, OneToOneRel
 from mypy.nodes import (
     ARG_STAR2,
+    GDEF,
     MDEF,
     Argument,
     AssignmentStmt,
@@ -23,11 +24,23 @@ from mypy.nodes import (
 )
 from mypy.plugins import common
 from mypy.semanal import SemanticAnalyzer
+from mypy.server.trigger import make_trigger
 from mypy.typeanal import TypeAnalyser
-from mypy.types import AnyType, Instance, ProperType, TypedDictType, TypeOfAny, TypeType, TypeVarType, get_proper_type
+from mypy.types import (
+    AnyType,
+    Instance,
+    LiteralType,
+    ProperType,
+    TypedDictType,
+    TypeOfAny,
+    TypeType,
+    TypeVarType,
+    get_proper_type,
+)
 from mypy.types import Type as MypyType
 from typing_extensions import override
 
+from mypy_django_plugin.django.context import model_fingerprint_name
 from mypy_django_plugin.errorcodes import MANAGER_MISSING
 from mypy_django_plugin.exceptions import UnregisteredModelError
 from mypy_django_plugin.lib import fullnames, helpers
@@ -43,6 +56,7 @@ if TYPE_CHECKING:
     from collections.abc import Iterable
 
     from django.db.models import Manager, Model
+    from django.db.models.fields.related import RelatedField
     from mypy.checker import TypeChecker
     from mypy.nodes import MypyFile
     from mypy.plugin import AnalyzeTypeContext, AttributeContext, ClassDefContext
@@ -53,6 +67,9 @@ if TYPE_CHECKING:
 
 class ModelClassInitializer:
     api: SemanticAnalyzer
+    # Whether the changes of a completed `run()` survive later semantic analysis passes of the model,
+    # in which case it's skipped on these passes
+    skip_when_completed: ClassVar[bool] = True
 
     def __init__(self, ctx: ClassDefContext, django_context: DjangoContext) -> None:
         self.api = cast("SemanticAnalyzer", ctx.api)
@@ -256,6 +273,9 @@ class InjectAnyAsBaseForNestedMeta(ModelClassInitializer):
     to get around incompatible Meta inner classes for different models.
     """
 
+    # The MRO of the nested Meta is recalculated whenever the model class body is analyzed again
+    skip_when_completed = False
+
     @override
     def run(self) -> None:
         meta_node = helpers.get_nested_meta_node_for_current_class(self.model_classdef.info)
@@ -681,6 +701,9 @@ class ProcessManyToManyFields(ModelClassInitializer):
           makes sense to add it when processing ManyToManyField
     """
 
+    # Fields whose 'ManyToManyField(...)' call isn't resolved yet are skipped without deferring
+    skip_when_completed = False
+
     def statements(self) -> Iterable[Statement]:
         """
         Returns class body statements from the current model and any of its bases that
@@ -771,7 +794,7 @@ class ProcessManyToManyFields(ModelClassInitializer):
 
     @cached_property
     def default_pk_instance(self) -> Instance:
-        default_pk_field = self.lookup_typeinfo(self.django_context.settings.DEFAULT_AUTO_FIELD)
+        default_pk_field = self.lookup_typeinfo(self.django_context.settings_snapshot.default_auto_field)
         if default_pk_field is None:
             raise helpers.IncompleteDefnException()
         return Instance(
@@ -987,6 +1010,69 @@ class ProcessManyToManyFields(ModelClassInitializer):
         )
 
 
+class AddRelatedModelDependencies(ModelClassInitializer):
+    """
+    Registers fine-grained dependencies between the model and the models on the other side of
+    its relations, for the daemon to reprocess the affected models after an edit.
+
+    Attributes added from the Django runtime (related ids, reverse lookups, related managers)
+    depend on models mypy doesn't see referenced in the source, e.g. a `ForeignKey` pointing
+    at this model adds a reverse lookup to it.
+    """
+
+    @override
+    def run(self) -> None:
+        # Only the daemon, or a cache written for it, uses fine-grained dependencies
+        options = self.api.options
+        if options.fine_grained_incremental or options.cache_fine_grained:
+            # An edit of the settings changing the registry data of the model (including whether it's
+            # installed at all) reprocesses it, see `DjangoContext.model_fingerprints`
+            fingerprint_name = model_fingerprint_name(self.model_classdef.info.fullname)
+            for settings_module in self.django_context.settings_source_modules:
+                self.api.add_plugin_dependency(make_trigger(f"{settings_module}.{fingerprint_name}"))
+            super().run()
+
+    @override
+    def run_with_model_cls(self, model_cls: type[Model]) -> None:
+        model_fullname = self.model_classdef.info.fullname
+        fingerprint_name = model_fingerprint_name(model_fullname)
+        for settings_module in self.django_context.settings_source_modules:
+            settings_file = self.api.modules.get(settings_module)
+            # On a cold start the settings module is parsed before `str` exists for the fingerprints
+            if settings_file is not None and fingerprint_name not in settings_file.names:
+                add_model_fingerprints(settings_file, self.django_context, self.api.named_type("builtins.str"))
+
+        field_index = self.django_context.get_model_field_index(model_cls)
+        for field in field_index.related_fields:
+            related_model_cls = self._get_related_model_cls(field)
+            if related_model_cls is None:
+                continue
+            # An edit of the related model reprocesses this model
+            self.api.add_plugin_dependency(make_trigger(helpers.get_class_fullname(related_model_cls)))
+            # Adding, removing or retyping the field reprocesses the related model. Mypy only triggers the
+            # member that changed, and merges these dependencies before propagating it: this covers new fields.
+            self.api.add_plugin_dependency(
+                make_trigger(f"{model_fullname}.{field.name}"), target=related_model_cls.__module__
+            )
+        for relation in field_index.relations:
+            related_model_cls = self._get_related_model_cls(relation)
+            if related_model_cls is None:
+                continue
+            related_model_fullname = helpers.get_class_fullname(related_model_cls)
+            self.api.add_plugin_dependency(make_trigger(related_model_fullname))
+            self.api.add_plugin_dependency(make_trigger(f"{related_model_fullname}.{relation.field.name}"))
+
+    def _get_related_model_cls(self, field: RelatedField[Any, Any] | ForeignObjectRel) -> type[Model] | None:
+        try:
+            related_model_cls = self.django_context.get_field_related_model_cls(field)
+        except UnregisteredModelError:
+            return None
+        if helpers.get_class_fullname(related_model_cls) == self.model_classdef.info.fullname:
+            # Edits of the model reprocess its own module anyway
+            return None
+        return related_model_cls
+
+
 class MetaclassAdjustments(ModelClassInitializer):
     @classmethod
     def adjust_model_class(cls, ctx: ClassDefContext, plugin_config: DjangoPluginConfig) -> None:
@@ -1082,6 +1168,19 @@ class MetaclassAdjustments(ModelClassInitializer):
         self.add_exception_classes()
 
 
+def add_model_fingerprints(file: MypyFile, django_context: DjangoContext, str_type: Instance) -> None:
+    """Add a private symbol per model to a settings module, holding the fingerprint of the model.
+
+    Mypy compares the symbols of a reprocessed module to trigger what depends on the changed ones: an edit
+    of the settings changing the registry data of a model reprocesses it, see `AddRelatedModelDependencies`.
+    """
+    for model_fullname, fingerprint in django_context.model_fingerprints().items():
+        name = model_fingerprint_name(model_fullname)
+        var = Var(name, LiteralType(fingerprint, fallback=str_type))
+        var._fullname = f"{file.fullname}.{name}"
+        file.names[name] = SymbolTableNode(GDEF, var, module_public=False, plugin_generated=True)
+
+
 def process_model_class(ctx: ClassDefContext, django_context: DjangoContext) -> None:
     initializers = [
         AddAnnotateUtilities,
@@ -1095,13 +1194,21 @@ def process_model_class(ctx: ClassDefContext, django_context: DjangoContext) ->
         AddExtraFieldMethods,
         ProcessManyToManyFields,
         MetaclassAdjustments,
+        AddRelatedModelDependencies,
     ]
+    # Every deferral of the model runs the initializers again, skip the ones that already completed
+    completed_initializers = helpers.get_django_metadata(ctx.cls.info).setdefault("completed_initializers", [])
     for initializer_cls in initializers:
+        if initializer_cls.__name__ in completed_initializers:
+            continue
         try:
             initializer_cls(ctx, django_context).run()
         except helpers.IncompleteDefnException:
             if not ctx.api.final_iteration:
                 ctx.api.defer()
+        else:
+            if initializer_cls.skip_when_completed:
+                completed_initializers.append(initializer_cls.__name__)
 
 
 def set_auth_user_model_boolean_fields(ctx: AttributeContext, django_context: DjangoContext) -> MypyType:
@@ -117,7 +117,7 @@ def get_field_type_from_lookup(
         lookup_field = django_context.get_primary_key_field(model_cls)
 
     api = helpers.get_typechecker_api(ctx)
-    model_info = helpers.lookup_class_typeinfo(api, model_cls)
+    model_info = django_context.lookup_class_typeinfo(api, model_cls)
     return django_context.get_field_get_type(api, model_info, lookup_field, method=method)
 
 
@@ -135,7 +135,7 @@ def get_values_list_row_type(
         return AnyType(TypeOfAny.from_error)
 
     typechecker_api = helpers.get_typechecker_api(ctx)
-    model_info = helpers.lookup_class_typeinfo(typechecker_api, model_cls)
+    model_info = django_context.lookup_class_typeinfo(typechecker_api, model_cls)
     if len(field_lookups) == 0:
         if flat:
             primary_key_field = django_context.get_primary_key_field(model_cls)
@@ -152,7 +152,7 @@ def get_values_list_row_type(
                 )
                 column_types[field.attname] = column_type
             column_types.update(annotation_types)
-            return helpers.make_oneoff_named_tuple(typechecker_api, "Row", column_types)
+            return django_context.make_row_type(typechecker_api, model_cls, column_types)
         # flat=False, named=False, all fields
         if annotation_types:
             return typechecker_api.named_generic_type("builtins.tuple", [AnyType(TypeOfAny.special_form)])
@@ -189,7 +189,7 @@ def get_values_list_row_type(
         assert len(column_types) == 1
         row_type = next(iter(column_types.values()))
     elif named:
-        row_type = helpers.make_oneoff_named_tuple(typechecker_api, "Row", column_types)
+        row_type = django_context.make_row_type(typechecker_api, model_cls, column_types)
     else:
         # Since there may have been repeated field lookups, we cannot just use column_types.values here.
         # This is not the case in named above, because Django will error if duplicate fields are requested.
@@ -414,6 +414,8 @@ def _extract_model_type_var_upper_bound(ctx: MethodContext) -> Instance | None:
 
 def _resolve_annotate_row_type(
     api: TypeChecker,
+    django_context: DjangoContext,
+    model_cls: type[Model] | None,
     default_return_type: Instance,
     annotated_model: ProperType,
     expression_types: dict[str, MypyType],
@@ -430,7 +432,8 @@ def _resolve_annotate_row_type(
         if original_row_type.partial_fallback.type.has_base("typing.NamedTuple"):
             # Rebuild the NamedTuple with existing fields + annotation fields.
             annotation_fields = {name: AnyType(TypeOfAny.from_omitted_generics) for name in expression_types}
-            return helpers.extend_oneoff_named_tuple(api, "Row", original_row_type, annotation_fields)
+            row_fields = {**helpers.get_oneoff_named_tuple_fields(original_row_type), **annotation_fields}
+            return django_context.make_row_type(api, model_cls, row_fields)
         return api.named_generic_type("builtins.tuple", [AnyType(TypeOfAny.from_omitted_generics)])
     if isinstance(original_row_type, Instance) and helpers.is_model_type(original_row_type.type):
         return annotated_model
@@ -453,7 +456,9 @@ def extract_proper_type_queryset_annotate(ctx: MethodContext, django_context: Dj
                 if expression_types:
                     fields_dict = helpers.make_typeddict(api, expression_types)
                     upper_annotated = get_annotated_type(api, upper_bound, fields_dict=fields_dict)
-                    row_type = _resolve_annotate_row_type(api, default_return_type, upper_annotated, expression_types)
+                    row_type = _resolve_annotate_row_type(
+                        api, django_context, None, default_return_type, upper_annotated, expression_types
+                    )
                     return default_return_type.copy_modified(args=[upper_annotated, row_type])
         return AnyType(TypeOfAny.from_omitted_generics)
 
@@ -482,7 +487,9 @@ def extract_proper_type_queryset_annotate(ctx: MethodContext, django_context: Dj
         fields_dict = helpers.make_typeddict(api, all_fields)
         annotated_type = get_annotated_type(api, django_model.typ, fields_dict=fields_dict)
 
-    row_type = _resolve_annotate_row_type(api, default_return_type, annotated_type, expression_types)
+    row_type = _resolve_annotate_row_type(
+        api, django_context, django_model.cls, default_return_type, annotated_type, expression_types
+    )
     return default_return_type.copy_modified(args=[annotated_type, row_type])
 
 
@@ -772,7 +779,7 @@ def check_valid_attr_value(
     if isinstance(ctx.type, Instance):
         selected_fields = _get_selected_fields_from_queryset_type(ctx.type)
         if selected_fields is not None:
-            model_field_names = {f.name for f in django_context.get_model_fields(model.cls)}
+            model_field_names = set(django_context.get_model_field_index(model.cls).fields_by_name)
             deselected_fields = model_field_names - selected_fields
             new_attr_names = new_attr_names or set()
             new_attr_names.update(selected_fields - model_field_names)
@@ -901,9 +908,12 @@ def check_conflicting_lookups(
     return is_conflicting_lookup
 
 
-def extract_prefetch_related_annotations(ctx: MethodContext, django_context: DjangoContext) -> MypyType:
+def extract_prefetch_related_annotations(
+    ctx: MethodContext, django_context: DjangoContext, *, validate_lookups: bool = True
+) -> MypyType:
     """
-    Extract annotated attributes via `prefetch_related(Prefetch(..., to_attr=...))`
+    Extract annotated attributes via `prefetch_related(Prefetch(..., to_attr=...))`, checking the
+    prefetched lookups when `validate_lookups` is set.
 
     See https://docs.djangoproject.com/en/stable/ref/models/querysets/#prefetch-objects
     """
@@ -929,7 +939,7 @@ def extract_prefetch_related_annotations(ctx: MethodContext, django_context: Dja
             # Handle plain string lookups (not Prefetch instances)
             lookup = helpers.get_literal_str_type(typ)
             queryset_type = None
-            if lookup is not None:
+            if lookup is not None and validate_lookups:
                 check_valid_prefetch_related_lookup(ctx, lookup, qs_model, django_context)
                 check_conflicting_lookups(ctx, lookup, qs_types, queryset_type)
                 qs_types[lookup] = queryset_type
@@ -953,7 +963,7 @@ def extract_prefetch_related_annotations(ctx: MethodContext, django_context: Dja
         elif lookup:
             try:
                 observed_model_cls = django_context.resolve_lookup_into_field(qs_model.cls, lookup)[1]
-                if model_info := helpers.lookup_class_typeinfo(api, observed_model_cls):
+                if model_info := django_context.lookup_class_typeinfo(api, observed_model_cls):
                     elem_model = Instance(model_info, [])
             except (FieldError, LookupsAreUnsupported):
                 pass
@@ -972,7 +982,7 @@ def extract_prefetch_related_annotations(ctx: MethodContext, django_context: Dja
                 [elem_model if elem_model is not None else AnyType(TypeOfAny.special_form)],
             )
             qs_types[to_attr] = queryset_type
-        if not to_attr and lookup:
+        if not to_attr and lookup and validate_lookups:
             check_valid_prefetch_related_lookup(
                 ctx,
                 lookup,
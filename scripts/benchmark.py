@@ -0,0 +1,236 @@
+"""Measure how the mypy plugin scales with the size of a Django project.
+
+Generates a synthetic project (apps, models, relations, custom managers and ORM calls), then runs
+mypy on it with a cold cache, with a warm cache and after editing a single module, recording for
+each run the wall time, the peak RSS, the size of the mypy cache and the plugin hook calls.
+
+Run this script with `python scripts/benchmark.py --apps 20 --models 10`, see `--help` for all knobs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+from pathlib import Path
+from typing import Any, NamedTuple
+
+PROFILE_PREFIX = "django_stubs_profile."
+
+
+class ProjectShape(NamedTuple):
+    apps: int
+    models: int
+    fk_fanout: int
+    m2m_fanout: int
+    managers: bool
+    orm_calls: int
+
+    def labels(self) -> list[tuple[int, int]]:
+        return [(app, model) for app in range(self.apps) for model in range(self.models)]
+
+
+class RunResult(NamedTuple):
+    name: str
+    exit_code: int
+    wall_seconds: float
+    max_rss_mb: float
+    cache_size_mb: float
+    hooks: dict[str, Any]
+
+
+def _model_name(model: int) -> str:
+    return f"Model{model}"
+
+
+def _related_models(shape: ProjectShape, app: int, model: int, fanout: int, offset: int) -> list[tuple[int, int]]:
+    """Models defined before this one, spread across apps so relations cross app boundaries."""
+    labels = shape.labels()
+    index = labels.index((app, model))
+    return [labels[index - step * offset] for step in range(1, fanout + 1) if index - step * offset >= 0]
+
+
+def _models_module(shape: ProjectShape, app: int) -> str:
+    lines = ["from django.db import models", ""]
+    for model in range(shape.models):
+        name = _model_name(model)
+        if shape.managers:
+            lines += [
+                f"class {name}QuerySet(models.QuerySet['{name}']):",
+                f"    def named(self, name: str) -> '{name}QuerySet':",
+                "        return self.filter(name=name)",
+                "",
+                f"{name}Manager = models.Manager.from_queryset({name}QuerySet)",
+                "",
+            ]
+        lines += [
+            f"class {name}(models.Model):",
+            "    name = models.CharField(max_length=100)",
+            "    created = models.DateTimeField(auto_now_add=True)",
+            "    score = models.IntegerField(null=True)",
+        ]
+        for i, (related_app, related_model) in enumerate(_related_models(shape, app, model, shape.fk_fanout, 1)):
+            lines.append(
+                f"    fk{i} = models.ForeignKey('app{related_app}.{_model_name(related_model)}',"
+                f" on_delete=models.CASCADE, related_name='app{app}_{name.lower()}_fk{i}')"
+            )
+        for i, (related_app, related_model) in enumerate(_related_models(shape, app, model, shape.m2m_fanout, 2)):
+            lines.append(
+                f"    m2m{i} = models.ManyToManyField('app{related_app}.{_model_name(related_model)}',"
+                f" related_name='app{app}_{name.lower()}_m2m{i}')"
+            )
+        if shape.managers:
+            lines.append(f"    objects = {name}Manager()")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _services_module(shape: ProjectShape, app: int) -> str:
+    lines = [
+        "from django.db.models import Count",
+        "",
+        f"from app{app}.models import {', '.join(_model_name(model) for model in range(shape.models))}",
+        "",
+    ]
+    for model in range(shape.models):
+        name = _model_name(model)
+        has_fk = bool(_related_models(shape, app, model, shape.fk_fanout, 1))
+        calls = [
+            f"{name}.objects.filter(name='x', score__gte=1).exclude(created__isnull=True).first()",
+            f"{name}.objects.values_list('id', 'name', named=True).get(pk=1)",
+            f"{name}.objects.values('name', 'score').first()",
+            f"{name}(name='x', score=1)",
+            f"{name}.objects.annotate(n=Count('id')).order_by('-n')",
+        ]
+        if has_fk:
+            calls += [f"{name}.objects.select_related('fk0').filter(fk0__name='x')"]
+        if shape.managers:
+            calls += [f"{name}.objects.named('x').filter(name='y')"]
+        lines.append(f"def use_{name.lower()}() -> None:")
+        lines += [f"    {calls[i % len(calls)]}" for i in range(shape.orm_calls)] or ["    pass"]
+        lines.append("")
+    return "\n".join(lines)
+
+
+def generate_project(root: Path, shape: ProjectShape) -> None:
+    installed_apps = ", ".join(repr(f"app{app}") for app in range(shape.apps))
+    (root / "settings.py").write_text(
+        textwrap.dedent(f"""\
+            SECRET_KEY = "1"
+            INSTALLED_APPS = ["django.contrib.contenttypes", "django.contrib.auth", {installed_apps}]
+            """)
+    )
+    (root / "mypy.ini").write_text(
+        textwrap.dedent("""\
+            [mypy]
+            plugins = mypy_django_plugin.main
+            cache_dir = .mypy_cache
+
+            [mypy.plugins.django-stubs]
+            django_settings_module = settings
+            """)
+    )
+    for app in range(shape.apps):
+        app_dir = root / f"app{app}"
+        app_dir.mkdir()
+        (app_dir / "__init__.py").write_text("")
+        (app_dir / "models.py").write_text(_models_module(shape, app))
+        (app_dir / "services.py").write_text(_services_module(shape, app))
+
+
+def _directory_size(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def run_mypy(root: Path, name: str, mypy_args: list[str]) -> RunResult:
+    profile_dir = root / ".profiles" / name
+    env = {**os.environ, "DJANGO_STUBS_PROFILE_DIR": str(profile_dir)}
+    args = [sys.executable, "-m", "mypy", *mypy_args, "."]
+
+    started = time.perf_counter()
+    process = subprocess.Popen(args, cwd=root, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    assert process.stdout is not None
+    output = process.stdout.read()
+    _, status, rusage = os.wait4(process.pid, 0)
+    wall_seconds = time.perf_counter() - started
+    exit_code = os.waitstatus_to_exitcode(status)
+    if exit_code not in (0, 1):
+        # 1 means type errors were found, anything else is a crash
+        sys.stderr.write(output.decode())
+
+    hooks: dict[str, Any] = {}
+    for profile in profile_dir.glob(f"{PROFILE_PREFIX}*.json"):
+        hooks = json.loads(profile.read_text())["hooks"]
+
+    return RunResult(
+        name=name,
+        exit_code=exit_code,
+        wall_seconds=round(wall_seconds, 3),
+        # `ru_maxrss` is in kilobytes on Linux
+        max_rss_mb=round(rusage.ru_maxrss / 1024, 1),
+        cache_size_mb=round(_directory_size(root / ".mypy_cache") / 1024 / 1024, 2),
+        hooks=hooks,
+    )
+
+
+def benchmark(root: Path, shape: ProjectShape, mypy_args: list[str]) -> list[RunResult]:
+    generate_project(root, shape)
+    results = [run_mypy(root, "cold", mypy_args), run_mypy(root, "warm", mypy_args)]
+
+    # A change in a single non-model module
+    with (root / "app0" / "services.py").open("a") as f:
+        f.write("\n\ndef added() -> None:\n    pass\n")
+    results.append(run_mypy(root, "one_module_changed", mypy_args))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", type=int, default=5, help="number of Django apps")
+    parser.add_argument("--models", type=int, default=5, help="number of models per app")
+    parser.add_argument("--fk-fanout", type=int, default=2, help="foreign keys per model")
+    parser.add_argument("--m2m-fanout", type=int, default=1, help="many to many fields per model")
+    parser.add_argument("--no-managers", action="store_true", help="skip the `from_queryset` custom managers")
+    parser.add_argument("--orm-calls", type=int, default=10, help="ORM calls per model in the services modules")
+    parser.add_argument("--keep", type=Path, help="generate the project in this (new) directory and keep it")
+    parser.add_argument("--output", type=Path, help="write the JSON results to this file instead of stdout")
+    parser.add_argument("mypy_args", nargs="*", help="extra mypy arguments, after `--`")
+    args = parser.parse_args()
+
+    shape = ProjectShape(
+        apps=args.apps,
+        models=args.models,
+        fk_fanout=args.fk_fanout,
+        m2m_fanout=args.m2m_fanout,
+        managers=not args.no_managers,
+        orm_calls=args.orm_calls,
+    )
+    if args.keep is not None:
+        args.keep.mkdir(parents=True)
+        root = args.keep
+    else:
+        root = Path(tempfile.mkdtemp(prefix="django_stubs_benchmark_"))
+    try:
+        results = benchmark(root, shape, args.mypy_args)
+    finally:
+        if args.keep is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+    report = json.dumps(
+        {"shape": shape._asdict(), "runs": [result._asdict() for result in results]},
+        indent=2,
+    )
+    if args.output is not None:
+        args.output.write_text(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""Type check the yml cases sharing their settings in a single mypy run.
+
+Enabled with `--mypy-batch`: instead of running mypy (and setting up Django) once per case, the first case of a
+batch to run type checks the files of every case of the batch, and the output is split back by case. The modules
+and apps of a case get the `_case<n>` suffix, e.g. `myapp` becomes `myapp_case3`, and are installed together.
+
+A case that doesn't pass in its batch runs on its own, reporting the same results as without batching. But the
+cases of a batch share the apps that aren't theirs, e.g. the relations of every case to `auth.User` are on the
+same class: a case relying on the relations of another one may pass only in its batch. So a batched run that
+passes isn't authoritative, only a run without `--mypy-batch` is.
+
+Each batch runs mypy in a subprocess, as `pytest-mypy-plugins` does for a case: the plugin sets up Django once per
+process, and the apps of a batch can't be installed in the process of the tests.
+
+With pytest-xdist, use `--dist loadgroup` to keep the cases of a batch on the same worker.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+import pytest
+from pytest_mypy_plugins import utils
+from pytest_mypy_plugins.item import MypyExecutor, ReturnCodes, YamlTestItem, replace_fpath_with_module_name
+from pytest_mypy_plugins.utils import TypecheckAssertionError, assert_expected_matched_actual
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+# Test data that differs between the cases of a batch
+PER_CASE_KEYS = frozenset({"__line__", "case", "main", "files", "out", "regex", "expect_fail", "parametrized", "skip"})
+
+# The path of a file renamed for a batch, in the output
+CASE_PATH_RE = re.compile(r"\w+_case(\d+)(?=[/:])")
+
+_batch_stats_key = pytest.StashKey["BatchStats"]()
+
+
+class BatchStats:
+    __slots__ = ("batched_cases", "batches", "cases_run_on_their_own")
+
+    def __init__(self) -> None:
+        self.batches = 0
+        self.batched_cases = 0
+        self.cases_run_on_their_own = 0
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--mypy-batch",
+        action="store_true",
+        help=(
+            "type check the yml cases sharing their settings in a single mypy run. Only the failures are "
+            "authoritative: a case may pass in its batch thanks to the apps of the other cases, run without this "
+            "option to confirm that the cases pass"
+        ),
+    )
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]) -> None:
+    if not config.option.mypy_batch:
+        return
+
+    stats = config.stash[_batch_stats_key] = BatchStats()
+    batches: dict[str, list[YamlTestItem]] = {}
+    for item in items:
+        if isinstance(item, YamlTestItem) and (key := _batch_key(item)) is not None:
+            batches.setdefault(key, []).append(item)
+
+    for key, batch_items in batches.items():
+        if len(batch_items) < 2:
+            continue
+        batch = Batch(batch_items)
+        stats.batches += 1
+        stats.batched_cases += len(batch_items)
+        for item in batch_items:
+            item.add_marker(pytest.mark.xdist_group(f"mypy-batch-{key}"))
+            setattr(item, "runtest", partial(_run_batched, item, batch, item.runtest))  # noqa: B010
+
+
+def pytest_terminal_summary(terminalreporter: pytest.TerminalReporter, config: pytest.Config) -> None:
+    if not config.option.mypy_batch:
+        return
+    # Not collected by the controller with pytest-xdist
+    stats = config.stash.get(_batch_stats_key, None)
+    if stats is not None:
+        message = f"mypy batches: {stats.batched_cases} cases in {stats.batches} batches"
+        if not hasattr(config, "workerinput"):
+            # Counted by the workers with pytest-xdist
+            message += f", {stats.cases_run_on_their_own} ran on their own"
+        terminalreporter.write_line(message)
+    terminalreporter.write_line(
+        "mypy batches: cases may pass only thanks to the other cases of their batch, "
+        "run without --mypy-batch to confirm they pass",
+        yellow=True,
+    )
+
+
+def _local_apps(item: YamlTestItem) -> set[str] | None:
+    """The installed apps defined by the files of the case, `None` when it has other modules."""
+    installed_apps = {app.partition(".")[0] for app in item.parsed_test_data.get("installed_apps") or ()}
+    local_apps = {Path(file.path).parts[0].removesuffix(".py") for file in item.files[1:]}
+    return local_apps if local_apps <= installed_apps else None
+
+
+def _batch_key(item: YamlTestItem) -> str | None:
+    """The cases with the same key only differ by their own files (and apps) and expected output."""
+    if not item.files or item.files[0].path != "main.py" or (local_apps := _local_apps(item)) is None:
+        return None
+    shared_data = {key: value for key, value in item.parsed_test_data.items() if key not in PER_CASE_KEYS}
+    shared_config = f"{shared_data.get('custom_settings', '')}{item.additional_mypy_config}"
+    if any(re.search(rf"\b{app}\b", shared_config) for app in local_apps):
+        # Can't be renamed for each case
+        return None
+    key = json.dumps(
+        [shared_data, item.additional_mypy_config, item.environment_variables, item.disable_cache],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()[:10]
+
+
+def _run_batched(item: YamlTestItem, batch: Batch, runtest: Callable[[], None]) -> None:
+    output = batch.output_of(item)
+    if output is None or not _passes(item, output):
+        # Reports the failure as when running the case on its own, and rules out interferences with other cases
+        item.config.stash[_batch_stats_key].cases_run_on_their_own += 1
+        runtest()
+
+
+def _passes(item: YamlTestItem, output: list[str]) -> bool:
+    try:
+        assert_expected_matched_actual(expected=item.expected_output, actual=output)
+    except TypecheckAssertionError:
+        return item.expect_fail
+    return not item.expect_fail
+
+
+class BatchedCase(NamedTuple):
+    item: YamlTestItem
+    number: int
+    # Top level modules of the case, renamed in the batch
+    modules: tuple[str, ...]
+
+    def rename(self, module: str) -> str:
+        return f"{module}_case{self.number}"
+
+    def rename_references(self, source: str) -> str:
+        """Point the imports and app labels of the case's sources to its renamed modules."""
+        for module in self.modules:
+            # Not preceded by a dot, to leave attributes alone, e.g. a `first` app and `.first()`
+            source = re.sub(rf"(?<![.\w]){module}\b", self.rename(module), source)
+        return source
+
+    def renamed_files(self) -> Iterator[tuple[str, str]]:
+        main_file, *files = self.item.files
+        yield f"{self.rename('main')}.py", self.rename_references(main_file.content)
+        for file in files:
+            top_level, _, path = file.path.partition("/")
+            renamed_path = self.rename(top_level.removesuffix(".py")) + (f"/{path}" if path else ".py")
+            yield renamed_path, self.rename_references(file.content)
+
+    def restore_names(self, line: str) -> str:
+        for module in (*self.modules, "main"):
+            line = re.sub(rf"\b{self.rename(module)}\b", module, line)
+        return line
+
+
+class Batch:
+    """Cases type checked together, see `_batch_key`."""
+
+    __slots__ = ("cases", "outputs")
+
+    def __init__(self, items: list[YamlTestItem]) -> None:
+        self.cases = [
+            BatchedCase(item, number, tuple(sorted(_local_apps(item) or ()))) for number, item in enumerate(items)
+        ]
+        # The output of each case by node id, `None` until the batch ran
+        self.outputs: dict[str, list[str]] | None = None
+
+    def output_of(self, item: YamlTestItem) -> list[str] | None:
+        """The output of the case, or `None` when the batch couldn't run."""
+        if self.outputs is None:
+            self.outputs = self._run_split(self.cases)
+        return self.outputs.get(item.nodeid)
+
+    def _run_split(self, cases: list[BatchedCase]) -> dict[str, list[str]]:
+        """Run the cases, in two halves when a case makes mypy crash, and so on."""
+        outputs = self._run(cases)
+        if outputs is None and len(cases) > 1:
+            half = len(cases) // 2
+            return {**self._run_split(cases[:half]), **self._run_split(cases[half:])}
+        return outputs or {}
+
+    @staticmethod
+    def _installed_apps(cases: list[BatchedCase], installed_apps: list[str]) -> list[str]:
+        """The installed apps of the cases, with a copy of the local apps for each case."""
+        batch_apps = []
+        for app in installed_apps:
+            module, dot, rest = app.partition(".")
+            cases_of_app = [case for case in cases if module in case.modules]
+            batch_apps += [f"{case.rename(module)}{dot}{rest}" for case in cases_of_app] if cases_of_app else [app]
+        return batch_apps
+
+    def _run(self, cases: list[BatchedCase]) -> dict[str, list[str]] | None:
+        first_item = cases[0].item
+        # Renamed before the extension hook adds its files to the first case
+        case_files = dict(file for case in cases for file in case.renamed_files())
+        case_files_count = len(first_item.files)
+        main_files = [f"{case.rename('main')}.py" for case in cases]
+        batch_data = {**first_item.parsed_test_data}
+        if installed_apps := batch_data.get("installed_apps"):
+            batch_data["installed_apps"] = self._installed_apps(cases, installed_apps)
+
+        with _extension_hook_applied(first_item, batch_data) as item:
+            temp_dir = tempfile.TemporaryDirectory(prefix="pytest-mypy-batch-", dir=item.root_directory)
+            execution_path = Path(temp_dir.name).absolute()
+            # Added by the extension hook, e.g. the settings module
+            shared_files = {file.path: file.content for file in item.files[case_files_count:]}
+            batch_files = {**shared_files, **case_files}
+            try:
+                with utils.cd(execution_path):
+                    for path, content in batch_files.items():
+                        _make_file(execution_path / path, content)
+                    return_code, (stdout, stderr) = self._execute(item, execution_path, main_files)
+                    if return_code == ReturnCodes.FATAL_ERROR:
+                        return None
+                    # The paths in the output are relative to the current directory
+                    return self._split_output(cases, stdout + stderr, execution_path)
+            finally:
+                temp_dir.cleanup()
+                if not item.disable_cache:
+                    for path in batch_files:
+                        item.remove_cache_files(Path(path).with_suffix(""))
+
+    def _execute(self, item: YamlTestItem, execution_path: Path, main_files: list[str]) -> tuple[int, tuple[str, str]]:
+        mypy_executable = shutil.which("mypy")
+        assert mypy_executable is not None, "mypy executable is not found"
+        executor = MypyExecutor(
+            same_process=item.same_process,
+            execution_path=execution_path,
+            rootdir=getattr(getattr(item.parent, "config", None), "rootdir", None),
+            environment_variables=dict(item.environment_variables),
+            mypy_executable=mypy_executable,
+            modify_pythonpath=item.modify_pythonpath,
+        )
+        # Same options as `pytest_mypy_plugins.item.Runner`
+        options = ["--show-traceback", "--no-error-summary", "--no-pretty", "--hide-error-context"]
+        if item.no_silence_site_packages:
+            options.append("--no-silence-site-packages")
+        if not item.disable_cache:
+            options.extend(["--cache-dir", item.incremental_cache_dir])
+        if (config_file := item.prepare_config_file(execution_path)) is not None:
+            options.append(f"--config-file={config_file}")
+        return executor.execute([*options, *main_files])
+
+    @staticmethod
+    def _split_output(cases: list[BatchedCase], mypy_output: str, execution_path: Path) -> dict[str, list[str]]:
+        outputs: dict[str, list[str]] = {case.item.nodeid: [] for case in cases}
+        cases_by_number = {case.number: case for case in cases}
+        for line in mypy_output.splitlines():
+            line = replace_fpath_with_module_name(line, rootdir=execution_path)
+            match = CASE_PATH_RE.match(line)
+            if match is None:
+                # Output for the shared files belongs to every case
+                for output in outputs.values():
+                    output.append(line)
+            else:
+                case = cases_by_number[int(match.group(1))]
+                outputs[case.item.nodeid].append(case.restore_names(line))
+        return outputs
+
+
+@contextmanager
+def _extension_hook_applied(item: YamlTestItem, parsed_test_data: dict[str, Any]) -> Iterator[YamlTestItem]:
+    """Apply the extension hook to `item` with the data of the batch, restoring it for a run of the case on its own."""
+    saved = (item.parsed_test_data, list(item.files), item.additional_mypy_config, item.incremental_cache_dir)
+    item.parsed_test_data = parsed_test_data
+    try:
+        if item.config.option.mypy_extension_hook is not None:
+            item.execute_extension_hook()
+        yield item
+    finally:
+        item.parsed_test_data, item.files, item.additional_mypy_config, item.incremental_cache_dir = saved
+
+
+def _make_file(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import textwrap
+from typing import TYPE_CHECKING
+
+import pytest
+
+from mypy_django_plugin.transformers.apps import collect_get_model_lazy_references
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+
+@pytest.fixture
+def collect(tmp_path: Path) -> Callable[[str], set[str] | None]:
+    def collect(source: str) -> set[str] | None:
+        path = tmp_path / "main.py"
+        path.write_text(textwrap.dedent(source))
+        return collect_get_model_lazy_references(str(path))
+
+    return collect
+
+
+def test_literal_get_model_calls_are_collected(collect: Callable[[str], set[str] | None]) -> None:
+    assert collect(
+        """
+        from django.apps import apps
+
+        def f() -> None:
+            apps.get_model("myapp.Book")
+            apps.get_model("otherapp", "Author")
+            apps.get_model(app_label="thirdapp", model_name="Review", require_ready=False)
+        """
+    ) == {"myapp.Book", "otherapp.Author", "thirdapp.Review"}
+
+
+def test_no_get_model_call(collect: Callable[[str], set[str] | None]) -> None:
+    assert collect("from django.apps import apps\napps.get_models()\n") == set()
+    assert collect("from django.apps import apps\napps.get_model('myapp.Book'\n") is None
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "apps.get_model(label)",
+        "apps.get_model('myapp', name)",
+        "apps.get_model(*args)",
+        "apps.get_app_config('myapp').get_model('Book')",
+        "get = apps.get_model",
+        "[apps.get_model('myapp.Book'), getattr(apps, 'x').get_model(f'myapp.{name}')]",
+    ],
+)
+def test_dynamic_get_model_references(collect: Callable[[str], set[str] | None], source: str) -> None:
+    assert collect(f"from django.apps import apps\n{source}\n") is None
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+SETTINGS = """\
+SECRET_KEY = '1'
+INSTALLED_APPS = ['django.contrib.contenttypes', 'django.contrib.auth', {apps}]
+"""
+
+MYPY_INI = """\
+[mypy]
+plugins = mypy_django_plugin.main
+
+[mypy.plugins.django-stubs]
+django_settings_module = mysettings
+"""
+
+QUERYSETS = """\
+from typing import TypeVar
+
+from django.db import models
+
+_M = TypeVar("_M", bound=models.Model)
+
+
+class BookQuerySet(models.QuerySet[_M]):
+    def active(self) -> {return_type}:
+        raise NotImplementedError
+"""
+
+MODELS = """\
+from django.db import models
+
+from shop.querysets import BookQuerySet
+
+
+class Book(models.Model):
+    objects = models.Manager.from_queryset(BookQuerySet)()
+"""
+
+MAIN = """\
+from shop.models import Book
+
+reveal_type(Book.objects.active())
+"""
+
+AUTHOR_MODELS = """\
+from django.db import models
+
+
+class Author(models.Model):
+    name = models.CharField(max_length=100)
+"""
+
+BOOK_MODELS = """\
+from django.db import models
+
+from shop.models import Author
+
+
+class Book(models.Model):
+{fields}
+"""
+
+BOOK_RELATIONS = """\
+    author = models.ForeignKey(Author, on_delete=models.CASCADE)
+    editor = models.ForeignKey(Author, on_delete=models.CASCADE, related_name="edited")
+"""
+
+RELATED_BOOKS = "django.db.models.fields.related_descriptors.RelatedManager[lib.models.Book]"
+
+BOOK_USAGE = """\
+from lib.models import Book
+from shop.models import Author
+
+author = Author()
+reveal_type(author.book_set)
+reveal_type(author.edited)
+reveal_type(Book.objects)
+"""
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Iterator[Path]:
+    (tmp_path / "mysettings.py").write_text(SETTINGS.format(apps="'shop'"))
+    (tmp_path / "shop").mkdir()
+    (tmp_path / "shop" / "__init__.py").write_text("")
+    (tmp_path / "shop" / "querysets.py").write_text(QUERYSETS.format(return_type="int"))
+    (tmp_path / "shop" / "models.py").write_text(MODELS)
+    (tmp_path / "main.py").write_text(MAIN)
+    (tmp_path / "mypy.ini").write_text(MYPY_INI)
+    yield tmp_path
+    dmypy(tmp_path, "kill")
+
+
+@pytest.fixture
+def two_apps_project(tmp_path: Path) -> Iterator[Path]:
+    """`lib.Book` has foreign keys to `shop.Author`"""
+    (tmp_path / "mysettings.py").write_text(SETTINGS.format(apps="'shop', 'lib'"))
+    for app in ("shop", "lib"):
+        (tmp_path / app).mkdir()
+        (tmp_path / app / "__init__.py").write_text("")
+    (tmp_path / "shop" / "models.py").write_text(AUTHOR_MODELS)
+    (tmp_path / "lib" / "models.py").write_text(BOOK_MODELS.format(fields=BOOK_RELATIONS))
+    (tmp_path / "main.py").write_text(BOOK_USAGE)
+    (tmp_path / "mypy.ini").write_text(MYPY_INI)
+    yield tmp_path
+    dmypy(tmp_path, "kill")
+
+
+def dmypy(project: Path, *args: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-m", "mypy.dmypy", "--status-file", str(project / ".dmypy.json"), *args],
+        cwd=project,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.removeprefix("Daemon started\n")
+
+
+def cold_mypy(project: Path) -> str:
+    result = subprocess.run(
+        [sys.executable, "-m", "mypy", "--no-incremental", "main.py"],
+        cwd=project,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout
+
+
+def test_daemon_resolves_edited_manager_methods_again(project: Path) -> None:
+    assert dmypy(project, "run", "--", "main.py").splitlines()[-2:] == [
+        'main.py:3: note: Revealed type is "int"',
+        "Success: no issues found in 1 source file",
+    ]
+
+    (project / "shop" / "querysets.py").write_text(QUERYSETS.format(return_type="str"))
+
+    assert dmypy(project, "run", "--", "main.py").splitlines()[-2:] == [
+        'main.py:3: note: Revealed type is "str"',
+        "Success: no issues found in 1 source file",
+    ]
+
+
+def test_daemon_checks_added_model_field(two_apps_project: Path) -> None:
+    (two_apps_project / "main.py").write_text("from shop.models import Author\n\nreveal_type(Author().title)\n")
+    assert dmypy(two_apps_project, "run", "--", "main.py").splitlines()[0] == (
+        'main.py:3: error: "Author" has no attribute "title"  [attr-defined]'
+    )
+
+    (two_apps_project / "shop" / "models.py").write_text(
+        AUTHOR_MODELS + "    title = models.CharField(max_length=100)\n"
+    )
+
+    output = dmypy(two_apps_project, "run", "--", "main.py")
+    assert output.splitlines() == [
+        'main.py:3: note: Revealed type is "str"',
+        "Success: no issues found in 1 source file",
+    ]
+    assert output == cold_mypy(two_apps_project)
+
+
+def test_daemon_checks_removed_cross_app_foreign_key(two_apps_project: Path) -> None:
+    assert dmypy(two_apps_project, "run", "--", "main.py").splitlines()[:2] == [
+        f'main.py:5: note: Revealed type is "{RELATED_BOOKS}"',
+        f'main.py:6: note: Revealed type is "{RELATED_BOOKS}"',
+    ]
+
+    (two_apps_project / "lib" / "models.py").write_text(
+        BOOK_MODELS.format(fields=BOOK_RELATIONS.splitlines()[1] + "\n")
+    )
+
+    output = dmypy(two_apps_project, "run", "--", "main.py")
+    assert output.splitlines()[:3:2] == [
+        'main.py:5: error: "Author" has no attribute "book_set"  [attr-defined]',
+        f'main.py:6: note: Revealed type is "{RELATED_BOOKS}"',
+    ]
+    assert output == cold_mypy(two_apps_project)
+
+
+def test_daemon_checks_changed_installed_apps(two_apps_project: Path) -> None:
+    assert dmypy(two_apps_project, "run", "--", "main.py").splitlines()[-1] == (
+        "Success: no issues found in 1 source file"
+    )
+
+    (two_apps_project / "mysettings.py").write_text(SETTINGS.format(apps="'shop'"))
+
+    output = dmypy(two_apps_project, "run", "--", "main.py")
+    assert [line for line in output.splitlines() if ": error: " in line] == [
+        'main.py:5: error: "Author" has no attribute "book_set"  [attr-defined]',
+        'main.py:6: error: "Author" has no attribute "edited"  [attr-defined]',
+        'main.py:7: error: "type[Book]" has no attribute "objects"  [attr-defined]',
+    ]
+    assert output == cold_mypy(two_apps_project)
+
+    (two_apps_project / "mysettings.py").write_text(SETTINGS.format(apps="'shop', 'lib'"))
+
+    assert dmypy(two_apps_project, "run", "--", "main.py").splitlines()[-1] == (
+        "Success: no issues found in 1 source file"
+    )
@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+from unittest import mock
+
+import pytest
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.sql.query import Query
+from mypy.nodes import GDEF, Block, ClassDef, MypyFile, SymbolTable, SymbolTableNode, TypeInfo
+from mypy.types import AnyType, Instance, TupleType, TypeOfAny
+
+from mypy_django_plugin.django.context import DjangoContext, _LookupStep
+from mypy_django_plugin.django.snapshot import digest_files
+from mypy_django_plugin.lib import helpers
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_django_is_initialized_lazily() -> None:
+    apps, settings = mock.Mock(), mock.Mock()
+    with (
+        mock.patch("mypy_django_plugin.django.context.initialize_settings", return_value=settings) as init_settings,
+        mock.patch("mypy_django_plugin.django.context.initialize_django", return_value=(apps, settings)) as init_django,
+    ):
+        django_context = DjangoContext("my.settings")
+        init_settings.assert_not_called()
+        init_django.assert_not_called()
+
+        assert django_context.settings is settings
+        init_settings.assert_called_once_with("my.settings", static=False)
+        init_django.assert_not_called()
+
+        assert django_context.apps_registry is apps
+        init_django.assert_called_once_with("my.settings", static_settings=False)
+
+
+def test_solved_lookups_are_memoized_and_bounded() -> None:
+    django_context = DjangoContext("my.settings")
+    model_cls: Any = object()
+    with (
+        mock.patch("mypy_django_plugin.django.context.LOOKUP_CACHE_SIZE", 2),
+        mock.patch.object(django_context, "_solve_lookup_type_uncached", return_value=None) as solve,
+    ):
+        for lookup in ("name", "name", "pk", "name", "id", "name"):
+            django_context.solve_lookup_type(model_cls, lookup)
+
+    # "name" is evicted by "id", being the oldest entry
+    assert [call.args[1] for call in solve.call_args_list] == ["name", "pk", "id", "name"]
+
+
+def test_lookups_walk_their_shared_relations_once() -> None:
+    django_context = DjangoContext("my.settings")
+    book, author, profile, country = (mock.Mock(**{"_meta.abstract": False}) for _ in range(4))
+    relations = {(book, "author"): author, (author, "profile"): profile, (profile, "country"): country}
+
+    def lookup_step(model_cls: Any, name: str) -> _LookupStep:
+        return _LookupStep(is_field=name != "icontains", related_model=relations.get((model_cls, name)))
+
+    with mock.patch.object(django_context, "_lookup_step_uncached", side_effect=lookup_step) as step:
+        for lookup in (
+            "author__profile__city",
+            "author__profile__country__code",
+            "author__name__icontains",
+            "author__profile__icontains",
+        ):
+            django_context.solve_lookup_type(book, lookup)
+
+    assert [call.args for call in step.call_args_list] == [
+        (book, "author"),
+        (author, "profile"),
+        (profile, "city"),
+        (profile, "country"),
+        (country, "code"),
+        (author, "name"),
+        (profile, "icontains"),
+    ]
+
+
+@pytest.fixture(scope="module")
+def real_django_context() -> DjangoContext:
+    """A context on the registry of the contrib apps, as set up by `test_generic_consistency`."""
+    django_context = DjangoContext("scripts.django_tests_settings")
+    assert django_context.apps_registry.ready
+    return django_context
+
+
+@pytest.mark.parametrize(
+    ("model_label", "lookup"),
+    [
+        ("auth.User", "pk"),
+        ("auth.User", "pk__in"),
+        ("auth.User", "username__icontains"),
+        ("auth.Group", "user__pk"),
+        # Attnames of foreign keys
+        ("auth.Permission", "content_type_id"),
+        ("auth.Permission", "content_type_id__in"),
+        ("admin.LogEntry", "user__logentry__content_type_id__gt"),
+        # Forward relations, ending with a lookup or a transform on the related model
+        ("auth.Permission", "content_type"),
+        ("auth.Permission", "content_type__isnull"),
+        ("auth.Permission", "content_type__app_label__startswith"),
+        ("admin.LogEntry", "user__date_joined__year__gte"),
+        # Reverse relations, by `related_query_name` or the model name
+        ("auth.Group", "user__username"),
+        ("auth.Permission", "user__email__iexact"),
+        ("auth.Permission", "group__name"),
+        ("auth.User", "logentry__action_time__date"),
+        ("contenttypes.ContentType", "permission__group__user__is_staff"),
+        # Many to many relations, and their through models
+        ("auth.User", "groups"),
+        ("auth.User", "groups__name__in"),
+        ("auth.User", "user_permissions__content_type__model"),
+        ("auth.User_groups", "user__username"),
+        ("auth.User_groups", "group_id"),
+        ("auth.Group_permissions", "permission__codename__contains"),
+        ("flatpages.FlatPage", "sites__domain__endswith"),
+    ],
+)
+def test_lookups_are_solved_as_django_does(real_django_context: DjangoContext, model_label: str, lookup: str) -> None:
+    model_cls = real_django_context.apps_registry.get_model(model_label)
+    lookup_parts, field_parts, expression = Query(model_cls).solve_lookup_type(lookup)
+    expected = (list(lookup_parts), list(field_parts), expression)
+
+    # Not left to Django
+    assert real_django_context._walk_lookup(model_cls, lookup.split(LOOKUP_SEP)) == expected
+    solved_lookup = real_django_context.solve_lookup_type(model_cls, lookup)
+    assert solved_lookup is not None
+    assert (list(solved_lookup[0]), list(solved_lookup[1]), solved_lookup[2]) == expected
+
+
+def test_expected_types_are_memoized_until_the_next_build() -> None:
+    django_context = DjangoContext("my.settings")
+    api: Any = mock.Mock(modules={})
+    model_cls: Any = object()
+    with (
+        mock.patch("mypy_django_plugin.lib.helpers.lookup_class_typeinfo", return_value=mock.Mock()),
+        mock.patch.object(django_context, "_get_expected_types_uncached", return_value=({}, True)) as compute,
+    ):
+        for method in ("__init__", "__init__", "create"):
+            django_context.get_expected_types(api, model_cls, method=method)
+        # The daemon reprocessed some modules
+        django_context.clear_type_caches()
+        django_context.get_expected_types(api, model_cls, method="__init__")
+
+    assert [call.kwargs["method"] for call in compute.call_args_list] == ["__init__", "create", "__init__"]
+
+
+def test_expected_types_are_not_memoized_before_model_is_checked() -> None:
+    django_context = DjangoContext("my.settings")
+    api: Any = mock.Mock(modules={})
+    model_cls: Any = object()
+    with (
+        mock.patch("mypy_django_plugin.lib.helpers.lookup_class_typeinfo", return_value=mock.Mock()),
+        mock.patch.object(django_context, "_get_expected_types_uncached", return_value=({}, False)) as compute,
+    ):
+        django_context.get_expected_types(api, model_cls, method="__init__")
+        django_context.get_expected_types(api, model_cls, method="__init__")
+
+    assert compute.call_count == 2
+
+
+def test_manager_methods_are_memoized_per_type_arguments_until_the_next_build() -> None:
+    django_context = DjangoContext("my.settings")
+    manager_info = mock.Mock(fullname="app.models.Manager")
+    book_manager = mock.Mock(type=manager_info, args=("Book",))
+    author_manager = mock.Mock(type=manager_info, args=("Author",))
+    resolve = mock.Mock(side_effect=lambda: mock.Mock())
+
+    for manager, method_name in (
+        (book_manager, "active"),
+        (book_manager, "active"),
+        (book_manager, "filter"),
+        (author_manager, "active"),
+        (author_manager, "active"),
+    ):
+        django_context.get_manager_method_type(manager, method_name, resolve)
+    assert resolve.call_count == 3
+
+    # The daemon reprocessed some modules
+    django_context.clear_type_caches()
+    django_context.get_manager_method_type(book_manager, "active", resolve)
+    assert resolve.call_count == 4
+
+
+def test_manager_methods_are_not_memoized_before_their_type_is_inferred() -> None:
+    django_context = DjangoContext("my.settings")
+    manager = mock.Mock(args=())
+    resolve = mock.Mock(return_value=AnyType(TypeOfAny.special_form))
+
+    django_context.get_manager_method_type(manager, "active", resolve)
+    django_context.get_manager_method_type(manager, "active", resolve)
+
+    assert resolve.call_count == 2
+
+
+def test_row_types_are_interned_per_module_and_model_until_the_next_build() -> None:
+    django_context = DjangoContext("my.settings")
+    api: Any = object()
+    book_cls: Any = object()
+    author_cls: Any = object()
+    module = MypyFile([], [])
+    module._fullname = "main"
+    module.names = SymbolTable()
+
+    def make_row(api: Any, name: str, fields: dict[str, Any]) -> TupleType:
+        info = TypeInfo(SymbolTable(), ClassDef(f"{name}{len(module.names)}", Block([])), module.fullname)
+        module.names[info.name] = SymbolTableNode(GDEF, info)
+        return TupleType(list(fields.values()), fallback=Instance(info, []))
+
+    fields = {"name": AnyType(TypeOfAny.explicit)}
+    with (
+        mock.patch("mypy_django_plugin.lib.helpers.get_current_module", return_value=module),
+        mock.patch("mypy_django_plugin.lib.helpers.make_oneoff_named_tuple", side_effect=make_row) as make,
+    ):
+        book_row = django_context.make_row_type(api, book_cls, fields).partial_fallback.type
+        assert django_context.make_row_type(api, book_cls, dict(fields)).partial_fallback.type is book_row
+        assert django_context.make_row_type(api, author_cls, fields).partial_fallback.type is not book_row
+        # The daemon reprocessed some modules
+        django_context.clear_type_caches()
+        assert django_context.make_row_type(api, book_cls, fields).partial_fallback.type is not book_row
+
+    assert make.call_count == 3
+
+
+class Model:
+    pass
+
+
+def make_module(fullname: str, *classes: TypeInfo) -> MypyFile:
+    module = MypyFile([], [])
+    module._fullname = fullname
+    module.names = SymbolTable({info.name: SymbolTableNode(GDEF, info) for info in classes})
+    return module
+
+
+def make_typeinfo(klass: type) -> TypeInfo:
+    info = TypeInfo(SymbolTable(), ClassDef(klass.__qualname__, Block([])), klass.__module__)
+    info._fullname = helpers.get_class_fullname(klass)
+    return info
+
+
+def test_class_typeinfo_lookups_are_memoized_until_the_next_build() -> None:
+    django_context = DjangoContext("my.settings")
+    info = make_typeinfo(Model)
+    modules = {__name__: make_module(__name__, info)}
+    api: Any = mock.Mock(modules=modules)
+    with mock.patch.object(helpers, "lookup_class_typeinfo", wraps=helpers.lookup_class_typeinfo) as lookup:
+        assert django_context.lookup_class_typeinfo(api, Model) is info
+        assert django_context.lookup_class_typeinfo(api, Model) is info
+        assert lookup.call_count == 1
+
+        # The daemon reprocessed the module, and removed the class
+        modules[__name__] = make_module(__name__)
+        django_context.clear_type_caches()
+        assert django_context.lookup_class_typeinfo(api, Model) is None
+        assert lookup.call_count == 2
+
+
+def test_class_typeinfos_of_deleted_modules_are_looked_up_again() -> None:
+    django_context = DjangoContext("my.settings")
+    info = make_typeinfo(Model)
+    modules = {__name__: make_module(__name__, info)}
+    api: Any = mock.Mock(modules=modules)
+    assert django_context.lookup_class_typeinfo(api, Model) is info
+
+    del modules[__name__]
+    assert django_context.lookup_class_typeinfo(api, Model) is None
+
+
+def test_class_typeinfo_lookup_misses_are_retried() -> None:
+    django_context = DjangoContext("my.settings")
+    module = make_module(__name__)
+    api: Any = mock.Mock(modules={__name__: module})
+    assert django_context.lookup_class_typeinfo(api, Model) is None
+
+    # The class gets analyzed after the first lookup
+    info = make_typeinfo(Model)
+    module.names[info.name] = SymbolTableNode(GDEF, info)
+    assert django_context.lookup_class_typeinfo(api, Model) is info
+
+
+def _watching_context(tmp_path: Path, *, model_modules: dict[str, Any]) -> tuple[DjangoContext, str]:
+    """A context populated from `tmp_path/models.py`, without setting up Django."""
+    source = tmp_path / "models.py"
+    source.write_text("class Book: ...\n")
+    django_context = DjangoContext("my.settings", watch_sources=True)
+    django_context.__dict__.update(apps_registry=mock.Mock(), model_modules=model_modules)
+    django_context._populated_sources = digest_files([str(source)])
+    return django_context, str(source)
+
+
+def test_unchanged_sources_are_not_refreshed(tmp_path: Path) -> None:
+    django_context, source = _watching_context(tmp_path, model_modules={})
+    with mock.patch.object(django_context, "_repopulate") as repopulate:
+        assert not django_context.refresh_changed_source(source)
+        assert not django_context.refresh_changed_source(str(tmp_path / "other.py"))
+    repopulate.assert_not_called()
+
+    django_context.watch_sources = False
+    (tmp_path / "models.py").write_text("class Author: ...\n")
+    assert not django_context.refresh_changed_source(source)
+
+
+def test_changed_model_module_is_reloaded(tmp_path: Path) -> None:
+    django_context, source = _watching_context(tmp_path, model_modules={"app.models": {}})
+    django_context._solved_lookups[mock.Mock(), "name"] = None
+    (tmp_path / "models.py").write_text("class Book:\n    title: str\n")
+    with (
+        mock.patch("mypy_django_plugin.django.context._module_file", return_value=source),
+        mock.patch("mypy_django_plugin.django.context._model_module_names", return_value=set()),
+        mock.patch("mypy_django_plugin.django.context.digest_source_files", return_value={}),
+        mock.patch.object(django_context, "_reload_model_module") as reload_model_module,
+        mock.patch.object(django_context, "_repopulate") as repopulate,
+    ):
+        assert django_context.refresh_changed_source(source)
+
+    reload_model_module.assert_called_once_with("app.models")
+    repopulate.assert_not_called()
+    assert not django_context._solved_lookups
+    assert "model_modules" not in django_context.__dict__
+
+
+def test_changed_settings_repopulate_the_registry(tmp_path: Path) -> None:
+    django_context, source = _watching_context(tmp_path, model_modules={"app.models": {}})
+    (tmp_path / "models.py").write_text("DEBUG = True\n")
+    with (
+        mock.patch("mypy_django_plugin.django.context._module_file", return_value=None),
+        mock.patch("mypy_django_plugin.django.context._model_module_names", return_value=set()),
+        mock.patch("mypy_django_plugin.django.context.digest_source_files", return_value={}),
+        mock.patch.object(django_context, "_reload_model_module") as reload_model_module,
+        mock.patch.object(django_context, "_repopulate") as repopulate,
+    ):
+        assert django_context.refresh_changed_source(source)
+
+    repopulate.assert_called_once_with()
+    reload_model_module.assert_not_called()
@@ -19,8 +19,13 @@ TEMPLATE = """
 ...
 [mypy.plugins.django-stubs]
 django_settings_module = str (default: `os.getenv("DJANGO_SETTINGS_MODULE")`)
+static_settings = bool (default: false)
 strict_settings = bool (default: true)
 strict_model_abstract_attrs = bool (default: true)
+model_snapshot = bool (default: false)
+model_snapshot_file = str (default: none)
+validation_level = "types-only" | "standard" | "strict" (default: "strict")
+profile_dir = str (default: `os.getenv("DJANGO_STUBS_PROFILE_DIR")`)
 ...
 (django-stubs) mypy: error: {}
 """
@@ -30,8 +35,13 @@ TEMPLATE_TOML = """
 ...
 [tool.django-stubs]
 django_settings_module = str (default: `os.getenv("DJANGO_SETTINGS_MODULE")`)
+static_settings = bool (default: false)
 strict_settings = bool (default: true)
 strict_model_abstract_attrs = bool (default: true)
+model_snapshot = bool (default: false)
+model_snapshot_file = str (default: none)
+validation_level = "types-only" | "standard" | "strict" (default: "strict")
+profile_dir = str (default: `os.getenv("DJANGO_STUBS_PROFILE_DIR")`)
 ...
 (django-stubs) mypy: error: {}
 """
@@ -69,6 +79,11 @@ def write_to_file(file_contents: str, suffix: str | None = None) -> Generator[st
             ),
             id="no-settings-given",
         ),
+        pytest.param(
+            ["[mypy.plugins.django-stubs]", "django_settings_module = some.module", "static_settings = bad"],
+            "invalid 'static_settings': the setting must be a boolean",
+            id="invalid-static_settings",
+        ),
         pytest.param(
             ["[mypy.plugins.django-stubs]", "django_settings_module = some.module", "strict_settings = bad"],
             "invalid 'strict_settings': the setting must be a boolean",
@@ -83,6 +98,16 @@ def write_to_file(file_contents: str, suffix: str | None = None) -> Generator[st
             "invalid 'strict_model_abstract_attrs': the setting must be a boolean",
             id="invalid-strict_model_abstract_attrs",
         ),
+        pytest.param(
+            ["[mypy.plugins.django-stubs]", "django_settings_module = some.module", "model_snapshot = bad"],
+            "invalid 'model_snapshot': the setting must be a boolean",
+            id="invalid-model_snapshot",
+        ),
+        pytest.param(
+            ["[mypy.plugins.django-stubs]", "django_settings_module = some.module", "validation_level = fast"],
+            "invalid 'validation_level': the setting must be one of 'types-only', 'standard', 'strict'",
+            id="invalid-validation_level",
+        ),
     ],
 )
 def test_misconfiguration_handling(capsys: Any, config_file_contents: list[str], message_part: str) -> None:
@@ -147,6 +172,15 @@ def test_handles_filename(capsys: Any, filename: str) -> None:
             "could not load configuration file",
             id="invalid toml",
         ),
+        pytest.param(
+            """
+            [tool.django-stubs]
+            django_settings_module = "some.module"
+            static_settings = "a"
+            """,
+            "invalid 'static_settings': the setting must be a boolean",
+            id="invalid static_settings type",
+        ),
         pytest.param(
             """
             [tool.django-stubs]
@@ -165,6 +199,42 @@ def test_handles_filename(capsys: Any, filename: str) -> None:
             "invalid 'strict_model_abstract_attrs': the setting must be a boolean",
             id="invalid strict_model_abstract_attrs type",
         ),
+        pytest.param(
+            """
+            [tool.django-stubs]
+            django_settings_module = "some.module"
+            model_snapshot = "a"
+            """,
+            "invalid 'model_snapshot': the setting must be a boolean",
+            id="invalid model_snapshot type",
+        ),
+        pytest.param(
+            """
+            [tool.django-stubs]
+            django_settings_module = "some.module"
+            validation_level = "fast"
+            """,
+            "invalid 'validation_level': the setting must be one of 'types-only', 'standard', 'strict'",
+            id="invalid validation_level value",
+        ),
+        pytest.param(
+            """
+            [tool.django-stubs]
+            django_settings_module = "some.module"
+            model_snapshot_file = 1
+            """,
+            "invalid 'model_snapshot_file': the setting must be a string",
+            id="invalid model_snapshot_file type",
+        ),
+        pytest.param(
+            """
+            [tool.django-stubs]
+            django_settings_module = "some.module"
+            profile_dir = true
+            """,
+            "invalid 'profile_dir': the setting must be a string",
+            id="invalid profile_dir type",
+        ),
     ],
 )
 def test_toml_misconfiguration_handling(capsys: Any, config_file_contents: str, message_part: str) -> None:
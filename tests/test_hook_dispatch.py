@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from unittest import mock
+
+from mypy.nodes import GDEF, Block, ClassDef, SymbolTable, SymbolTableNode, TypeInfo
+from mypy.options import Options
+
+from mypy_django_plugin.lib import fullnames
+from mypy_django_plugin.main import NewSemanalDjangoPlugin
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def make_typeinfo(fullname: str) -> TypeInfo:
+    module, _, name = fullname.rpartition(".")
+    info = TypeInfo(SymbolTable(), ClassDef(name, Block([])), module)
+    info._fullname = fullname
+    info.mro = [info]
+    return info
+
+
+def make_plugin(tmp_path: Path) -> NewSemanalDjangoPlugin:
+    config_file = tmp_path / "mypy.ini"
+    config_file.write_text("[mypy.plugins.django-stubs]\ndjango_settings_module = my.settings\n")
+    options = Options()
+    options.config_file = str(config_file)
+    return NewSemanalDjangoPlugin(options)
+
+
+def test_method_hooks_are_cached_per_typeinfo(tmp_path: Path) -> None:
+    plugin = make_plugin(tmp_path)
+    types = {
+        fullnames.QUERYSET_CLASS_FULLNAME: make_typeinfo(fullnames.QUERYSET_CLASS_FULLNAME),
+        "myapp.Other": make_typeinfo("myapp.Other"),
+    }
+
+    def lookup_fully_qualified(fullname: str) -> SymbolTableNode | None:
+        info = types.get(fullname)
+        return SymbolTableNode(GDEF, info) if info is not None else None
+
+    with (
+        mock.patch.object(plugin, "lookup_fully_qualified", side_effect=lookup_fully_qualified),
+        mock.patch.object(plugin, "_resolve_method_hook", wraps=plugin._resolve_method_hook) as resolve,
+    ):
+        filter_hook = plugin.get_method_hook(f"{fullnames.QUERYSET_CLASS_FULLNAME}.filter")
+        assert filter_hook is not None
+        assert plugin.get_method_hook(f"{fullnames.QUERYSET_CLASS_FULLNAME}.filter") is filter_hook
+        # Negative answers are cached as well
+        assert plugin.get_method_hook("myapp.Other.save") is None
+        assert plugin.get_method_hook("myapp.Other.save") is None
+        assert resolve.call_count == 2
+
+        # The MRO was recalculated
+        types["myapp.Other"].mro = [types["myapp.Other"], types[fullnames.QUERYSET_CLASS_FULLNAME]]
+        assert plugin.get_method_hook("myapp.Other.save") is not None
+        assert resolve.call_count == 3
+
+        # The class was reprocessed
+        types[fullnames.QUERYSET_CLASS_FULLNAME] = make_typeinfo(fullnames.QUERYSET_CLASS_FULLNAME)
+        assert plugin.get_method_hook(f"{fullnames.QUERYSET_CLASS_FULLNAME}.filter") is filter_hook
+        assert resolve.call_count == 4
+
+        # Unknown classes are looked up again until they appear
+        assert plugin.get_method_hook("myapp.Unknown.save") is None
+        assert resolve.call_count == 4
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from contextlib import ExitStack
+from unittest import mock
+
+import pytest
+from mypy.nodes import Block, ClassDef, SymbolTable, TypeInfo
+from mypy.options import Options
+
+from mypy_django_plugin.lib import helpers
+from mypy_django_plugin.transformers import models
+
+
+def test_completed_initializers_are_skipped_on_deferral() -> None:
+    info = TypeInfo(SymbolTable(), ClassDef("MyModel", Block([])), "myapp.models")
+    ctx = mock.Mock()
+    ctx.cls.info = info
+    ctx.api.final_iteration = False
+    initializers = [
+        models.AddAnnotateUtilities,
+        models.InjectAnyAsBaseForNestedMeta,
+        models.AddDefaultPrimaryKey,
+        models.AddPrimaryKeyAlias,
+        models.AddRelatedModelsId,
+        models.AddManagers,
+        models.AddDefaultManagerAttribute,
+        models.AddReverseLookups,
+        models.AddExtraFieldMethods,
+        models.ProcessManyToManyFields,
+        models.MetaclassAdjustments,
+        models.AddRelatedModelDependencies,
+    ]
+
+    with ExitStack() as stack:
+        runs = {
+            initializer_cls.__name__: stack.enter_context(mock.patch.object(initializer_cls, "run"))
+            for initializer_cls in initializers
+        }
+        runs["AddManagers"].side_effect = [helpers.IncompleteDefnException, None]
+        for _ in range(3):
+            models.process_model_class(ctx, django_context=mock.Mock())
+
+    assert ctx.api.defer.call_count == 1
+    assert {name: run.call_count for name, run in runs.items()} == {
+        "AddAnnotateUtilities": 1,
+        # Reapplied on every pass
+        "InjectAnyAsBaseForNestedMeta": 3,
+        "AddDefaultPrimaryKey": 1,
+        "AddPrimaryKeyAlias": 1,
+        "AddRelatedModelsId": 1,
+        # Deferred once
+        "AddManagers": 2,
+        "AddDefaultManagerAttribute": 1,
+        "AddReverseLookups": 1,
+        "AddExtraFieldMethods": 1,
+        # Reapplied on every pass
+        "ProcessManyToManyFields": 3,
+        "MetaclassAdjustments": 1,
+        "AddRelatedModelDependencies": 1,
+    }
+
+
+@pytest.mark.parametrize(
+    ("fine_grained_incremental", "cache_fine_grained", "registered"),
+    [(False, False, False), (True, False, True), (False, True, True)],
+)
+def test_related_model_dependencies_are_only_registered_for_fine_grained_builds(
+    fine_grained_incremental: bool, cache_fine_grained: bool, registered: bool
+) -> None:
+    ctx = mock.Mock()
+    ctx.api.options = Options()
+    ctx.api.options.fine_grained_incremental = fine_grained_incremental
+    ctx.api.options.cache_fine_grained = cache_fine_grained
+    ctx.cls.info.fullname = "app.models.Book"
+    django_context = mock.Mock(settings_source_modules=frozenset({"my.settings"}))
+
+    with mock.patch.object(models.AddRelatedModelDependencies, "run_with_model_cls") as run_with_model_cls:
+        models.AddRelatedModelDependencies(ctx, django_context).run()
+
+    assert run_with_model_cls.called is registered
+    if registered:
+        ctx.api.add_plugin_dependency.assert_called_once_with("<my.settings.__django_model__:app:models:Book>")
+    else:
+        ctx.api.add_plugin_dependency.assert_not_called()
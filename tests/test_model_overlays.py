@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+MODELS = """\
+from typing import TypeVar
+
+from django.db import models
+from typing_extensions import Self
+
+_M = TypeVar("_M", bound=models.Model)
+
+
+class PublishedQuerySet(models.QuerySet[_M]):
+    def published(self) -> Self:
+        return self.filter(published=True)
+
+    def titles(self) -> list[str]:
+        return list(self.values_list("title", flat=True))
+
+
+PublishedManager = models.Manager.from_queryset(PublishedQuerySet)
+
+
+class Timestamped(models.Model):
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        abstract = True
+
+
+class Author(Timestamped):
+    name = models.CharField(max_length=100)
+
+
+class Tag(models.Model):
+    slug = models.SlugField(primary_key=True)
+
+
+class Book(Timestamped):
+    title = models.CharField(max_length=100)
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name="books")
+    editor = models.ForeignKey("Author", null=True, on_delete=models.SET_NULL, related_name="+")
+    tags = models.ManyToManyField(Tag)
+    published = models.BooleanField(default=False)
+
+    objects = PublishedManager()
+    drafts = models.Manager.from_queryset(PublishedQuerySet, "DraftManager")()
+
+
+class Profile(models.Model):
+    author = models.OneToOneField(Author, on_delete=models.CASCADE)
+
+
+class Novel(Book):
+    pages = models.IntegerField()
+"""
+
+MAIN = """\
+import datetime
+
+from django.db.models.fields.related_descriptors import ManyRelatedManager, RelatedManager
+from typing_extensions import assert_type
+
+from shop.models import Author, Book, Book_tags, Novel, Profile, PublishedQuerySet, Tag
+
+author = Author.objects.get()
+assert_type(author.id, int)
+assert_type(author.pk, int)
+assert_type(author.name, str)
+assert_type(author.created, datetime.datetime)
+assert_type(author.books, RelatedManager[Book])
+assert_type(author.profile, Profile)
+
+book = Book.objects.published().get()
+assert_type(book, Book)
+assert_type(Book.objects.titles(), list[str])
+assert_type(Book.drafts.published(), PublishedQuerySet[Book])
+assert_type(book.author, Author)
+assert_type(book.author_id, int)
+assert_type(book.editor, Author | None)
+assert_type(book.editor_id, int | None)
+assert_type(book.tags, ManyRelatedManager[Tag, Book_tags])
+
+tag = Tag.objects.get()
+assert_type(tag.pk, str)
+assert_type(tag.book_set, ManyRelatedManager[Book, Book_tags])
+assert_type(Book_tags.objects.get().tag_id, str)
+
+assert_type(Novel.objects.published().get(), Novel)
+assert_type(Novel.objects.get().book_ptr_id, int)
+assert issubclass(Novel.DoesNotExist, Book.DoesNotExist)
+"""
+
+
+def make_project(tmp_path: Path) -> None:
+    (tmp_path / "mysettings.py").write_text(
+        "SECRET_KEY = '1'\nINSTALLED_APPS = ['django.contrib.contenttypes', 'django.contrib.auth', 'shop']\n"
+    )
+    (tmp_path / "shop").mkdir()
+    (tmp_path / "shop" / "__init__.py").write_text("")
+    (tmp_path / "shop" / "models.py").write_text(MODELS)
+    (tmp_path / "mypy.ini").write_text("[mypy.plugins.django-stubs]\ndjango_settings_module = mysettings\n")
+
+
+def test_generate_overlays(tmp_path: Path) -> None:
+    make_project(tmp_path)
+
+    subprocess.run(
+        [sys.executable, "-m", "mypy_django_plugin", "generate-overlays"],
+        cwd=tmp_path,
+        check=True,
+        capture_output=True,
+    )
+
+    assert sorted(path.name for path in (tmp_path / "typings" / "shop").iterdir()) == ["__init__.pyi", "models.pyi"]
+    overlay = (tmp_path / "typings" / "shop" / "models.pyi").read_text()
+    # The implicit through model and the classes created by `from_queryset`
+    assert "class Book_tags(_django_db_models_base.Model):" in overlay
+    assert "class ManagerFromPublishedQuerySet(_django_db_models_manager.Manager[_OverlayModel]):" in overlay
+    assert "PublishedManager = ManagerFromPublishedQuerySet\n" in overlay
+    assert "class DoesNotExist(Book.DoesNotExist):" in overlay
+    # The stubs of the project's functions
+    assert "return self.filter" not in overlay
+
+
+def test_overlays_type_check_without_the_plugin(tmp_path: Path) -> None:
+    make_project(tmp_path)
+    (tmp_path / "main.py").write_text(MAIN)
+    subprocess.run(
+        [sys.executable, "-m", "mypy_django_plugin", "generate-overlays", "--output-dir", "overlays"],
+        cwd=tmp_path,
+        check=True,
+        capture_output=True,
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-m", "mypy", "--strict", "--no-incremental", "--config-file=", "main.py"],
+        cwd=tmp_path,
+        env={**os.environ, "MYPYPATH": "overlays"},
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stdout
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import pickle
+import subprocess
+import sys
+from typing import TYPE_CHECKING
+from unittest import mock
+
+import django
+from mypy.nodes import FileRawData, ImportFrom, MypyFile
+from mypy.options import Options
+
+from mypy_django_plugin.django.context import DjangoContext
+from mypy_django_plugin.django.snapshot import (
+    DISTRIBUTION_SOURCE_PREFIX,
+    SNAPSHOT_FILENAME,
+    SNAPSHOT_VERSION,
+    FieldSnapshot,
+    ModelRegistrySnapshot,
+    ModelSnapshot,
+    SettingsSnapshot,
+    dump_snapshot,
+    load_snapshot,
+    related_modules_by_module,
+)
+from mypy_django_plugin.main import NewSemanalDjangoPlugin
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def make_snapshot(models_file: Path) -> ModelRegistrySnapshot:
+    models_file.write_text("class Book(models.Model): ...\n")
+    models_digest = hashlib.sha256(models_file.read_bytes()).hexdigest()
+    book = ModelSnapshot(
+        module="myapp.models",
+        name="Book",
+        label_lower="myapp.book",
+        is_abstract=False,
+        fields=(
+            FieldSnapshot(
+                name="id",
+                attname="id",
+                field_class="django.db.models.fields.BigAutoField",
+                null=False,
+                primary_key=True,
+                related_model=None,
+                to_fields=(),
+            ),
+            FieldSnapshot(
+                name="author",
+                attname="author_id",
+                field_class="django.db.models.fields.related.ForeignKey",
+                null=True,
+                primary_key=False,
+                related_model="otherapp.models.Author",
+                to_fields=(None,),
+            ),
+        ),
+        reverse_related_models=("thirdapp.models.Review",),
+        reverse_accessors=(("reviews", "thirdapp.models.Review"),),
+        managers=(("objects", "django.db.models.manager.Manager"),),
+    )
+    return ModelRegistrySnapshot(
+        django_settings_module="mysettings",
+        settings=SettingsSnapshot(
+            installed_apps=("myapp",),
+            auth_user_model="auth.User",
+            default_auto_field="django.db.models.BigAutoField",
+        ),
+        auth_user_module=None,
+        models={"myapp.models.Book": book},
+        labels={"myapp.book": "myapp.models.Book"},
+        related_modules=related_modules_by_module([book]),
+        sources={str(models_file): models_digest},
+    )
+
+
+def test_roundtrip(tmp_path: Path) -> None:
+    snapshot = make_snapshot(tmp_path / "models.py")
+    snapshot_file = str(tmp_path / "cache" / "snapshot.json")
+
+    dump_snapshot(snapshot, snapshot_file)
+
+    assert load_snapshot(snapshot_file, "mysettings") == snapshot
+    assert snapshot.related_modules == {"myapp.models": ("otherapp.models", "thirdapp.models")}
+
+
+def test_stale_when_source_changes(tmp_path: Path) -> None:
+    models_file = tmp_path / "models.py"
+    snapshot = make_snapshot(models_file)
+    snapshot_file = str(tmp_path / "snapshot.json")
+    dump_snapshot(snapshot, snapshot_file)
+
+    models_file.write_text("class Book(models.Model):\n    title = models.CharField()\n")
+
+    assert load_snapshot(snapshot_file, "mysettings") is None
+
+
+def test_stale_when_settings_module_or_version_differs(tmp_path: Path) -> None:
+    snapshot = make_snapshot(tmp_path / "models.py")
+    snapshot_file = tmp_path / "snapshot.json"
+    dump_snapshot(snapshot, str(snapshot_file))
+
+    assert load_snapshot(str(snapshot_file), "othersettings") is None
+
+    data = json.loads(snapshot_file.read_text())
+    data["version"] = SNAPSHOT_VERSION + 1
+    snapshot_file.write_text(json.dumps(data))
+    assert load_snapshot(str(snapshot_file), "mysettings") is None
+
+
+def test_installed_distributions_are_validated_by_version(tmp_path: Path) -> None:
+    snapshot = make_snapshot(tmp_path / "models.py")
+    snapshot_file = str(tmp_path / "snapshot.json")
+    django_source = DISTRIBUTION_SOURCE_PREFIX + "Django"
+    dump_snapshot(snapshot._replace(sources={**snapshot.sources, django_source: django.__version__}), snapshot_file)
+    assert load_snapshot(snapshot_file, "mysettings") is not None
+
+    dump_snapshot(snapshot._replace(sources={**snapshot.sources, django_source: "1.0"}), snapshot_file)
+    assert load_snapshot(snapshot_file, "mysettings") is None
+
+
+def test_missing_or_corrupt_file(tmp_path: Path) -> None:
+    snapshot_file = tmp_path / "snapshot.json"
+    assert load_snapshot(str(snapshot_file), "mysettings") is None
+
+    snapshot_file.write_text("{not json")
+    assert load_snapshot(str(snapshot_file), "mysettings") is None
+
+
+def test_snapshot_is_picklable(tmp_path: Path) -> None:
+    snapshot = make_snapshot(tmp_path / "models.py")
+
+    assert pickle.loads(pickle.dumps(snapshot)) == snapshot
+
+
+def test_snapshot_written_by_another_process_is_loaded(tmp_path: Path) -> None:
+    snapshot = make_snapshot(tmp_path / "models.py")
+    snapshot_file = str(tmp_path / "snapshot.json")
+    django_context = DjangoContext("mysettings", snapshot_file=snapshot_file)
+    with (
+        mock.patch("mypy_django_plugin.django.context.initialize_django") as init_django,
+        mock.patch.object(django_context, "_build_registry_snapshot") as build,
+    ):
+        # Missing on startup, then written while waiting for the lock, e.g. by another parallel worker
+        assert django_context._stored_registry_snapshot is None
+        dump_snapshot(snapshot, snapshot_file)
+
+        assert django_context.registry_snapshot == snapshot
+        assert django_context.settings_snapshot == snapshot.settings
+        build.assert_not_called()
+        init_django.assert_not_called()
+
+
+def test_registry_is_read_directly_without_snapshot_file() -> None:
+    django_context = DjangoContext("mysettings")
+    django_context.__dict__.update(
+        apps_registry=mock.Mock(**{"get_model.side_effect": LookupError}),
+        settings_snapshot=SettingsSnapshot(
+            installed_apps=("myapp",), auth_user_model="auth.User", default_auto_field=""
+        ),
+        model_modules={"myapp.models": {}},
+        _model_class_fullnames_by_label_lower={"myapp.book": "myapp.models.Book"},
+    )
+    with (
+        mock.patch("mypy_django_plugin.django.context.digest_source_files") as digest,
+        mock.patch.object(django_context, "_build_registry_snapshot") as build,
+    ):
+        assert django_context.related_modules == {"myapp.models": ()}
+        assert django_context.auth_user_module is None
+        assert django_context.model_class_fullname_for_label("myapp.Book") == "myapp.models.Book"
+
+    # Fields and source digests are only needed in a snapshot file
+    build.assert_not_called()
+    digest.assert_not_called()
+
+
+def make_plugin(tmp_path: Path, *, num_workers: int = 0, extra_config: str = "") -> NewSemanalDjangoPlugin:
+    config_file = tmp_path / "mypy.ini"
+    config_file.write_text(f"[mypy.plugins.django-stubs]\ndjango_settings_module = mysettings\n{extra_config}")
+    options = Options()
+    options.config_file = str(config_file)
+    options.cache_dir = str(tmp_path / "cache")
+    options.num_workers = num_workers
+    return NewSemanalDjangoPlugin(options)
+
+
+def test_snapshot_is_used_by_parallel_workers(tmp_path: Path) -> None:
+    assert make_plugin(tmp_path).django_context.snapshot_file is None
+    assert make_plugin(tmp_path, num_workers=2).django_context.snapshot_file == str(
+        tmp_path / "cache" / SNAPSHOT_FILENAME
+    )
+
+
+def test_model_snapshot_file_setting(tmp_path: Path) -> None:
+    plugin = make_plugin(tmp_path, extra_config="model_snapshot_file = schema.json\n")
+
+    assert plugin.django_context.shared_snapshot_file == "schema.json"
+    assert plugin.django_context.snapshot_file == str(tmp_path / "cache" / SNAPSHOT_FILENAME)
+
+
+def test_stale_shared_snapshot_is_rebuilt_in_the_cache(tmp_path: Path) -> None:
+    snapshot = make_snapshot(tmp_path / "models.py")
+    shared_snapshot_file = tmp_path / "schema.json"
+    # E.g. generated before an edit of the models
+    dump_snapshot(snapshot._replace(sources={str(tmp_path / "models.py"): "outdated"}), str(shared_snapshot_file))
+    shared_data = shared_snapshot_file.read_bytes()
+    snapshot_file = str(tmp_path / "cache" / "snapshot.json")
+    django_context = DjangoContext(
+        "mysettings", snapshot_file=snapshot_file, shared_snapshot_file=str(shared_snapshot_file)
+    )
+    with mock.patch.object(django_context, "_build_registry_snapshot", return_value=snapshot):
+        assert django_context.registry_snapshot == snapshot
+
+    assert shared_snapshot_file.read_bytes() == shared_data
+    assert load_snapshot(snapshot_file, "mysettings") == snapshot
+
+
+def test_shared_snapshot_is_preferred(tmp_path: Path) -> None:
+    snapshot = make_snapshot(tmp_path / "models.py")
+    shared_snapshot_file = str(tmp_path / "schema.json")
+    dump_snapshot(snapshot, shared_snapshot_file)
+    django_context = DjangoContext(
+        "mysettings", snapshot_file=str(tmp_path / "snapshot.json"), shared_snapshot_file=shared_snapshot_file
+    )
+    with mock.patch.object(django_context, "_build_registry_snapshot") as build:
+        assert django_context.registry_snapshot == snapshot
+
+    build.assert_not_called()
+
+
+def test_dump_schema(tmp_path: Path) -> None:
+    (tmp_path / "mysettings.py").write_text(
+        "import os\n"
+        "SECRET_KEY = os.environ['SECRET_KEY']\n"
+        "INSTALLED_APPS = ['django.contrib.contenttypes', 'django.contrib.auth', 'myapp']\n"
+    )
+    (tmp_path / "myapp").mkdir()
+    (tmp_path / "myapp" / "__init__.py").write_text("")
+    (tmp_path / "myapp" / "models.py").write_text(
+        "from django.db import models\n"
+        "class Author(models.Model): ...\n"
+        "class Book(models.Model):\n"
+        "    author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='books')\n"
+        "    title = models.CharField(max_length=100)\n"
+    )
+    (tmp_path / "mypy.ini").write_text(
+        "[mypy.plugins.django-stubs]\ndjango_settings_module = mysettings\nstatic_settings = true\n"
+    )
+
+    subprocess.run(
+        [sys.executable, "-m", "mypy_django_plugin", "dump-schema", "--output", "schema.json"],
+        cwd=tmp_path,
+        check=True,
+        capture_output=True,
+    )
+
+    data = json.loads((tmp_path / "schema.json").read_text())
+    assert data["version"] == SNAPSHOT_VERSION
+    schema = data["snapshot"]
+    # Relative to the project, and Django's model modules by version, to share the file between checkouts
+    assert schema["sources"].keys() == {"mysettings.py", "myapp/models.py", DISTRIBUTION_SOURCE_PREFIX + "Django"}
+    assert schema["sources"][DISTRIBUTION_SOURCE_PREFIX + "Django"] == django.__version__
+    assert schema["labels"]["myapp.book"] == "myapp.models.Book"
+    author = schema["models"]["myapp.models.Author"]
+    assert author["reverse_accessors"] == [["books", "myapp.models.Book"]]
+    assert author["managers"] == [["objects", "django.db.models.manager.Manager"]]
+    book_fields = {field["name"]: field for field in schema["models"]["myapp.models.Book"]["fields"]}
+    assert book_fields["author"]["related_model"] == "myapp.models.Author"
+    assert book_fields["author"]["attname"] == "author_id"
+    assert book_fields["author"]["set_type"] == "typing.Any | django.db.models.expressions.Combinable"
+    assert book_fields["title"]["set_type"] == "builtins.str | builtins.int | django.db.models.expressions.Combinable"
+    assert book_fields["title"]["get_type"] == "builtins.str"
+
+
+def test_model_module_deps_with_imports_only_tree(tmp_path: Path) -> None:
+    plugin = make_plugin(tmp_path, num_workers=2)
+    plugin.django_context.__dict__["registry_snapshot"] = make_snapshot(tmp_path / "models.py")
+    # Parallel builds only deserialize the imports when collecting dependencies
+    file = MypyFile([ImportFrom("django.db", 0, [("models", None)])], [])
+    file._fullname = "myapp.models"
+    file.raw_data = FileRawData(b"", b"", [], {}, is_partial_stub_package=False, uses_template_strings=False)
+
+    deps = {module for _, module, _ in plugin.get_additional_deps(file)}
+
+    assert {"otherapp.models", "thirdapp.models"} <= deps
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+import time
+from functools import partial
+from typing import TYPE_CHECKING, Any
+from unittest import mock
+
+from mypy.nodes import MypyFile
+from mypy.options import Options
+from mypy.plugin import ReportConfigContext
+
+from mypy_django_plugin.lib.profiling import UNKNOWN_MODULE, HookProfiler
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def double(ctx: Any, *, factor: int) -> int:
+    return ctx * factor
+
+
+def test_profiled_hooks_are_recorded(tmp_path: Path) -> None:
+    profiler = HookProfiler(str(tmp_path))
+
+    def get_function_hook(fullname: str) -> Any:
+        return partial(double, factor=2) if fullname == "double" else None
+
+    profiled_get_function_hook = profiler.profile_dispatch(get_function_hook)
+    assert profiled_get_function_hook("other") is None
+    hook = profiled_get_function_hook("double")
+    assert hook(2) == 4
+    assert hook(3) == 6
+
+    profiler.write_reports()
+
+    [report_file] = tmp_path.glob("django_stubs_profile.*.json")
+    report = json.loads(report_file.read_text())
+    assert report["hooks"]["dispatch:get_function_hook"]["calls"] == 2
+    assert report["hooks"][f"{__name__}.double"]["calls"] == 2
+    assert report["modules"] == {UNKNOWN_MODULE: {f"{__name__}.double": mock.ANY}}
+
+    [trace_file] = tmp_path.glob("django_stubs_trace.*.json")
+    trace_events = json.loads(trace_file.read_text())["traceEvents"]
+    assert [(event["name"], event["cat"], event["ph"]) for event in trace_events] == [
+        (f"{__name__}.double", "get_function_hook", "X"),
+        (f"{__name__}.double", "get_function_hook", "X"),
+    ]
+
+
+def get_additional_deps(file: MypyFile | ReportConfigContext) -> list[tuple[int, str, int]]:
+    return []
+
+
+def report_config_data(ctx: MypyFile | ReportConfigContext) -> dict[str, Any]:
+    return {}
+
+
+def make_file(fullname: str) -> MypyFile:
+    file = MypyFile([], [])
+    file._fullname = fullname
+    return file
+
+
+def test_reports_are_written_once_every_parsed_module_is_written(tmp_path: Path) -> None:
+    profiler = HookProfiler(str(tmp_path))
+    options = Options()
+    profiler.install(options)
+    profiled_get_additional_deps = profiler.profile_call(get_additional_deps)
+    profiled_report_config_data = profiler.profile_call(report_config_data)
+
+    profiled_get_additional_deps(make_file("a"))
+    profiled_get_additional_deps(make_file("b"))
+    profiler.graph_loaded()
+    profiled_report_config_data(ReportConfigContext("a", "a.py", is_check=False))
+    profiled_report_config_data(ReportConfigContext("b", "b.py", is_check=True))
+    assert not list(tmp_path.iterdir())
+
+    profiled_report_config_data(ReportConfigContext("b", "b.py", is_check=False))
+
+    [report_file] = tmp_path.glob("django_stubs_profile.*.json")
+    assert json.loads(report_file.read_text())["hooks"]["get_additional_deps"]["calls"] == 2
+    # mypy still leaves with `os._exit()`
+    assert options.fast_exit
+
+
+def test_reports_are_written_when_nothing_is_parsed(tmp_path: Path) -> None:
+    profiler = HookProfiler(str(tmp_path))
+    profiler.install(Options())
+    profiler.profile_call(report_config_data)(ReportConfigContext("a", "a.py", is_check=True))
+
+    profiler.graph_loaded()
+
+    [report_file] = tmp_path.glob("django_stubs_profile.*.json")
+    assert json.loads(report_file.read_text())["modules"] == {"a": {"report_config_data": mock.ANY}}
+
+
+def test_daemon_reports_are_written_when_idle(tmp_path: Path) -> None:
+    profiler = HookProfiler(str(tmp_path))
+    options = Options()
+    options.fine_grained_incremental = True
+    with mock.patch("mypy_django_plugin.lib.profiling.IDLE_SECONDS", 0.01):
+        profiler.install(options)
+        profiler.profile_call(get_additional_deps)(make_file("a"))
+        profiler.graph_loaded()
+
+        for _ in range(500):
+            if list(tmp_path.glob("django_stubs_profile.*.json")):
+                break
+            time.sleep(0.01)
+
+    [report_file] = tmp_path.glob("django_stubs_profile.*.json")
+    assert json.loads(report_file.read_text())["hooks"]["get_additional_deps"]["calls"] == 1
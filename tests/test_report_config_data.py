@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from mypy.nodes import ImportFrom, MypyFile
+from mypy.options import Options
+from mypy.plugin import ReportConfigContext
+
+from mypy_django_plugin.django.snapshot import (
+    GET_MODEL_REFERENCES_FILENAME,
+    FieldSnapshot,
+    ModelRegistrySnapshot,
+    ModelSnapshot,
+    SettingsSnapshot,
+    record_get_model_references,
+    related_modules_by_module,
+)
+from mypy_django_plugin.main import NewSemanalDjangoPlugin
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def make_model(module: str, name: str, related_model: str | None = None) -> ModelSnapshot:
+    return ModelSnapshot(
+        module=module,
+        name=name,
+        label_lower=f"{module.partition('.')[0]}.{name.lower()}",
+        is_abstract=False,
+        fields=(
+            FieldSnapshot(
+                name="related",
+                attname="related_id",
+                field_class="django.db.models.fields.related.ForeignKey",
+                null=False,
+                primary_key=False,
+                related_model=related_model,
+                to_fields=(None,),
+            ),
+        ),
+        reverse_related_models=(),
+    )
+
+
+def make_plugin(tmp_path: Path, installed_apps: tuple[str, ...]) -> NewSemanalDjangoPlugin:
+    config_file = tmp_path / "mypy.ini"
+    config_file.write_text("[mypy.plugins.django-stubs]\ndjango_settings_module = my.settings\nmodel_snapshot = true\n")
+    options = Options()
+    options.config_file = str(config_file)
+    options.cache_dir = str(tmp_path / "cache")
+    plugin = NewSemanalDjangoPlugin(options)
+
+    models = [make_model(f"{app}.models", app.capitalize()) for app in installed_apps]
+    if "reviews" in installed_apps:
+        # `reviews.Reviews` points at `books.Books`, which gets a reverse relation
+        models = [
+            model._replace(reverse_related_models=("reviews.models.Reviews",)) if model.name == "Books" else model
+            for model in models
+            if model.name != "Reviews"
+        ]
+        models.append(make_model("reviews.models", "Reviews", related_model="books.models.Books"))
+    settings = SettingsSnapshot(
+        installed_apps=installed_apps, auth_user_model="auth.User", default_auto_field="django.db.models.AutoField"
+    )
+    # Skip setting up Django, as if the snapshot was loaded from the cache
+    plugin.django_context.__dict__["settings_snapshot"] = settings
+    plugin.django_context.__dict__["registry_snapshot"] = ModelRegistrySnapshot(
+        django_settings_module="my.settings",
+        settings=settings,
+        auth_user_module=None,
+        models={f"{model.module}.{model.name}": model for model in models},
+        labels={model.label_lower: f"{model.module}.{model.name}" for model in models},
+        related_modules=related_modules_by_module(models),
+        sources={},
+    )
+    return plugin
+
+
+def report_config_data(tmp_path: Path, installed_apps: tuple[str, ...], *module_paths: tuple[str, str]) -> list[Any]:
+    plugin = make_plugin(tmp_path, installed_apps)
+    return [
+        plugin.report_config_data(ReportConfigContext(module, path, is_check=True)) for module, path in module_paths
+    ]
+
+
+def test_config_data_only_changes_for_modules_depending_on_an_app(tmp_path: Path) -> None:
+    # As recorded by an earlier run parsing `uses_get_model`
+    references_file = tmp_path / "cache" / GET_MODEL_REFERENCES_FILENAME
+    record_get_model_references(str(references_file), "uses_get_model", ["books.books"])
+    module_paths = [
+        ("books.models", "books/models.py"),
+        ("authors.models", "authors/models.py"),
+        ("uses_get_model", "uses_get_model.py"),
+        ("unrelated", "unrelated.py"),
+    ]
+
+    before = report_config_data(tmp_path, ("books", "authors"), *module_paths)
+    # Installing and reordering apps
+    after = report_config_data(tmp_path, ("authors", "books", "reviews"), *module_paths)
+
+    assert before[0]["models"] == ["books.books"]
+    assert before[0]["related_modules"] == []
+    assert after[0]["related_modules"] == ["reviews.models"]
+    assert before[2]["get_model_modules"] == ["books.models"]
+    assert "INSTALLED_APPS" not in before[3]
+    assert before[3]["contenttypes_installed"] is False
+    assert [before_data == after_data for before_data, after_data in zip(before, after, strict=True)] == [
+        False,
+        True,
+        True,
+        True,
+    ]
+
+
+def test_contenttypes_installed_changes_config_data(tmp_path: Path) -> None:
+    module_paths = [("unrelated", "unrelated.py")]
+
+    before = report_config_data(tmp_path, ("books",), *module_paths)
+    after = report_config_data(tmp_path, ("django.contrib.contenttypes", "books"), *module_paths)
+
+    assert before[0]["contenttypes_installed"] is False
+    assert after[0]["contenttypes_installed"] is True
+
+
+def test_get_model_references_are_recorded_when_parsing(tmp_path: Path) -> None:
+    uses_get_model = tmp_path / "uses_get_model.py"
+    uses_get_model.write_text("from django.apps import apps\napps.get_model('books.Books')\n")
+    file = MypyFile([], [ImportFrom("django.apps", 0, [("apps", None)])])
+    file._fullname = "uses_get_model"
+    file.path = str(uses_get_model)
+    ctx = ReportConfigContext("uses_get_model", str(uses_get_model), is_check=True)
+
+    plugin = make_plugin(tmp_path, ("books",))
+    before = plugin.report_config_data(ctx)
+    plugin.get_additional_deps(file)
+    after = plugin.report_config_data(ctx)
+    # A later run gets the references before parsing the module
+    next_run = make_plugin(tmp_path, ("books",)).report_config_data(ctx)
+
+    assert "get_model_modules" not in before
+    assert after["get_model_modules"] == ["books.models"]
+    assert next_run == after
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import re
+import textwrap
+from typing import TYPE_CHECKING
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from mypy_django_plugin.django.static_settings import read_static_settings
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def write_module(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(textwrap.dedent(content))
+
+
+def test_literal_settings_are_read(project: Path) -> None:
+    write_module(
+        project / "settings.py",
+        """
+        import os
+        import sentry_sdk
+
+        sentry_sdk.init(dsn=os.environ["SENTRY_DSN"])
+
+        DEBUG = False
+        SECRET_KEY = os.environ["SECRET_KEY"]
+        CORE_APPS = ["django.contrib.contenttypes", "django.contrib.auth"]
+        INSTALLED_APPS = [*CORE_APPS, "myapp"]
+        INSTALLED_APPS += ["otherapp"]
+        AUTH_USER_MODEL: str = "myapp.User"
+        DATABASES = {"default": {"ENGINE": "django.db.backends.sqlite3", **{"NAME": "db"}}}
+        if not DEBUG:
+            DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+        else:
+            DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
+        """,
+    )
+
+    assert read_static_settings("settings") == {
+        "DEBUG": False,
+        "CORE_APPS": ["django.contrib.contenttypes", "django.contrib.auth"],
+        "INSTALLED_APPS": ["django.contrib.contenttypes", "django.contrib.auth", "myapp", "otherapp"],
+        "AUTH_USER_MODEL": "myapp.User",
+        "DATABASES": {"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": "db"}},
+        "DEFAULT_AUTO_FIELD": "django.db.models.BigAutoField",
+    }
+
+
+def test_unknown_values_are_left_to_django_defaults(project: Path) -> None:
+    write_module(
+        project / "settings.py",
+        """
+        import os
+
+        LANGUAGE_CODE = "fr"
+        LANGUAGE_CODE = os.environ.get("LANGUAGE_CODE", LANGUAGE_CODE)
+        ALLOWED_HOSTS = ["localhost"] + ("testserver",)
+        CACHES = {**["default"]}
+        DEBUG = False
+        if os.environ.get("DEBUG"):
+            DEBUG = True
+        if {**["default"]}:
+            DEBUG = True
+        TIME_ZONE = LANGUAGE_CODE
+        """,
+    )
+
+    assert read_static_settings("settings") == {"DEBUG": False}
+
+
+@pytest.mark.parametrize(
+    ("source", "name", "line"),
+    [
+        ('AUTH_USER_MODEL = os.environ.get("AUTH_USER_MODEL", "myapp.User")', "AUTH_USER_MODEL", 4),
+        ('INSTALLED_APPS = ["myapp"] + ("otherapp",)', "INSTALLED_APPS", 4),
+        ("INSTALLED_APPS = [*BASE_APPS]", "INSTALLED_APPS", 4),
+        ("INSTALLED_APPS += os.environ['EXTRA_APPS'].split()", "INSTALLED_APPS", 4),
+        ('DEFAULT_AUTO_FIELD = {**["django.db.models.BigAutoField"]}', "DEFAULT_AUTO_FIELD", 4),
+        ('if os.environ.get("DEBUG"):\n    INSTALLED_APPS += ["debug_toolbar"]', "INSTALLED_APPS", 5),
+        ('if {**["default"]}:\n    pass\nelse:\n    AUTH_USER_MODEL = "myapp.User"', "AUTH_USER_MODEL", 7),
+        (
+            "try:\n    import debug_toolbar\nexcept ImportError:\n    DEFAULT_AUTO_FIELD: str = 'myapp.fields.IdField'",
+            "DEFAULT_AUTO_FIELD",
+            7,
+        ),
+    ],
+)
+def test_unknown_registry_settings_are_errors(project: Path, source: str, name: str, line: int) -> None:
+    write_module(project / "proj" / "base.py", f"import os\n\nINSTALLED_APPS = ['myapp']\n{source}\n")
+    write_module(project / "proj" / "dev.py", "from .base import *\n")
+
+    location = re.escape(f"{project / 'proj' / 'base.py'}:{line}")
+    with pytest.raises(ImproperlyConfigured, match=rf"^The value of {name} assigned at {location} can't be read"):
+        read_static_settings("proj.base")
+    # Through star imports too
+    with pytest.raises(ImproperlyConfigured, match=rf"^The value of {name} assigned at {location} can't be read"):
+        read_static_settings("proj.dev")
+
+
+def test_unknown_registry_settings_assigned_again_are_read(project: Path) -> None:
+    write_module(
+        project / "settings.py",
+        """
+        import os
+
+        INSTALLED_APPS = os.environ["APPS"].split()
+        INSTALLED_APPS = ["myapp"]
+        """,
+    )
+
+    assert read_static_settings("settings") == {"INSTALLED_APPS": ["myapp"]}
+
+
+def test_split_settings_are_read(project: Path) -> None:
+    write_module(project / "proj" / "__init__.py", "")
+    write_module(project / "proj" / "settings" / "__init__.py", "")
+    write_module(
+        project / "proj" / "settings" / "base.py",
+        """
+        INSTALLED_APPS = ["django.contrib.contenttypes", "django.contrib.auth"]
+        _PRIVATE = "not exported"
+        """,
+    )
+    write_module(project / "proj" / "common.py", 'AUTH_USER_MODEL = "myapp.User"\n')
+    write_module(
+        project / "proj" / "settings" / "dev.py",
+        """
+        from .base import *
+        from ..common import AUTH_USER_MODEL as USER_MODEL
+        from proj.settings.base import INSTALLED_APPS as BASE_APPS
+
+        INSTALLED_APPS += ["myapp"]
+        AUTH_USER_MODEL = USER_MODEL
+        try:
+            from .local import *
+        except ImportError:
+            pass
+        """,
+    )
+
+    assert read_static_settings("proj.settings.dev") == {
+        "INSTALLED_APPS": ["django.contrib.contenttypes", "django.contrib.auth", "myapp"],
+        "USER_MODEL": "myapp.User",
+        "BASE_APPS": ["django.contrib.contenttypes", "django.contrib.auth"],
+        "AUTH_USER_MODEL": "myapp.User",
+    }
+
+
+def test_missing_settings_module(project: Path) -> None:
+    with pytest.raises(ModuleNotFoundError, match=r"No module named 'missing\.settings'"):
+        read_static_settings("missing.settings")